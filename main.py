@@ -7,6 +7,7 @@ GlobalWitz X Volza Programs
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import threading
+import multiprocessing
 import os
 import sys
 from pathlib import Path
@@ -47,6 +48,7 @@ class ExcelSummaryMaker:
         try:
             # Add any cleanup here if needed
             self.logger.info("Closing Excel Summary Maker application")
+            self.main_window.js_excel_reader.close()
             self.root.destroy()
         except Exception as e:
             self.logger.error(f"Error during application shutdown: {str(e)}")
@@ -62,4 +64,6 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # Sheet worker processes start this executable again in frozen builds
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,256 @@
+"""
+Aggregate store
+Monthly totals kept on disk between runs, so a new monthly export is aggregated on
+its own and merged into the history instead of rereading every earlier file
+"""
+
+import os
+import pickle
+import time
+from typing import List, Dict, Any, Optional, Sequence
+
+import numpy as np
+
+from .record_batch import RecordBatch
+from .fine_aggregate import FineAggregate
+from .price_accumulator import PriceAccumulator
+from ..utils.constants import IDENTITY_FIELDS, NO_PERIOD, PRICE_COUNT_FIELD
+
+
+class AggregateStore:
+    """
+    Totals per (importer, supplier, origin, identity field values, period) cell of
+    each source file
+
+    The cells form a RecordBatch that the processor takes like read rows: each cell
+    holds its key fields, its source, the incoterms of its first row, the sum of its positive
+    prices in usdQtyUnit with their number in priceCount, and its summed qty. Cells
+    are in the order their first row arrived, so sheets, groups and from_column
+    incoterms come out as from the concatenated inputs; only the sums are added in
+    another order, which can change the last bits of an average.
+    """
+
+    # Bump whenever the cells of given rows change
+    STORE_VERSION = 3
+    ENTITY_FIELDS = ('importer', 'supplier', 'originCountry')
+    KEY_FIELDS = ENTITY_FIELDS + IDENTITY_FIELDS + ('period',)
+    # Name of the file a cell was read from; cells of different files are kept apart
+    SOURCE_FIELD = 'source'
+
+    def __init__(self, logger, store_path: Optional[str] = None):
+        """
+        Args:
+            logger: Logger
+            store_path: File the store is loaded from and saved to; None keeps it in memory
+        """
+        self.logger = logger
+        self.store_path = store_path
+        self.settings = None
+        self.sources = []
+        self.cells = self._empty_cells()
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    @property
+    def periods(self) -> List[int]:
+        """Sorted periods with cells (NO_PERIOD left out)"""
+        return self._periods_of(self.cells)
+
+    def _periods_of(self, cells: RecordBatch) -> List[int]:
+        if not len(cells):
+            return []
+        dictionary = cells.dictionary('period')
+        used = np.flatnonzero(np.bincount(cells.codes('period'), minlength=len(dictionary)))
+        return sorted(dictionary[code] for code in used.tolist() if dictionary[code] != NO_PERIOD)
+
+    def load(self) -> bool:
+        """
+        Read the store from disk
+
+        Returns:
+            True if a store was read; a missing or unreadable file leaves it empty
+        """
+        if not self.store_path or not os.path.exists(self.store_path):
+            return False
+        try:
+            with open(self.store_path, 'rb') as file:
+                state = pickle.load(file)
+            if state.get('version') != self.STORE_VERSION:
+                raise ValueError(f"version {state.get('version')} instead of {self.STORE_VERSION}")
+            if state['cells'].fields != self._empty_cells().fields:
+                raise ValueError(f"unexpected fields {state['cells'].fields}")
+            self.settings = state['settings']
+            self.sources = state['sources']
+            self.cells = state['cells']
+            self.logger.info(f"Aggregate store: {len(self.cells)} cells from {len(self.sources)} files")
+            return True
+        except Exception as error:
+            self.logger.warning(f"Ignoring unreadable aggregate store {self.store_path}: {str(error)}")
+            return False
+
+    def save(self) -> bool:
+        """
+        Write the store to disk
+
+        Returns:
+            True if the store was written
+        """
+        try:
+            os.makedirs(os.path.dirname(self.store_path) or ".", exist_ok=True)
+            state = {
+                'version': self.STORE_VERSION,
+                'settings': self.settings,
+                'sources': self.sources,
+                'cells': self.cells
+            }
+            temp_path = f"{self.store_path}.tmp"
+            with open(temp_path, 'wb') as file:
+                pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.store_path)
+            return True
+        except Exception as error:
+            self.logger.error(f"Could not write aggregate store {self.store_path}: {str(error)}")
+            return False
+
+    def clear(self):
+        """Forget every cell (the file is rewritten on the next save)"""
+        self.settings = None
+        self.sources = []
+        self.cells = self._empty_cells()
+
+    def append(self, batch: RecordBatch, source: str, settings: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Merge newly read rows into the store
+
+        Only the new rows are grouped. They replace every cell an earlier append of
+        the same source added, including rows without a period. Cells of other sources
+        are kept, also in the months the new rows cover: the summaries add the cells
+        of every source, so months shared by several files are reported in total.
+
+        Args:
+            batch: Preprocessed rows with a 'period' field
+            source: Name of the file the rows were read from
+            settings: Read settings the rows depend on (e.g. the mapped fields); every
+                append must pass the same
+
+        Returns:
+            Dict with 'rows', 'newCells', 'sharedPeriods' (months other sources also
+            cover) and 'cells', or None if the rows cannot be added
+        """
+        if 'period' not in batch.fields or not batch.is_dictionary('period'):
+            self.logger.error("Aggregate store: rows have no 'period' field")
+            return None
+        if self.sources and settings != self.settings:
+            self.logger.error(f"Aggregate store: rows were read with {settings}, the store with {self.settings}; clear the store first")
+            return None
+
+        try:
+            new_cells = self._cells_of(batch, source)
+            new_periods = set(batch.dictionary('period')[code] for code in np.unique(batch.codes('period')).tolist())
+            kept = self.cells
+            if any(entry['source'] == source for entry in self.sources):
+                self.logger.info(f"Aggregate store: replacing the cells of the earlier '{source}'")
+                same_source = np.array([value == source for value in kept.dictionary(self.SOURCE_FIELD)], dtype=bool)
+                kept = kept.filter(~same_source[kept.codes(self.SOURCE_FIELD)])
+            shared_periods = sorted(period for period in set(self._periods_of(kept)) & new_periods if period != NO_PERIOD)
+            if shared_periods:
+                self.logger.info(f"Aggregate store: {len(shared_periods)} months of '{source}' are also in other files; their totals are added")
+
+            self.cells = self._merge_cells(RecordBatch.concat([kept, new_cells]))
+            self.settings = settings
+            self.sources = [entry for entry in self.sources if entry['source'] != source]
+            self.sources.append({
+                'source': source,
+                'periods': sorted(period for period in new_periods if period != NO_PERIOD),
+                'rows': len(batch),
+                'appended': time.time()
+            })
+            self.logger.info(f"Aggregate store: {len(batch)} rows of '{source}' -> {len(new_cells)} cells, {len(self.cells)} cells stored")
+            return {
+                'rows': len(batch),
+                'newCells': len(new_cells),
+                'sharedPeriods': shared_periods,
+                'cells': len(self.cells)
+            }
+        except Exception as error:
+            self.logger.error(f"Aggregate store: could not add '{source}': {str(error)}")
+            return None
+
+    def add(self, batch: RecordBatch, source: str) -> int:
+        """
+        Add rows to the cells of a source, keeping the cells it already has
+
+        For the batches of a stream, added one after another; append() is the entry
+        point for a whole file.
+
+        Args:
+            batch: Preprocessed rows with a 'period' field
+            source: Name of the file the rows were read from
+
+        Returns:
+            Number of cells the rows formed
+        """
+        new_cells = self._cells_of(batch, source)
+        self.cells = self._merge_cells(RecordBatch.concat([self.cells, new_cells]))
+        return len(new_cells)
+
+    def to_batch(self) -> RecordBatch:
+        """The cells, as rows for JSStyleProcessor.process_data_like_javascript"""
+        return self.cells
+
+    def _empty_cells(self) -> RecordBatch:
+        columns = {field: (np.zeros(0), [None]) for field in self.KEY_FIELDS}
+        columns[self.SOURCE_FIELD] = (np.zeros(0), [""])
+        columns['incoterms'] = (np.zeros(0), [""])
+        for field in ('usdQtyUnit', 'qty', PRICE_COUNT_FIELD):
+            columns[field] = np.zeros(0)
+        return RecordBatch.from_codes(0, columns)
+
+    def _key_codes(self, batch: RecordBatch, fields: Sequence[str]) -> List[np.ndarray]:
+        """Codes of key fields per row (zeros for a missing field)"""
+        return [batch.codes(field) if field in batch.fields and batch.is_dictionary(field)
+                else np.zeros(len(batch), dtype=np.uint8) for field in fields]
+
+    def _key_sizes(self, batch: RecordBatch, fields: Sequence[str]) -> List[int]:
+        return [len(batch.dictionary(field)) if field in batch.fields and batch.is_dictionary(field) else 1
+                for field in fields]
+
+    def _cells_of(self, batch: RecordBatch, source: str) -> RecordBatch:
+        """Cells of rows read from one source, in first-seen order"""
+        cell_of_row, first_rows = FineAggregate.group_rows(self._key_codes(batch, self.KEY_FIELDS),
+                                                           self._key_sizes(batch, self.KEY_FIELDS))
+        totals = PriceAccumulator.grouped(cell_of_row, len(first_rows), self._numbers(batch, 'usdQtyUnit'),
+                                          self._numbers(batch, 'qty'))
+
+        columns = {}
+        for field in self.KEY_FIELDS:
+            columns[field] = self._first_values(batch, field, first_rows, None)
+        columns[self.SOURCE_FIELD] = (np.zeros(len(first_rows)), [source])
+        columns['incoterms'] = self._first_values(batch, 'incoterms', first_rows, "")
+        columns['usdQtyUnit'] = np.array([total.price_total for total in totals], dtype=np.float64)
+        columns['qty'] = np.array([total.qty_sum for total in totals], dtype=np.float64)
+        columns[PRICE_COUNT_FIELD] = np.array([total.price_count for total in totals], dtype=np.float64)
+        return RecordBatch.from_codes(len(first_rows), columns)
+
+    def _first_values(self, batch: RecordBatch, field: str, first_rows: np.ndarray, missing: Any) -> tuple:
+        """(codes, dictionary) of a field at the first row of each cell; a missing field holds missing"""
+        if field in batch.fields and batch.is_dictionary(field):
+            return batch.codes(field)[first_rows], batch.dictionary(field)
+        return np.zeros(len(first_rows)), [missing]
+
+    def _merge_cells(self, cells: RecordBatch) -> RecordBatch:
+        """Cells with the same key added together, at the position of the first"""
+        fields = self.KEY_FIELDS + (self.SOURCE_FIELD,)
+        groups, first_rows = FineAggregate.group_rows(self._key_codes(cells, fields), self._key_sizes(cells, fields))
+        if len(first_rows) == len(cells):
+            return cells
+        merged = cells.take(first_rows)
+        for field in ('usdQtyUnit', 'qty', PRICE_COUNT_FIELD):
+            merged = merged.with_column(field, np.bincount(groups, weights=cells.numbers(field), minlength=len(first_rows)))
+        return merged
+
+    def _numbers(self, batch: RecordBatch, field: str) -> np.ndarray:
+        if field in batch.fields and not batch.is_dictionary(field):
+            return batch.numbers(field)
+        return np.zeros(len(batch), dtype=np.float64)
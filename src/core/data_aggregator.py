@@ -3,28 +3,32 @@ Data Aggregator Module - Handles data aggregation and summarization
 Implements the exact logic from the original JavaScript aggregator
 """
 
+import logging
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Sequence, Union
 from collections import defaultdict
 from datetime import datetime
 
-from ..utils.helpers import safe_average, get_month_name, average_greater_than_zero
+from .record_batch import RecordBatch
+from .period_axis import PeriodAxis
+from .price_accumulator import PriceAccumulator
+from .fine_aggregate import FineAggregate
+from ..utils.constants import IDENTITY_FIELDS, PRICE_COUNT_FIELD
+from ..utils.helpers import safe_average, get_month_name, average_greater_than_zero, safe_string_value
 
 class DataAggregator:
     """Handles data aggregation and summarization with JavaScript-compatible logic"""
     
+    # "vectorized" groups codes and reduces with NumPy, "loop" is the row-by-row reference
+    AGGREGATION_ENGINES = ("vectorized", "loop")
+    
     def __init__(self, logger):
         self.logger = logger
     
     def _safe_string_value(self, value):
         """Convert value to string safely, handling NaN and None"""
-        if value is None:
-            return ""
-        if pd.isna(value) or (isinstance(value, float) and pd.isna(value)):
-            return ""
-        if str(value).strip() == "":
-            return ""
-        return str(value).strip()
+        return safe_string_value(value)
 
     def _get_combination_fields(self, combination_mode: str = "default", custom_fields: List[str] = None) -> List[str]:
         if combination_mode == "fiber":
@@ -36,18 +40,29 @@ class DataAggregator:
         # Default mode: hsCode + item + gsm + addOn
         return ['hsCode', 'item', 'gsm', 'addOn']
 
-    def perform_aggregation(self, data: List[Dict[str, Any]], combination_mode: str = "default", custom_combination_fields: List[str] = None) -> Dict[str, Any]:
+    def perform_aggregation(self, data: Union[RecordBatch, List[Dict[str, Any]]], combination_mode: str = "default", custom_combination_fields: List[str] = None,
+                            period_axis: Optional[PeriodAxis] = None,
+                            aggregation_engine: str = "vectorized") -> Dict[str, Any]:
         """
         Perform aggregation exactly like the JavaScript version
         
         Args:
-            data: List of dictionaries with raw data
+            data: Rows to aggregate (RecordBatch or list of row dictionaries)
+            period_axis: Month columns of the run; rows whose period is not on it are
+                skipped (defaults to the years present in data)
+            aggregation_engine: "vectorized" (grouped reductions over a RecordBatch) or
+                "loop" (row-by-row reference); lists of rows always take the loop
             
         Returns:
-            Dict with 'summaryLvl1' and 'summaryLvl2' keys
+            Dict with 'summaryLvl1' and 'summaryLvl2' keys. Summaries of the vectorized
+            engine carry 'period' and 'combinationId' (see _aggregate_batch_months).
         """
+        if aggregation_engine not in self.AGGREGATION_ENGINES:
+            self.logger.error(f"    Unknown aggregation engine '{aggregation_engine}'")
+            return {'summaryLvl1': [], 'summaryLvl2': []}
+        aggregation_engine = self._engine_for(data, aggregation_engine)
+        
         try:
-            monthly_summary = {}
             combination_fields = self._get_combination_fields(combination_mode, custom_combination_fields)
             
             self.logger.info(f"    Starting aggregation for {len(data)} rows")
@@ -58,96 +73,21 @@ class DataAggregator:
             
             # Debug: Show sample data being processed
             for i, row in enumerate(data[:3]):
-                self.logger.info(f"    Sample row {i}: month='{row.get('month')}', hsCode='{row.get('hsCode')}', date='{row.get('date')}'")
-            
-            valid_rows_processed = 0
-            
-            for index, row in enumerate(data):
-                # Required columns: month, hsCode
-                # gsm, item, addOn can be '-' or empty string and are valid for grouping
-                if not row.get('month') or row.get('month') == "-" or not row.get('hsCode') or row.get('hsCode') == "-":
-                    self.logger.debug(f"    Skipping row {index}: month='{row.get('month')}', hsCode='{row.get('hsCode')}'")
-                    continue
-                
-                field_values = {
-                    field: self._safe_string_value(row.get(field))
-                    for field in combination_fields
-                }
-                
-                key_parts = [row['month']] + [field_values[field] for field in combination_fields]
-                key = "-".join(key_parts)
-                
-                if key not in monthly_summary:
-                    monthly_summary[key] = {
-                        'month': row['month'],
-                        'usdQtyUnits': [],
-                        'totalQty': 0
-                    }
-                    monthly_summary[key].update(field_values)
-                
-                usd_qty = row.get('usdQtyUnit', 0)  # Fixed field name to match Excel reader
-                qty = row.get('qty', 0)
-                
-                # Ensure numeric values
-                try:
-                    usd_qty = float(usd_qty) if usd_qty is not None else 0
-                except (ValueError, TypeError):
-                    usd_qty = 0
-                    
-                try:
-                    qty = float(qty) if qty is not None else 0
-                except (ValueError, TypeError):
-                    qty = 0
-                
-                # Debug: Log price values for first few rows
-                if index < 5:
-                    self.logger.info(f"    Row {index}: usdQtyUnit={usd_qty}, qty={qty}")
-                
-                if usd_qty > 0:  # Only add positive prices
-                    monthly_summary[key]['usdQtyUnits'].append(usd_qty)
-                monthly_summary[key]['totalQty'] += qty
-                valid_rows_processed += 1
-            
-            self.logger.info(f"    Processed {valid_rows_processed} valid rows out of {len(data)} total rows")
-            self.logger.info(f"    Created {len(monthly_summary)} monthly groups")
-            
-            # Create summaryLvl1Data
-            summary_lvl1_data = []
-            for group in monthly_summary.values():
-                summary_row = {
-                    'month': group['month'],
-                    'avgPrice': average_greater_than_zero(group['usdQtyUnits']),
-                    'totalQty': group['totalQty']
-                }
-                for field in combination_fields:
-                    summary_row[field] = self._safe_string_value(group.get(field))
-                summary_lvl1_data.append(summary_row)
-            
-            # Create recapSummary
-            recap_summary = {}
-            for row in summary_lvl1_data:
-                key = "-".join(self._safe_string_value(row.get(field)) for field in combination_fields)
-                if key not in recap_summary:
-                    recap_summary[key] = {
-                        'avgPrices': [],
-                        'totalQty': 0
-                    }
-                    for field in combination_fields:
-                        recap_summary[key][field] = self._safe_string_value(row.get(field))
-                if row['avgPrice'] and row['avgPrice'] > 0:
-                    recap_summary[key]['avgPrices'].append(row['avgPrice'])
-                recap_summary[key]['totalQty'] += row['totalQty']
+                month = row.get('month') if 'period' not in row else PeriodAxis.period_name(row.get('period'))
+                self.logger.info(f"    Sample row {i}: month='{month}', hsCode='{row.get('hsCode')}', date='{row.get('date')}'")
+            
+            vectorized = (aggregation_engine == "vectorized" and isinstance(data, RecordBatch)
+                          and 'period' in data.fields and 'hsCode' in data.fields and data.is_dictionary('period'))
+            if vectorized:
+                if period_axis is None:
+                    period_axis = PeriodAxis.from_periods(data.dictionary('period'))
+                summary_lvl1_data = self._aggregate_batch_months(data, combination_fields, period_axis).get(0, [])
+            else:
+                if period_axis is None:
+                    period_axis = PeriodAxis.from_periods(row.get('period') for row in data)
+                summary_lvl1_data = self._aggregate_row_months(data, combination_fields, period_axis)
             
-            # Create summaryLvl2Data
-            summary_lvl2_data = []
-            for group in recap_summary.values():
-                summary_row = {
-                    'avgOfSummaryPrice': average_greater_than_zero(group['avgPrices']),
-                    'totalOfSummaryQty': group['totalQty']
-                }
-                for field in combination_fields:
-                    summary_row[field] = self._safe_string_value(group.get(field))
-                summary_lvl2_data.append(summary_row)
+            summary_lvl2_data = self._aggregate_combinations(summary_lvl1_data, combination_fields, vectorized)
             
             self.logger.info(f"    Final result: Level1={len(summary_lvl1_data)}, Level2={len(summary_lvl2_data)}")
             
@@ -160,6 +100,276 @@ class DataAggregator:
             self.logger.error(f"    Error in perform_aggregation: {str(e)}")
             return {'summaryLvl1': [], 'summaryLvl2': []}
 
+    def aggregate_blocks(self, data: RecordBatch, blocks: np.ndarray, combination_mode: str = "default",
+                         custom_combination_fields: List[str] = None, period_axis: Optional[PeriodAxis] = None,
+                         aggregation_engine: str = "vectorized",
+                         fine: Optional[FineAggregate] = None) -> Dict[int, Dict[str, Any]]:
+        """
+        perform_aggregation of many blocks of rows (e.g. every supplier group of every
+        sheet) in one pass
+        
+        The vectorized engine groups all rows at once on (block, period, combination) and
+        then splits the summaries by block; each block's summaries equal those of
+        perform_aggregation over its rows alone. The loop engine aggregates block by block.
+        Passing the fine aggregate of an earlier call with the same data and blocks
+        (see fine_aggregate) skips the grouping of the rows, e.g. on a mode switch.
+        
+        Args:
+            data: Rows to aggregate
+            blocks: Non-negative block number of each row
+            period_axis: Month columns of the run (defaults to the years present in data)
+            aggregation_engine: "vectorized" or "loop" (see perform_aggregation)
+            fine: Optional FineAggregate of data and blocks to roll up from
+            
+        Returns:
+            Block number -> perform_aggregation result, for every block with rows
+        """
+        aggregation_engine = self._engine_for(data, aggregation_engine)
+        blocks = np.asarray(blocks, dtype=np.intp)
+        block_rows = {}
+        if len(blocks):
+            order = np.argsort(blocks, kind='stable')
+            boundaries = np.flatnonzero(np.diff(blocks[order])) + 1
+            block_rows = {int(blocks[rows[0]]): rows for rows in np.split(order, boundaries)}
+        
+        vectorized = (aggregation_engine == "vectorized" and 'period' in data.fields
+                      and 'hsCode' in data.fields and data.is_dictionary('period'))
+        if not vectorized:
+            return {block: self.perform_aggregation(data.take(rows), combination_mode, custom_combination_fields,
+                                                    period_axis, aggregation_engine)
+                    for block, rows in block_rows.items()}
+        
+        try:
+            combination_fields = self._get_combination_fields(combination_mode, custom_combination_fields)
+            if period_axis is None:
+                period_axis = PeriodAxis.from_periods(data.dictionary('period'))
+            self.logger.info(f"    Aggregating {len(data)} rows in {len(block_rows)} blocks")
+            
+            summary_lvl1_by_block = self._aggregate_batch_months(data, combination_fields, period_axis, blocks, fine)
+            results = {}
+            for block in block_rows:
+                summary_lvl1_data = summary_lvl1_by_block.get(block, [])
+                results[block] = {
+                    'summaryLvl1': summary_lvl1_data,
+                    'summaryLvl2': self._aggregate_combinations(summary_lvl1_data, combination_fields, True)
+                }
+            return results
+        
+        except Exception as e:
+            self.logger.error(f"    Error in aggregate_blocks: {str(e)}")
+            return {}
+
+    def _aggregate_row_months(self, data: Union[RecordBatch, List[Dict[str, Any]]], combination_fields: List[str],
+                              period_axis: PeriodAxis) -> List[Dict[str, Any]]:
+        """Monthly summary rows (summaryLvl1) built row by row"""
+        monthly_summary = {}
+        valid_rows_processed = 0
+        
+        for index, row in enumerate(data):
+            # Rows with a period are labeled by its column; older rows carry the label in 'month'
+            month = period_axis.label(row['period']) if 'period' in row else row.get('month')
+            
+            # Required columns: month, hsCode
+            # gsm, item, addOn can be '-' or empty string and are valid for grouping
+            if not month or month == "-" or not row.get('hsCode') or row.get('hsCode') == "-":
+                self.logger.debug(f"    Skipping row {index}: month='{month}', hsCode='{row.get('hsCode')}'")
+                continue
+            
+            field_values = {
+                field: self._safe_string_value(row.get(field))
+                for field in combination_fields
+            }
+            
+            key = (month,) + tuple(field_values[field] for field in combination_fields)
+            
+            if key not in monthly_summary:
+                monthly_summary[key] = {
+                    'month': month,
+                    'usdQtyUnits': [],
+                    'totalQty': 0
+                }
+                monthly_summary[key].update(field_values)
+            
+            usd_qty = row.get('usdQtyUnit', 0)  # Fixed field name to match Excel reader
+            qty = row.get('qty', 0)
+            
+            # Ensure numeric values
+            try:
+                usd_qty = float(usd_qty) if usd_qty is not None else 0
+            except (ValueError, TypeError):
+                usd_qty = 0
+                
+            try:
+                qty = float(qty) if qty is not None else 0
+            except (ValueError, TypeError):
+                qty = 0
+            
+            # Debug: Log price values for first few rows
+            if index < 5:
+                self.logger.info(f"    Row {index}: usdQtyUnit={usd_qty}, qty={qty}")
+            
+            if usd_qty > 0:  # Only add positive prices
+                monthly_summary[key]['usdQtyUnits'].append(usd_qty)
+            monthly_summary[key]['totalQty'] += qty
+            valid_rows_processed += 1
+        
+        self.logger.info(f"    Processed {valid_rows_processed} valid rows out of {len(data)} total rows")
+        self.logger.info(f"    Created {len(monthly_summary)} monthly groups")
+        
+        # Create summaryLvl1Data
+        summary_lvl1_data = []
+        for group in monthly_summary.values():
+            summary_row = {
+                'month': group['month'],
+                'avgPrice': average_greater_than_zero(group['usdQtyUnits']),
+                'totalQty': group['totalQty']
+            }
+            for field in combination_fields:
+                summary_row[field] = self._safe_string_value(group.get(field))
+            summary_lvl1_data.append(summary_row)
+        return summary_lvl1_data
+
+    def fine_aggregate(self, data: RecordBatch, blocks: np.ndarray, period_axis: PeriodAxis,
+                       combination_fields: Sequence[str] = ()) -> FineAggregate:
+        """
+        Valid rows of a RecordBatch grouped at the finest grain, ready to roll up
+        
+        Rows count when their period is on the axis and their hsCode is present, as in
+        _aggregate_row_months.
+        
+        Args:
+            data: Rows to aggregate
+            blocks: Non-negative block number of each row
+            period_axis: Month columns of the run
+            combination_fields: Fields to keep besides IDENTITY_FIELDS
+            
+        Returns:
+            FineAggregate over IDENTITY_FIELDS and combination_fields
+        """
+        # Required columns: a period on the axis, hsCode
+        period_dictionary = data.dictionary('period')
+        on_axis = np.fromiter((period_axis.column(period) is not None for period in period_dictionary),
+                              dtype=bool, count=len(period_dictionary))
+        present = on_axis[data.codes('period')] & self._present_mask(data, 'hsCode')
+        if self.logger.isEnabledFor(logging.DEBUG):
+            for index in np.flatnonzero(~present).tolist():
+                self.logger.debug(f"    Skipping row {index}: month='{period_axis.label(data.value('period', index))}', hsCode='{data.value('hsCode', index)}'")
+        valid = np.flatnonzero(present)
+        
+        prices = self._numeric_values(data, 'usdQtyUnit')[valid]
+        quantities = self._numeric_values(data, 'qty')[valid]
+        # Rows of an aggregate store are totals of several rows
+        price_counts = data.numbers(PRICE_COUNT_FIELD)[valid] if PRICE_COUNT_FIELD in data.fields else None
+        
+        # Debug: Log price values for first few rows
+        for index, usd_qty, qty in zip(valid[:5].tolist(), prices[:5].tolist(), quantities[:5].tolist()):
+            if index < 5:
+                self.logger.info(f"    Row {index}: usdQtyUnit={usd_qty}, qty={qty}")
+        
+        fields = IDENTITY_FIELDS + tuple(field for field in combination_fields if field not in IDENTITY_FIELDS)
+        fine = FineAggregate(data, blocks, valid, prices, quantities, fields, price_counts)
+        self.logger.info(f"    Processed {len(valid)} valid rows out of {len(data)} total rows")
+        return fine
+
+    def _aggregate_batch_months(self, data: RecordBatch, combination_fields: List[str],
+                                period_axis: PeriodAxis, blocks: Optional[np.ndarray] = None,
+                                fine: Optional[FineAggregate] = None) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Monthly summary rows (summaryLvl1) of a RecordBatch, rolled up from a FineAggregate
+
+        Produces the same groups, in the same order and with the same sums, as
+        _aggregate_row_months: mapped values and on-axis periods are one-to-one with
+        their codes, so the code combinations are the groups. Rows carry their integer
+        'period' instead of a month label, and 'combinationId': the codes of their
+        combination field values in RecordBatch.map_column(field, safe_string_value),
+        which the formatter matches and sorts on instead of the strings.
+
+        With blocks (a block number per row) the block is the leading part of the group,
+        and each block's rows keep the order they would have if the block were
+        aggregated alone. Returns block -> rows (everything is block 0 without blocks).
+        A fine aggregate of the same data and blocks that covers the fields is reused.
+        """
+        if fine is None or not fine.covers(combination_fields):
+            if blocks is None:
+                blocks = np.zeros(len(data), dtype=np.intp)
+            fine = self.fine_aggregate(data, blocks, period_axis, combination_fields)
+        summary_lvl1_by_block = fine.rollup(combination_fields)
+        self.logger.info(f"    Created {sum(len(rows) for rows in summary_lvl1_by_block.values())} monthly groups")
+        return summary_lvl1_by_block
+
+    def _aggregate_combinations(self, summary_lvl1_data: List[Dict[str, Any]], combination_fields: List[str],
+                                vectorized: bool) -> List[Dict[str, Any]]:
+        """
+        Recap summary rows (summaryLvl2): the average of the positive monthly averages
+        and the total quantity per combination, in first-seen order
+        """
+        # Create recapSummary
+        recap_summary = {}
+        group_ids = {}
+        recap_groups = []
+        for row in summary_lvl1_data:
+            # combinationId codes are one-to-one with the field values where rows carry them
+            key = row.get('combinationId')
+            if key is None:
+                key = tuple(self._safe_string_value(row.get(field)) for field in combination_fields)
+            if key not in group_ids:
+                group_ids[key] = len(recap_summary)
+                recap_summary[key] = {field: self._safe_string_value(row.get(field)) for field in combination_fields}
+                if 'combinationId' in row:
+                    recap_summary[key]['combinationId'] = row['combinationId']
+            recap_groups.append(group_ids[key])
+        
+        if vectorized:
+            totals = PriceAccumulator.grouped(
+                np.asarray(recap_groups, dtype=np.intp), len(recap_summary),
+                np.asarray([row['avgPrice'] for row in summary_lvl1_data], dtype=np.float64),
+                np.asarray([row['totalQty'] for row in summary_lvl1_data], dtype=np.float64))
+            averages = [group_totals.average for group_totals in totals]
+            quantities = [group_totals.qty_sum for group_totals in totals]
+        else:
+            avg_prices = [[] for _ in recap_summary]
+            quantities = [0] * len(recap_summary)
+            for group, row in zip(recap_groups, summary_lvl1_data):
+                if row['avgPrice'] and row['avgPrice'] > 0:
+                    avg_prices[group].append(row['avgPrice'])
+                quantities[group] += row['totalQty']
+            averages = [average_greater_than_zero(prices) for prices in avg_prices]
+        
+        # Create summaryLvl2Data
+        summary_lvl2_data = []
+        for group, average, quantity in zip(recap_summary.values(), averages, quantities):
+            summary_row = {
+                'avgOfSummaryPrice': average,
+                'totalOfSummaryQty': quantity
+            }
+            for field in combination_fields:
+                summary_row[field] = group[field]
+            if 'combinationId' in group:
+                summary_row['combinationId'] = group['combinationId']
+            summary_lvl2_data.append(summary_row)
+        return summary_lvl2_data
+
+    def _engine_for(self, data: Union[RecordBatch, List[Dict[str, Any]]], aggregation_engine: str) -> str:
+        """The engine to use for some rows: rows of an aggregate store need the vectorized one"""
+        if aggregation_engine == "loop" and isinstance(data, RecordBatch) and PRICE_COUNT_FIELD in data.fields:
+            self.logger.warning("    Aggregate store rows are totals; using the vectorized engine")
+            return "vectorized"
+        return aggregation_engine
+
+    def _present_mask(self, data: RecordBatch, field: str) -> np.ndarray:
+        """Rows whose value of a field is neither empty nor '-'"""
+        if data.is_dictionary(field):
+            dictionary = data.dictionary(field)
+            present = np.fromiter((bool(value) and value != "-" for value in dictionary), dtype=bool, count=len(dictionary))
+            return present[data.codes(field)]
+        return np.fromiter((bool(value) and value != "-" for value in data.column(field)), dtype=bool, count=len(data))
+
+    def _numeric_values(self, data: RecordBatch, field: str) -> np.ndarray:
+        """float64 values of a numeric field, zeros when the field is missing"""
+        if field in data.fields and not data.is_dictionary(field):
+            return data.numbers(field)
+        return np.zeros(len(data), dtype=np.float64)
+
     def aggregate_data(self, df: pd.DataFrame, year: int = None) -> Dict[str, Any]:
         """
         Aggregate data by importer and create summary tables
@@ -9,13 +9,15 @@ from typing import List, Dict, Optional, Any
 import openpyxl
 from openpyxl import load_workbook
 
-from ..utils.helpers import DateParser, NumberParser
+from ..utils.helpers import DateParser, NumberParser, resolve_excel_engine
+from ..utils.constants import DEFAULT_EXCEL_ENGINE
 
 class ExcelReader:
     """Handles Excel file reading and data preprocessing"""
     
-    def __init__(self, logger):
+    def __init__(self, logger, excel_engine: str = DEFAULT_EXCEL_ENGINE):
         self.logger = logger
+        self.excel_engine = excel_engine
         self.current_file = None
         self.workbook = None
         self.sheet_names = []
@@ -169,14 +171,15 @@ class ExcelReader:
                 raise ValueError("No file loaded")
             
             # Read with pandas for easier processing
+            engine = resolve_excel_engine(self.current_file, self.excel_engine)
             df = pd.read_excel(
                 self.current_file,
                 sheet_name=sheet_name,
                 header=header_row - 1,  # pandas uses 0-based indexing
-                engine='openpyxl'
+                engine=engine
             )
             
-            self.logger.info(f"Read {len(df)} rows from sheet '{sheet_name}'")
+            self.logger.info(f"Read {len(df)} rows from sheet '{sheet_name}' ({engine or 'default'} engine)")
             
             # Process column mapping
             processed_data = {}
@@ -223,10 +226,7 @@ class ExcelReader:
     
     def _process_number_column(self, column: pd.Series, number_format: str) -> pd.Series:
         """Process numeric column with specified format"""
-        def parse_number_value(value):
-            return NumberParser.parse_number(value, number_format)
-        
-        return column.apply(parse_number_value)
+        return NumberParser.parse_number_series(column, number_format)
     
     def _process_text_column(self, column: pd.Series) -> pd.Series:
         """Process text column"""
@@ -0,0 +1,176 @@
+"""
+Fine aggregate
+Monthly totals at the finest identity grain, rolled up to any combination mode
+"""
+
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .record_batch import RecordBatch
+from .price_accumulator import PriceAccumulator
+from ..utils.constants import IDENTITY_FIELDS
+from ..utils.helpers import safe_string_value
+
+
+class FineAggregate:
+    """
+    Rows of a RecordBatch grouped once on (block, period, every identity field)
+
+    rollup() derives the monthly summaries of any subset of the fields from the fine
+    groups alone. Each row remembers its fine group, so the rolled-up totals are
+    reduced over the rows again, in row order, and equal a direct aggregation to the
+    bit; a mode switch regroups the fine groups instead of the rows. Field values are
+    the codes of RecordBatch.map_column(field, safe_string_value), as in the
+    'combinationId' of the summaries.
+    """
+
+    def __init__(self, data: RecordBatch, blocks: np.ndarray, valid_rows: np.ndarray,
+                 prices: np.ndarray, quantities: np.ndarray, fields: Sequence[str] = IDENTITY_FIELDS,
+                 price_counts: Optional[np.ndarray] = None):
+        """
+        Args:
+            data: All rows
+            blocks: Non-negative block number of each row (e.g. sheet and supplier group)
+            valid_rows: Positions of the rows that count towards the totals
+            prices: Price of each valid row
+            quantities: Quantity of each valid row
+            fields: Row fields kept at full grain; fields missing from data hold "" (safe_string_value(None))
+            price_counts: Number of positive prices behind each valid row, when rows are
+                already totals (see AggregateStore); prices then hold price sums
+        """
+        self.fields = tuple(fields)
+        self.period_values = data.dictionary('period')
+        self._columns = [data.map_column(field, safe_string_value) for field in self.fields]
+        self._blocks = np.asarray(blocks, dtype=np.intp)
+        self.block_count = int(self._blocks.max()) + 1 if len(self._blocks) else 0
+        self._prices = prices
+        self._quantities = quantities
+        self._price_counts = price_counts
+
+        # Fine groups of the valid rows, numbered in first-seen order
+        key_columns = ([self._blocks[valid_rows], data.codes('period')[valid_rows]]
+                       + [column.codes[valid_rows] for column in self._columns])
+        self._row_groups, first_positions = self.group_rows(key_columns, self._key_sizes())
+        self.first_rows = valid_rows[first_positions]
+        self.keys = np.stack([column[first_positions].astype(np.int64) for column in key_columns], axis=1) \
+            if len(first_positions) else np.zeros((0, len(key_columns)), dtype=np.int64)
+
+        # First rows per (block, field values, fields whose raw value is already clean),
+        # over every row, for picking incoterms
+        unchanged_bits = np.zeros(len(data), dtype=np.int64)
+        for bit, column in enumerate(self._columns):
+            unchanged_bits |= column.unchanged.astype(np.int64) << bit
+        incoterm_columns = [self._blocks] + [column.codes for column in self._columns] + [unchanged_bits]
+        _, incoterm_first_rows = self.group_rows(incoterm_columns, self._key_sizes()[:1] + self._key_sizes()[2:]
+                                                 + [1 << len(self._columns)])
+        self._incoterm_first_rows = incoterm_first_rows
+        self._incoterm_keys = np.stack([column[incoterm_first_rows].astype(np.int64) for column in incoterm_columns], axis=1) \
+            if len(incoterm_first_rows) else np.zeros((0, len(incoterm_columns)), dtype=np.int64)
+
+    def _key_sizes(self) -> List[int]:
+        return [max(self.block_count, 1), len(self.period_values)] + [len(column.values) for column in self._columns]
+
+    @staticmethod
+    def group_rows(code_columns: List[np.ndarray], sizes: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Group rows on several code columns
+
+        The codes are packed into one int64 per row (mixed radix over the sizes), and
+        renumbered whenever the next column would overflow the packing.
+
+        Args:
+            code_columns: Codes of each column, all the same length
+            sizes: Number of distinct codes of each column
+
+        Returns:
+            Tuple of (group of each row, numbered in first-seen order, first row of each group)
+        """
+        length = len(code_columns[0]) if code_columns else 0
+        if not length:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+
+        packed = np.zeros(length, dtype=np.int64)
+        packed_size = 1
+        for codes, size in zip(code_columns, sizes):
+            if packed_size * size >= 2 ** 62:
+                packed = np.unique(packed, return_inverse=True)[1].reshape(-1).astype(np.int64)
+                packed_size = int(packed.max()) + 1
+            packed = packed * size + codes
+            packed_size *= size
+        _, first_rows, inverse = np.unique(packed, return_index=True, return_inverse=True)
+
+        order = np.argsort(first_rows, kind='stable')
+        numbering = np.empty(len(order), dtype=np.intp)
+        numbering[order] = np.arange(len(order))
+        return numbering[inverse.reshape(-1)], first_rows[order]
+
+    def covers(self, fields: Sequence[str]) -> bool:
+        """Whether rollup() can group on these fields"""
+        return all(field in self.fields for field in fields)
+
+    def rollup(self, fields: Sequence[str]) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Monthly summary rows (summaryLvl1) per block for a combination of fields
+
+        Args:
+            fields: Combination fields, all among self.fields
+
+        Returns:
+            Block -> summary rows with 'period', 'avgPrice', 'totalQty', the field
+            values and 'combinationId', in first-seen order
+        """
+        positions = [self.fields.index(field) for field in fields]
+        sizes = self._key_sizes()
+        # Fine groups are numbered in first-seen order, so their coarse groups are too
+        coarse_of_fine, first_fine = self.group_rows(
+            [self.keys[:, 0], self.keys[:, 1]] + [self.keys[:, 2 + position] for position in positions],
+            sizes[:2] + [sizes[2 + position] for position in positions])
+        totals = PriceAccumulator.grouped(coarse_of_fine[self._row_groups], len(first_fine),
+                                          self._prices, self._quantities, self._price_counts)
+
+        summary_lvl1_by_block = {}
+        for group, key in enumerate(self.keys[first_fine].tolist()):
+            field_codes = [key[2 + position] for position in positions]
+            summary_row = {
+                'period': self.period_values[key[1]],
+                'avgPrice': totals[group].average,
+                'totalQty': totals[group].qty_sum
+            }
+            for field, position, code in zip(fields, positions, field_codes):
+                summary_row[field] = self._columns[position].values[code]
+            summary_row['combinationId'] = tuple(field_codes)
+            summary_lvl1_by_block.setdefault(key[0], []).append(summary_row)
+        return summary_lvl1_by_block
+
+    def accumulators(self) -> List[PriceAccumulator]:
+        """Totals of each fine group, in the order of self.keys"""
+        return PriceAccumulator.grouped(self._row_groups, len(self.keys), self._prices, self._quantities,
+                                        self._price_counts)
+
+    def first_rows_by_combination(self, fields: Sequence[str]) -> Dict[int, Dict[Tuple[int, ...], int]]:
+        """
+        Per block, the first row whose raw values of the fields are already clean, by
+        combinationId (what the incoterm of a from_column recap is read from)
+
+        Args:
+            fields: Combination fields, all among self.fields
+
+        Returns:
+            Block -> combinationId -> row position in data
+        """
+        positions = [self.fields.index(field) for field in fields]
+        needed = sum(1 << position for position in positions)
+        matching = np.flatnonzero((self._incoterm_keys[:, -1] & needed) == needed)
+        keys = self._incoterm_keys[matching]
+        sizes = self._key_sizes()
+        _, first_positions = self.group_rows(
+            [keys[:, 0]] + [keys[:, 1 + position] for position in positions],
+            sizes[:1] + [sizes[2 + position] for position in positions])
+
+        first_rows = {}
+        for position in first_positions.tolist():
+            key = keys[position].tolist()
+            combination_id = tuple(key[1 + field_position] for field_position in positions)
+            first_rows.setdefault(key[0], {})[combination_id] = int(self._incoterm_first_rows[matching[position]])
+        return first_rows
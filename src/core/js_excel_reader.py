@@ -5,19 +5,238 @@ Implements the exact logic from the original JavaScript excelReader
 
 import pandas as pd
 import numpy as np
+import openpyxl
 from datetime import datetime, timedelta
+import math
 import os
 import re
-from typing import List, Dict, Any, Optional, Union
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple, Union, Iterator
 
-from ..utils.constants import MONTH_ORDER, DEFAULT_INPUT_FOLDER, DEFAULT_SHEET_NAME
-from ..utils.helpers import DateParser
+from ..utils.constants import MONTH_ORDER, DEFAULT_INPUT_FOLDER, DEFAULT_SHEET_NAME, DEFAULT_COLUMN_MAPPING, DEFAULT_EXCEL_ENGINE, NUMERIC_ROW_FIELDS, NO_PERIOD
+from ..utils.helpers import DateParser, resolve_excel_engine
+from .xlsx_sniffer import XlsxSniffer
+from .parsed_cache import ParsedDataCache
+from .record_batch import RecordBatch
+from .period_axis import PeriodAxis
+from .row_filter import RowFilter
 
 class JSStyleExcelReader:
     """Excel reader with JavaScript-compatible logic"""
     
-    def __init__(self, logger):
+    # Processed field -> GUI mapping keys, later keys are fallbacks for falsy values
+    FIELD_MAPPING_KEYS = {
+        'date': ['date'],
+        'hsCode': ['hs_code', 'hsCode'],
+        'itemDesc': ['item_description', 'itemDesc'],
+        'gsm': ['gsm'],
+        'item': ['item'],
+        'addOn': ['add_on', 'addOn'],
+        'denier': ['denier'],
+        'length': ['length'],
+        'lustre': ['lustre'],
+        'importer': ['importer'],
+        'supplier': ['supplier'],
+        'originCountry': ['origin_country', 'originCountry'],
+        'incoterms': ['incoterms'],
+        'usdQtyUnit': ['unit_price', 'unitPrice'],
+        'qty': ['quantity']
+    }
+    FIBER_FIELDS = ('denier', 'length', 'lustre')
+    TEXT_FIELDS = ('hsCode', 'itemDesc', 'gsm', 'item', 'addOn', 'importer', 'supplier', 'originCountry', 'incoterms')
+    NUMERIC_FIELDS = NUMERIC_ROW_FIELDS
+    PROCESSING_ENGINES = ("columnar", "rows")
+    # Candidates for 'auto' inference, in the order ties are resolved
+    # (dates follow parse_date's trial order, numbers keep the European default)
+    DATE_FORMATS = ('DD-MONTH-YYYY', 'DD/MM/YYYY', 'MM/DD/YYYY')
+    NUMBER_FORMATS = ('EUROPEAN', 'AMERICAN')
+    FORMAT_SAMPLE_SIZE = 2000
+    # Share of sampled text cells an inferred format must parse before it is used
+    FORMAT_MIN_CONFIDENCE = 0.95
+    STREAM_BATCH_SIZE = 5000
+    WORKBOOK_CACHE_SIZE = 2
+    # Strings pandas.read_excel reads as NaN by default, plus Excel error values
+    NA_STRINGS = frozenset([
+        '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+        '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+    ]) | frozenset(openpyxl.cell.cell.ERROR_CODES)
+    MONTH_NAME_NUMBERS = {
+        'jan': 1, 'januari': 1,
+        'feb': 2, 'februari': 2,
+        'mar': 3, 'maret': 3,
+        'apr': 4, 'april': 4,
+        'mei': 5, 'may': 5,
+        'jun': 6, 'juni': 6,
+        'jul': 7, 'juli': 7,
+        'agu': 8, 'agustus': 8, 'aug': 8, 'august': 8,
+        'sep': 9, 'september': 9,
+        'okt': 10, 'oktober': 10, 'oct': 10, 'october': 10,
+        'nov': 11, 'november': 11,
+        'des': 12, 'desember': 12, 'dec': 12, 'december': 12
+    }
+    # Anchored like re.match in the scalar parsers
+    NUMERIC_DATE_PATTERN = r'^(\d{1,2})[\/\-\.](\d{1,2})[\/\-\.](\d{2,4})'
+    ISO_DATE_PATTERN = r'^(\d{4})-(\d{2})-(\d{2})'
+    MONTH_NAME_DATE_PATTERN = r'^(\d{1,2})[\/\-\.]([a-zA-Z]+)[\/\-\.](\d{2,4})'
+    # American: dot as decimal, comma as thousand separator; European: the reverse
+    AMERICAN_NUMBER_REGEX = re.compile(r'^-?\d{1,3}(,\d{3})*(\.\d+)?$')
+    EUROPEAN_NUMBER_REGEX = re.compile(r'^-?\d{1,3}(\.\d{3})*(,\d+)?$')
+    # Strings float() is known to accept, converted in bulk
+    PLAIN_FLOAT_REGEX = re.compile(r'^[+-]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][+-]?[0-9]+)?$')
+    
+    def __init__(self, logger, excel_engine: str = DEFAULT_EXCEL_ENGINE, cache_folder: Optional[str] = None):
         self.logger = logger
+        self.excel_engine = excel_engine
+        self.detected_formats = {}
+        self.sniffer = XlsxSniffer(logger)
+        self.parsed_cache = None
+        self.set_cache_folder(cache_folder)
+        # Absolute path -> open workbook and its metadata, most recently used last
+        self._workbook_cache = OrderedDict()
+        self._workbook_cache_lock = threading.Lock()
+    
+    def set_cache_folder(self, cache_folder: Optional[str]):
+        """Enable the on-disk parsed data cache in a folder, or disable it with None"""
+        self.parsed_cache = ParsedDataCache(self.logger, cache_folder) if cache_folder else None
+    
+    def open_excel_file(self, input_file_path: str) -> pd.ExcelFile:
+        """Open a workbook with the configured engine, or the fastest installed one"""
+        engine = resolve_excel_engine(input_file_path, self.excel_engine)
+        if self.excel_engine not in (None, "auto") and engine != self.excel_engine:
+            self.logger.warning(f"Excel engine '{self.excel_engine}' is not available for '{os.path.basename(input_file_path)}', using '{engine or 'pandas default'}'")
+        return pd.ExcelFile(input_file_path, engine=engine)
+    
+    def get_workbook(self, input_file_path: str) -> Dict[str, Any]:
+        """
+        Workbook metadata for a file, shared by every read of that file
+        
+        Entries are keyed on the absolute path and reopened when the file's size or
+        modification time changes (or the engine setting does). Only the
+        WORKBOOK_CACHE_SIZE most recently used workbooks are kept open. For .xlsx/.xlsm
+        files the sheet names come from the sniffer and the workbook itself is only
+        opened once a sheet needs parsing.
+        
+        Args:
+            input_file_path: Path to the Excel file
+            
+        Returns:
+            Dictionary with 'path', 'excel_file' (pd.ExcelFile, None until opened),
+            'sheet_names', 'headers' (sheet -> column names), 'sniffed' (sheet -> sniffer
+            result), 'row_counts' (sheet -> data rows, once read), 'content_hash' (None
+            until needed) and 'lock' (serializes parsing of the workbook)
+        """
+        key = os.path.abspath(input_file_path)
+        file_stat = os.stat(key)
+        signature = (file_stat.st_size, file_stat.st_mtime_ns, self.excel_engine)
+        
+        with self._workbook_cache_lock:
+            entry = self._workbook_cache.get(key)
+            if entry is not None and entry['signature'] == signature:
+                self._workbook_cache.move_to_end(key)
+                return entry
+            
+            if entry is not None:
+                self.logger.info(f"'{os.path.basename(key)}' changed on disk, reopening it")
+                self._close_workbook(self._workbook_cache.pop(key))
+            
+            excel_file = None
+            sheet_names = self.sniffer.get_sheet_names(key) if self.sniffer.can_sniff(key) else None
+            if sheet_names is None:
+                excel_file = self.open_excel_file(key)
+                sheet_names = list(excel_file.sheet_names)
+            
+            entry = {
+                'signature': signature,
+                'path': key,
+                'excel_file': excel_file,
+                'sheet_names': sheet_names,
+                'headers': {},
+                'sniffed': {},
+                'row_counts': {},
+                'content_hash': None,
+                'lock': threading.Lock()
+            }
+            self._workbook_cache[key] = entry
+            while len(self._workbook_cache) > self.WORKBOOK_CACHE_SIZE:
+                self._close_workbook(self._workbook_cache.popitem(last=False)[1])
+            return entry
+    
+    def _get_excel_file(self, workbook: Dict[str, Any]) -> pd.ExcelFile:
+        """The pandas workbook of a cache entry, opened on first use"""
+        with self._workbook_cache_lock:
+            if workbook['excel_file'] is None:
+                workbook['excel_file'] = self.open_excel_file(workbook['path'])
+            return workbook['excel_file']
+    
+    def _sniff_sheet(self, workbook: Dict[str, Any], sheet_name: str) -> Optional[Dict[str, Any]]:
+        """Sniffer result for a sheet, read once per workbook entry"""
+        if not self.sniffer.can_sniff(workbook['path']):
+            return None
+        if sheet_name not in workbook['sniffed']:
+            workbook['sniffed'][sheet_name] = self.sniffer.sniff_sheet(workbook['path'], sheet_name)
+        return workbook['sniffed'][sheet_name]
+    
+    def _get_sheet_header(self, workbook: Dict[str, Any], sheet_name: str) -> List[Any]:
+        """Column names of a sheet, read once per workbook entry"""
+        if sheet_name not in workbook['headers']:
+            sniffed = self._sniff_sheet(workbook, sheet_name)
+            if sniffed is not None and sniffed['header'] is not None:
+                # Same names pandas gives; only trailing blank columns it would add are missing
+                header = self._stream_header(tuple(sniffed['header']))
+            else:
+                excel_file = self._get_excel_file(workbook)
+                with workbook['lock']:
+                    header = excel_file.parse(sheet_name, nrows=0).columns.tolist()
+            workbook['headers'][sheet_name] = header
+        return workbook['headers'][sheet_name]
+    
+    def _get_content_hash(self, workbook: Dict[str, Any]) -> str:
+        """Content hash of a cached workbook's file, computed once per workbook entry"""
+        if workbook['content_hash'] is None:
+            workbook['content_hash'] = ParsedDataCache.hash_file(workbook['path'])
+        return workbook['content_hash']
+    
+    def get_sheet_row_count(self, input_file_path: str, sheet_name: str) -> Optional[int]:
+        """Number of data rows of a sheet, if it has already been read since the file last changed"""
+        try:
+            return self.get_workbook(input_file_path)['row_counts'].get(sheet_name)
+        except Exception:
+            return None
+    
+    def get_sheet_dimensions(self, input_file_path: str, sheet_name: str) -> Optional[Dict[str, int]]:
+        """
+        Approximate size of a sheet from its stored dimension, without reading it
+        
+        Returns:
+            Dictionary with 'rows' (data rows below the header) and 'columns', or None if
+            the file does not record a dimension for the sheet
+        """
+        try:
+            workbook = self.get_workbook(input_file_path)
+            if sheet_name not in workbook['sheet_names']:
+                return None
+            sniffed = self._sniff_sheet(workbook, sheet_name)
+            if sniffed is None or sniffed['row_count'] is None:
+                return None
+            return {'rows': sniffed['row_count'], 'columns': sniffed['column_count']}
+        except Exception:
+            return None
+    
+    def _close_workbook(self, workbook: Dict[str, Any]):
+        """Release a cached workbook"""
+        if workbook['excel_file'] is None:
+            return
+        try:
+            workbook['excel_file'].close()
+        except Exception as error:
+            self.logger.warning(f"Error closing workbook: {str(error)}")
+    
+    def close(self):
+        """Close all cached workbooks"""
+        with self._workbook_cache_lock:
+            while self._workbook_cache:
+                self._close_workbook(self._workbook_cache.popitem()[1])
     
     def parse_date_ddmmyyyy(self, date_string: str) -> Optional[datetime]:
         """Parse date in DD/MM/YYYY format (Indonesian standard)"""
@@ -104,21 +323,6 @@ class JSStyleExcelReader:
         if not isinstance(date_string, str):
             return None
         
-        month_names = {
-            'jan': 1, 'januari': 1,
-            'feb': 2, 'februari': 2,
-            'mar': 3, 'maret': 3,
-            'apr': 4, 'april': 4,
-            'mei': 5, 'may': 5,
-            'jun': 6, 'juni': 6,
-            'jul': 7, 'juli': 7,
-            'agu': 8, 'agustus': 8, 'aug': 8, 'august': 8,
-            'sep': 9, 'september': 9,
-            'okt': 10, 'oktober': 10, 'oct': 10, 'october': 10,
-            'nov': 11, 'november': 11,
-            'des': 12, 'desember': 12, 'dec': 12, 'december': 12
-        }
-        
         parts = re.match(r'(\d{1,2})[\/\-\.]([a-zA-Z]+)[\/\-\.](\d{2,4})', date_string)
         if parts:
             day = int(parts.group(1))
@@ -128,7 +332,7 @@ class JSStyleExcelReader:
             if year < 100:
                 year += 1900 if year > 50 else 2000
             
-            month = month_names.get(month_str)
+            month = self.MONTH_NAME_NUMBERS.get(month_str)
             if month and 1 <= day <= 31:
                 try:
                     date_obj = datetime(year, month, day)
@@ -193,6 +397,180 @@ class JSStyleExcelReader:
         except:
             return None
     
+    def _valid_calendar_dates(self, years: np.ndarray, months: np.ndarray, days: np.ndarray) -> np.ndarray:
+        """Vectorized check that datetime(year, month, day) would succeed"""
+        in_range = ((years >= 1) & (years <= 9999) & (months >= 1) & (months <= 12)
+                    & (days >= 1) & (days <= 31))
+        leap = ((years % 4 == 0) & (years % 100 != 0)) | (years % 400 == 0)
+        month_lengths = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])[np.clip(months, 1, 12) - 1]
+        month_lengths = month_lengths + ((months == 2) & leap)
+        return in_range & (days <= month_lengths)
+    
+    def _extract_date_parts(self, strings: pd.Series, pattern: str) -> pd.DataFrame:
+        """Regex groups of every string (NaN where the pattern does not match)"""
+        return strings.str.extract(pattern, expand=True)
+    
+    def _group_to_int(self, group: pd.Series) -> np.ndarray:
+        """Numeric regex group -> int array (0 where missing)"""
+        numbers = pd.to_numeric(group, errors='coerce')
+        # \d also matches non-ASCII digits, which only int() understands
+        unconverted = numbers.isna() & group.notna()
+        if unconverted.any():
+            numbers[unconverted] = group[unconverted].map(int)
+        return numbers.fillna(0).to_numpy(dtype=np.int64)
+    
+    def _adjust_two_digit_years(self, years: np.ndarray) -> np.ndarray:
+        """Same 2-digit year rule as the scalar parsers"""
+        return np.where(years < 100, years + np.where(years > 50, 1900, 2000), years)
+    
+    def _parse_numeric_date_strings(self, strings: pd.Series, day_first: bool) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Vectorized parse_date_ddmmyyyy (day_first) / parse_date_mmddyyyy"""
+        parts = self._extract_date_parts(strings, self.NUMERIC_DATE_PATTERN)
+        matched = parts[0].notna().to_numpy()
+        first = self._group_to_int(parts[0])
+        second = self._group_to_int(parts[1])
+        years = self._adjust_two_digit_years(self._group_to_int(parts[2]))
+        days, months = (first, second) if day_first else (second, first)
+        valid = matched & self._valid_calendar_dates(years, months, days)
+        
+        # Fall back to YYYY-MM-DD for strings the first pattern did not explain
+        if not valid.all():
+            iso_parts = self._extract_date_parts(strings, self.ISO_DATE_PATTERN)
+            iso_years = self._group_to_int(iso_parts[0])
+            iso_months = self._group_to_int(iso_parts[1])
+            iso_valid = (~valid & iso_parts[0].notna().to_numpy()
+                         & self._valid_calendar_dates(iso_years, iso_months, self._group_to_int(iso_parts[2])))
+            years = np.where(iso_valid, iso_years, years)
+            months = np.where(iso_valid, iso_months, months)
+            valid = valid | iso_valid
+        return years, months, valid
+    
+    def _parse_month_name_date_strings(self, strings: pd.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Vectorized parse_date_ddmonthyyyy"""
+        parts = self._extract_date_parts(strings, self.MONTH_NAME_DATE_PATTERN)
+        matched = parts[0].notna().to_numpy()
+        days = self._group_to_int(parts[0])
+        months = self._group_to_int(parts[1].str.lower().map(self.MONTH_NAME_NUMBERS))
+        years = self._adjust_two_digit_years(self._group_to_int(parts[2]))
+        valid = matched & self._valid_calendar_dates(years, months, days)
+        return years, months, valid
+    
+    def _date_string_parsers(self, date_format: str) -> List[Any]:
+        """Vectorized parsers parse_date tries for a format, in order"""
+        if date_format == 'auto':
+            return [
+                self._parse_month_name_date_strings,
+                lambda values: self._parse_numeric_date_strings(values, day_first=True),
+                lambda values: self._parse_numeric_date_strings(values, day_first=False)
+            ]
+        elif date_format == 'MM/DD/YYYY':
+            return [lambda values: self._parse_numeric_date_strings(values, day_first=False)]
+        elif date_format == 'DD-MONTH-YYYY':
+            return [self._parse_month_name_date_strings]
+        else:
+            return [lambda values: self._parse_numeric_date_strings(values, day_first=True)]
+    
+    def _parse_date_strings(self, strings: pd.Series, date_format: str,
+                            fallback_format: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Vectorized parse_date with the same format fallback order"""
+        parsers = self._date_string_parsers(date_format)
+        if fallback_format:
+            # Only strings the primary format rejects reach these
+            parsers += self._date_string_parsers(fallback_format)
+        
+        years = np.zeros(len(strings), dtype=np.int64)
+        months = np.zeros(len(strings), dtype=np.int64)
+        valid = np.zeros(len(strings), dtype=bool)
+        for parser in parsers:
+            pending = ~valid
+            if not pending.any():
+                break
+            parsed_years, parsed_months, parsed_valid = parser(strings[pending])
+            target = np.flatnonzero(pending)[parsed_valid]
+            years[target] = parsed_years[parsed_valid]
+            months[target] = parsed_months[parsed_valid]
+            valid[target] = True
+        return years, months, valid
+    
+    def _excel_serial_parts(self, serials: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Vectorized excel_serial_number_to_date, reduced to year and month"""
+        serials = serials.astype(np.float64)
+        with np.errstate(invalid='ignore'):
+            valid = ~np.isnan(serials) & (serials >= 1) & (serials <= 2958465)
+        serials = np.where(valid, serials, 25569.0)
+        
+        # A fractional day that rounds up to 24:00 is rejected by the scalar path
+        fractional_day = serials - np.trunc(serials) + 0.0000001
+        valid &= np.trunc(86400 * fractional_day) < 86400
+        
+        dates = np.datetime64('1970-01-01', 'D') + np.trunc(serials - 25569).astype(np.int64)
+        years = dates.astype('datetime64[Y]').astype(np.int64) + 1970
+        months = dates.astype('datetime64[M]').astype(np.int64) % 12 + 1
+        return years, months, valid
+    
+    def parse_date_column(self, values: pd.Series, date_format: str = 'DD/MM/YYYY',
+                          fallback_format: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Parse a whole date column like _parse_date_value, without a per-row Python parser
+        
+        Args:
+            values: Raw date cells (datetimes, Excel serial numbers and/or strings)
+            date_format: Date format to use for string cells
+            fallback_format: Format for string cells date_format cannot parse
+            
+        Returns:
+            Tuple of (years, months) int arrays, 0 where no valid date was found
+        """
+        row_count = len(values)
+        years = np.zeros(row_count, dtype=np.int64)
+        months = np.zeros(row_count, dtype=np.int64)
+        if row_count == 0:
+            return years, months
+        
+        if pd.api.types.is_datetime64_any_dtype(values.dtype):
+            present = values.notna().to_numpy()
+            years[present] = values[present].dt.year.to_numpy()
+            months[present] = values[present].dt.month.to_numpy()
+            return years, months
+        
+        if pd.api.types.is_numeric_dtype(values.dtype):
+            serial_years, serial_months, valid = self._excel_serial_parts(values.to_numpy(dtype=np.float64, na_value=np.nan))
+            years[valid] = serial_years[valid]
+            months[valid] = serial_months[valid]
+            return years, months
+        
+        # Mixed column: split by cell type (1 = datetime, 2 = number, 3 = string)
+        cells = values.to_numpy(dtype=object)
+        kinds = np.fromiter(
+            (3 if isinstance(value, str) else
+             2 if isinstance(value, (int, float)) else
+             1 if isinstance(value, datetime) and value is not pd.NaT else 0
+             for value in cells),
+            dtype=np.int8, count=row_count
+        )
+        
+        is_datetime = kinds == 1
+        if is_datetime.any():
+            years[is_datetime] = [value.year for value in cells[is_datetime]]
+            months[is_datetime] = [value.month for value in cells[is_datetime]]
+        
+        is_number = kinds == 2
+        if is_number.any():
+            serial_years, serial_months, valid = self._excel_serial_parts(cells[is_number].astype(np.float64))
+            target = np.flatnonzero(is_number)[valid]
+            years[target] = serial_years[valid]
+            months[target] = serial_months[valid]
+        
+        is_string = kinds == 3
+        if is_string.any():
+            strings = pd.Series(cells[is_string], dtype=object)
+            string_years, string_months, valid = self._parse_date_strings(strings, date_format, fallback_format)
+            target = np.flatnonzero(is_string)[valid]
+            years[target] = string_years[valid]
+            months[target] = string_months[valid]
+        
+        return years, months
+    
     def get_month_name(self, date_obj: datetime) -> str:
         """Get month name from date object"""
         if not date_obj or not isinstance(date_obj, datetime):
@@ -203,8 +581,8 @@ class JSStyleExcelReader:
         except (IndexError, AttributeError):
             return "N/A"
     
-    def parse_number(self, value: Any, number_format: str = 'EUROPEAN') -> float:
-        """Parse number according to format"""
+    def parse_number(self, value: Any, number_format: str = 'EUROPEAN', fallback_format: Optional[str] = None) -> float:
+        """Parse number according to format, retrying unparseable strings with fallback_format"""
         if isinstance(value, (int, float)):
             return 0 if np.isnan(value) else value
         
@@ -217,26 +595,309 @@ class JSStyleExcelReader:
             
             if number_format == 'AMERICAN':
                 # American format: dot as decimal, comma as thousand separator
-                american_regex = re.compile(r'^-?\d{1,3}(,\d{3})*(\.\d+)?$')
-                if american_regex.match(num_str):
+                if self.AMERICAN_NUMBER_REGEX.match(num_str):
                     num_str = num_str.replace(',', '')
             else:
                 # European format: comma as decimal, dot as thousand separator
-                european_regex = re.compile(r'^-?\d{1,3}(\.\d{3})*(,\d+)?$')
-                if european_regex.match(num_str):
+                if self.EUROPEAN_NUMBER_REGEX.match(num_str):
                     num_str = num_str.replace('.', '').replace(',', '.')
             
             try:
                 return float(num_str)
             except ValueError:
+                if fallback_format:
+                    return self.parse_number(value, fallback_format)
                 return 0
         
         return 0
     
+    def resolve_column_plan(self, columns: List[Any], column_mapping: Dict[str, str] = None,
+                            use_fiber_fields: bool = True) -> Dict[str, List[Optional[Any]]]:
+        """
+        Resolve which sheet column feeds each processed field
+        
+        Each mapping key of a field resolves to the user-mapped column when it
+        exists in the sheet, otherwise to the first DEFAULT_COLUMN_MAPPING name
+        found (exact match first, then case-insensitive). Later keys are only
+        read for rows where the earlier column holds a falsy value.
+        
+        Args:
+            columns: Column names of the sheet
+            column_mapping: Column mapping dictionary from the GUI
+            use_fiber_fields: Whether denier/length/lustre are resolved
+            
+        Returns:
+            Dict mapping processed field name to its candidate columns (None when unresolved)
+        """
+        available = set(columns)
+        lowercase_columns = {str(col).lower(): col for col in columns}
+        
+        def resolve(mapping_key, default_columns):
+            if column_mapping and column_mapping.get(mapping_key):
+                mapped_col = column_mapping[mapping_key]
+                if mapped_col in available:
+                    return mapped_col
+            for col in default_columns:
+                if col in available:
+                    return col
+                if col.lower() in lowercase_columns:
+                    return lowercase_columns[col.lower()]
+            return None
+        
+        plan = {}
+        for field, mapping_keys in self.FIELD_MAPPING_KEYS.items():
+            if field in self.FIBER_FIELDS and not use_fiber_fields:
+                continue
+            default_columns = DEFAULT_COLUMN_MAPPING.get(mapping_keys[0], [])
+            candidates = []
+            for mapping_key in mapping_keys:
+                col = resolve(mapping_key, default_columns)
+                if not candidates or candidates[-1] != col:
+                    candidates.append(col)
+            plan[field] = candidates
+        return plan
+    
+    def get_planned_column_positions(self, columns: List[Any], column_plan: Dict[str, List[Optional[Any]]]) -> List[int]:
+        """
+        Sheet positions of the columns a column plan reads, in sheet order
+        
+        Args:
+            columns: Column names of the sheet, as read from its header row
+            column_plan: Field -> candidate columns from resolve_column_plan
+            
+        Returns:
+            Sorted list of column positions
+        """
+        planned = {col for candidates in column_plan.values() for col in candidates if col is not None}
+        return [position for position, col in enumerate(columns) if col in planned]
+    
+    def log_column_plan(self, column_plan: Dict[str, List[Optional[Any]]]):
+        """Log the resolved field -> column plan once per sheet"""
+        parts = []
+        for field, candidates in column_plan.items():
+            resolved = " | ".join(f"'{col}'" if col is not None else "-" for col in candidates)
+            parts.append(f"{field} <- {resolved}")
+        self.logger.info(f"Column plan: {', '.join(parts)}")
+    
+    def _parse_number_strings(self, strings: pd.Series, number_format: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized parse_number for string cells, plus a mask of the cells float() accepted"""
+        stripped = strings.str.strip()
+        if number_format == 'AMERICAN':
+            matched = stripped.str.match(self.AMERICAN_NUMBER_REGEX).to_numpy(dtype=bool)
+            normalized = stripped.str.replace(',', '', regex=False)
+        else:
+            matched = stripped.str.match(self.EUROPEAN_NUMBER_REGEX).to_numpy(dtype=bool)
+            normalized = stripped.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+        normalized = normalized.where(matched, stripped)
+        
+        result = np.zeros(len(strings), dtype=object)
+        non_empty = (stripped != "").to_numpy(dtype=bool)
+        plain = non_empty & normalized.str.match(self.PLAIN_FLOAT_REGEX).to_numpy(dtype=bool)
+        parsed = plain.copy()
+        if plain.any():
+            result[plain] = normalized[plain].to_numpy(dtype=object).astype(np.float64).tolist()
+        
+        # Anything else float() might still accept ("1_000", "inf", non-ASCII digits)
+        remaining = np.flatnonzero(non_empty & ~plain)
+        for index, text in zip(remaining, normalized.to_numpy(dtype=object)[remaining]):
+            try:
+                result[index] = float(text)
+                parsed[index] = True
+            except ValueError:
+                pass
+        return result, parsed
+    
+    def parse_number_column(self, values: pd.Series, number_format: str = 'EUROPEAN',
+                            fallback_format: Optional[str] = None) -> List[Any]:
+        """
+        Parse a whole price/quantity column like parse_number
+        
+        Numeric cells pass through untouched, NaN/blank/unparseable cells become 0.
+        
+        Args:
+            values: Raw numeric or string cells
+            number_format: 'AMERICAN' or European (anything else)
+            fallback_format: Format for string cells number_format cannot parse
+            
+        Returns:
+            List of parsed values
+        """
+        if pd.api.types.is_numeric_dtype(values.dtype):
+            cells = values.tolist()
+            for index in np.flatnonzero(values.isna().to_numpy()):
+                cells[index] = 0
+            return cells
+        
+        # Mixed column: 2 = number, 3 = string, anything else parses to 0
+        cells = values.to_numpy(dtype=object)
+        kinds = np.fromiter(
+            (3 if isinstance(value, str) else 2 if isinstance(value, (int, float)) else 0 for value in cells),
+            dtype=np.int8, count=len(cells)
+        )
+        result = np.zeros(len(cells), dtype=object)
+        is_number = kinds == 2
+        if is_number.any():
+            result[is_number] = [0 if np.isnan(value) else value for value in cells[is_number]]
+        is_string = kinds == 3
+        if is_string.any():
+            strings = pd.Series(cells[is_string], dtype=object)
+            parsed_values, parsed = self._parse_number_strings(strings, number_format)
+            if fallback_format and not parsed.all():
+                retry = np.flatnonzero(~parsed)
+                parsed_values[retry] = self._parse_number_strings(strings.iloc[retry], fallback_format)[0]
+            result[is_string] = parsed_values
+        return result.tolist()
+    
+    def _sample_string_cells(self, values: pd.Series) -> pd.Series:
+        """Non-blank string cells from an evenly spaced sample of a column's non-null cells"""
+        present = np.flatnonzero(values.notna().to_numpy())
+        if len(present) > self.FORMAT_SAMPLE_SIZE:
+            present = present[np.linspace(0, len(present) - 1, self.FORMAT_SAMPLE_SIZE).astype(np.int64)]
+        strings = [value for value in values.iloc[present].tolist() if isinstance(value, str) and value.strip()]
+        return pd.Series(strings, dtype=object)
+    
+    def _pick_format(self, parsed: Dict[str, np.ndarray], sampled: int) -> Dict[str, Any]:
+        """
+        Format explaining the most sampled cells; ties go to the earlier candidate
+        
+        The candidate is only used when it parses at least FORMAT_MIN_CONFIDENCE of the
+        sample and no sampled cell that another candidate parses, since such cells would
+        be read differently than they are by the per-cell fallback.
+        
+        Args:
+            parsed: Candidate format -> mask of the sampled cells it parses
+            sampled: Number of sampled cells
+        """
+        if not sampled:
+            return {'format': None, 'candidate': None, 'confidence': None, 'conflicts': 0, 'sampled': 0}
+        scores = {candidate: int(mask.sum()) for candidate, mask in parsed.items()}
+        best = max(scores, key=scores.get)
+        explained = np.logical_or.reduce(list(parsed.values()))
+        conflicts = int((explained & ~parsed[best]).sum())
+        confidence = scores[best] / sampled
+        accepted = confidence >= self.FORMAT_MIN_CONFIDENCE and not conflicts
+        return {'format': best if accepted else None, 'candidate': best, 'confidence': confidence,
+                'conflicts': conflicts, 'sampled': sampled}
+    
+    def infer_date_format(self, values: pd.Series) -> Dict[str, Any]:
+        """
+        Infer the date format of a column's string cells from a sample
+        
+        Args:
+            values: Raw date cells
+            
+        Returns:
+            Dictionary with 'format' (None unless the best candidate explains the
+            sample, see _pick_format), 'candidate', 'confidence' (share of sampled
+            strings the candidate parses), 'conflicts' (sampled strings only other
+            formats parse) and 'sampled'
+        """
+        sample = self._sample_string_cells(values)
+        parsed = {date_format: self._parse_date_strings(sample, date_format)[2]
+                  for date_format in self.DATE_FORMATS}
+        return self._pick_format(parsed, len(sample))
+    
+    def infer_number_format(self, values: pd.Series) -> Dict[str, Any]:
+        """
+        Infer the number format of a column's string cells from a sample
+        
+        Args:
+            values: Raw price or quantity cells
+            
+        Returns:
+            Dictionary with 'format', 'candidate', 'confidence', 'conflicts' and
+            'sampled' (see infer_date_format)
+        """
+        sample = self._sample_string_cells(values)
+        parsed = {number_format: self._parse_number_strings(sample, number_format)[1]
+                  for number_format in self.NUMBER_FORMATS}
+        return self._pick_format(parsed, len(sample))
+    
+    def detect_formats(self, df: pd.DataFrame, column_plan: Dict[str, List[Optional[Any]]],
+                       date_format: str, number_format: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Settle the date format of the date column and the number format of the price and quantity columns
+        
+        'auto' formats are inferred per column from a sample. An inferred format that
+        explains the sample (see _pick_format) parses every cell, and only cells it
+        cannot parse fall back to trying the other formats. Otherwise dates keep
+        'auto', trying the formats cell by cell like parse_date, and numbers keep the
+        European default with the American fallback. Explicit formats are used as given.
+        
+        Args:
+            df: Sheet data
+            column_plan: Field -> candidate columns from resolve_column_plan
+            date_format: Requested date format or 'auto'
+            number_format: Requested number format (any case) or 'auto'
+            
+        Returns:
+            Field -> {'format', 'fallback', 'confidence', 'sampled'}, plus 'candidate'
+            and 'conflicts' for 'auto' formats (see infer_date_format); confidence is
+            None unless text cells were sampled
+        """
+        formats = {}
+        if date_format == 'auto':
+            detected = self.infer_date_format(self._get_column_values(df, column_plan['date']))
+            if detected['format']:
+                formats['date'] = dict(detected, fallback='auto')
+            else:
+                formats['date'] = dict(detected, format='auto', fallback=None)
+        else:
+            formats['date'] = {'format': date_format, 'fallback': None, 'confidence': None, 'sampled': 0}
+        
+        number_format = (number_format or 'EUROPEAN').upper()
+        for field in ('usdQtyUnit', 'qty'):
+            if number_format == 'AUTO':
+                detected = self.infer_number_format(self._get_column_values(df, column_plan[field]))
+                chosen = detected['format'] or self.NUMBER_FORMATS[0]
+                fallback = next(candidate for candidate in self.NUMBER_FORMATS if candidate != chosen)
+                formats[field] = dict(detected, format=chosen, fallback=fallback)
+            else:
+                formats[field] = {'format': number_format, 'fallback': None, 'confidence': None, 'sampled': 0}
+        
+        for field, detected in formats.items():
+            if detected['confidence'] is None:
+                continue
+            if detected['format'] == detected['candidate']:
+                self.logger.info(f"Detected {field} format: {detected['format']} "
+                                 f"({detected['confidence']:.0%} of {detected['sampled']} sampled text cells)")
+            else:
+                self.logger.info(f"Not using inferred {field} format {detected['candidate']} "
+                                 f"({detected['confidence']:.0%} of {detected['sampled']} sampled text cells, "
+                                 f"{detected['conflicts']} needing another format), using {detected['format']}")
+        return formats
+    
+    def _safe_string_value(self, value: Any) -> str:
+        """Convert value to string safely, handling NaN and None"""
+        if value is None:
+            return "-"
+        if pd.isna(value) or (isinstance(value, float) and np.isnan(value)):
+            return "-"
+        if str(value).strip() == "":
+            return "-"
+        return str(value).strip()
+    
+    def _parse_date_value(self, date_value: Any, date_format: str) -> Optional[datetime]:
+        """Parse a raw date cell (Excel serial, string or datetime)"""
+        if date_value is None or date_value is pd.NaT:
+            return None
+        
+        # Try parsing as Excel serial number first
+        if isinstance(date_value, (int, float)):
+            return self.excel_serial_number_to_date(date_value)
+        elif isinstance(date_value, str):
+            return self.parse_date(date_value, date_format)
+        elif isinstance(date_value, datetime):
+            return date_value
+        return None
+    
     def read_and_preprocess_data(self, input_file_path: str, sheet_name: str = DEFAULT_SHEET_NAME, 
                                date_format: str = 'DD/MM/YYYY', number_format: str = 'EUROPEAN',
                                column_mapping: Dict[str, str] = None,
-                               combination_mode: str = "default") -> Optional[List[Dict[str, Any]]]:
+                               combination_mode: str = "default",
+                               processing_engine: str = "columnar",
+                               period_range: Optional[Tuple[int, int]] = None,
+                               row_filter: Optional[RowFilter] = None) -> Optional[RecordBatch]:
         """
         Read and preprocess Excel data exactly like JavaScript version
         
@@ -246,151 +907,514 @@ class JSStyleExcelReader:
             date_format: Date format to use
             number_format: Number format to use
             column_mapping: Column mapping dictionary
+            combination_mode: Combination mode ("default", "fiber" or "custom")
+            processing_engine: "columnar" (whole-column operations) or "rows" (row-by-row reference)
+            period_range: Optional inclusive (first, last) periods (see PeriodAxis); rows dated
+                outside it, or not dated at all, are dropped right after the dates are parsed
+            row_filter: Optional RowFilter; rows it rejects are dropped before their
+                remaining fields are parsed
             
         Returns:
-            List of dictionaries with processed data
+            RecordBatch of processed rows (iterates as dict-style rows)
         """
         if not os.path.exists(input_file_path):
             self.logger.error(f"Error: Input file '{input_file_path}' not found.")
             return None
         
+        if processing_engine not in self.PROCESSING_ENGINES:
+            self.logger.error(f"Error: Unknown processing engine '{processing_engine}'")
+            return None
+        
+        if row_filter is not None and row_filter.is_empty:
+            row_filter = None
+        
         try:
             # Read Excel file
-            excel_file = pd.ExcelFile(input_file_path)
+            workbook = self.get_workbook(input_file_path)
             
-            if sheet_name not in excel_file.sheet_names:
+            if sheet_name not in workbook['sheet_names']:
                 self.logger.error(f"Error: Sheet '{sheet_name}' not found in file {input_file_path}")
                 return None
             
-            # Read sheet
-            df = pd.read_excel(input_file_path, sheet_name=sheet_name)
+            # Combination modes only change what is read by whether the fiber columns are
+            use_fiber_fields = self.uses_fiber_fields(column_mapping, combination_mode)
+            
+            cache_key = None
+            if self.parsed_cache is not None:
+                cache_key = self.parsed_cache.make_key(self._get_content_hash(workbook), {
+                    'sheet_name': sheet_name,
+                    'date_format': date_format,
+                    'number_format': number_format,
+                    'column_mapping': column_mapping or {},
+                    'fiber_fields': use_fiber_fields,
+                    'period_range': list(period_range) if period_range is not None else None,
+                    'row_filter': row_filter.to_settings() if row_filter is not None else None
+                })
+                cached = self.parsed_cache.load(cache_key)
+                if cached is not None:
+                    processed_data, info = cached
+                    workbook['row_counts'][sheet_name] = info['sheet_rows']
+                    self.detected_formats = info['detected_formats']
+                    self.logger.info(f"Loaded {len(processed_data)} preprocessed rows of sheet '{sheet_name}' from the cache")
+                    return processed_data
             
-            self.logger.info(f"Reading {len(df)} rows from sheet '{sheet_name}' with date format {date_format} and number format {number_format}...")
+            excel_file = self._get_excel_file(workbook)
             
-            # Helper function to get column value with mapping
-            def get_column_value(row, mapping_key, default_columns):
-                if column_mapping and column_mapping.get(mapping_key):
-                    mapped_col = column_mapping[mapping_key]
-                    if mapped_col in row:
-                        return row[mapped_col]
-                
-                # Fallback to default columns (case-insensitive matching)
-                row_columns = {col.lower(): col for col in row.index}
-                for col in default_columns:
-                    # Try exact match first
-                    if col in row:
-                        return row[col]
-                    # Try case-insensitive match
-                    col_lower = col.lower()
-                    if col_lower in row_columns:
-                        actual_col = row_columns[col_lower]
-                        return row[actual_col]
-                return None
+            # Resolve field -> columns once for the whole sheet, from the header row alone
+            header = self._get_sheet_header(workbook, sheet_name)
+            column_plan = self.resolve_column_plan(header, column_mapping, use_fiber_fields)
+            self.log_column_plan(column_plan)
             
-            def safe_string_value(value):
-                """Convert value to string safely, handling NaN and None"""
-                import pandas as pd
-                import numpy as np
-                
-                if value is None:
-                    return "-"
-                if pd.isna(value) or (isinstance(value, float) and np.isnan(value)):
-                    return "-"
-                if str(value).strip() == "":
-                    return "-"
-                return str(value).strip()
-
-            use_fiber_fields = combination_mode == "fiber" or any(
-                column_mapping and column_mapping.get(field)
-                for field in ['denier', 'length', 'lustre']
-            )
-            
-            # Process each row
-            processed_data = []
-            for index, row in df.iterrows():
-                # Process date
-                date_value = get_column_value(row, 'date', ["Arrival Date", "DATE", "CUSTOMS CLEARANCE DATE"])
-                month = "-"
-                year_val = "-"
-                
-                if date_value is not None:
-                    parsed_date = None
-                    
-                    # Try parsing as Excel serial number first
-                    if isinstance(date_value, (int, float)):
-                        parsed_date = self.excel_serial_number_to_date(date_value)
-                    elif isinstance(date_value, str):
-                        parsed_date = self.parse_date(date_value, date_format)
-                    elif isinstance(date_value, datetime):
-                        parsed_date = date_value
-                    
-                    if parsed_date:
-                        month = self.get_month_name(parsed_date)
-                        year_val = parsed_date.year
-                
-                # Process other fields - support both GUI mapping keys and original keys
-                hs_code = safe_string_value(get_column_value(row, 'hs_code', ["HS Code", "HS CODE"]) or
-                          get_column_value(row, 'hsCode', ["HS Code", "HS CODE"]))
-                item_desc = safe_string_value(get_column_value(row, 'item_description', ["Product Description", "ITEM DESC", "PRODUCT DESCRIPTION(EN)"]) or
-                            get_column_value(row, 'itemDesc', ["Product Description", "ITEM DESC", "PRODUCT DESCRIPTION(EN)"]))
-                gsm = safe_string_value(get_column_value(row, 'gsm', ["GSM"]))
-                item = safe_string_value(get_column_value(row, 'item', ["ITEM"]))
-                add_on = safe_string_value(get_column_value(row, 'add_on', ["ADD ON"]) or
-                         get_column_value(row, 'addOn', ["ADD ON"]))
-                denier = safe_string_value(get_column_value(row, 'denier', ["DENIER", "Denier"])) if use_fiber_fields else "-"
-                length = safe_string_value(get_column_value(row, 'length', ["LENGTH", "Length"])) if use_fiber_fields else "-"
-                lustre = safe_string_value(get_column_value(row, 'lustre', ["LUSTRE", "LUSTER", "Lustre", "Luster"])) if use_fiber_fields else "-"
-                importer = safe_string_value(get_column_value(row, 'importer', ["Consignee Name", "IMPORTER", "PURCHASER"]))
-                supplier = safe_string_value(get_column_value(row, 'supplier', ["Shipper Name", "SUPPLIER"]))
-                origin_country = safe_string_value(get_column_value(row, 'origin_country', ["Country of Origin", "ORIGIN COUNTRY"]) or
-                                 get_column_value(row, 'originCountry', ["Country of Origin", "ORIGIN COUNTRY"]))
-                incoterms = safe_string_value(get_column_value(row, 'incoterms', ["INCOTERMS", "Incoterms", "INCOTERM", "Incoterm"]))
-                
-                # Process numeric fields - improved price column detection
-                # Support both GUI mapping keys (unit_price/quantity) and original keys (unitPrice/quantity)
-                unit_price_raw = (get_column_value(row, 'unit_price', ["Standard Unit Rate $", "Value CIF US$", "CIF KG Unit In USD", "USD Qty Unit", "UNIT PRICE(USD)"]) or
-                                 get_column_value(row, 'unitPrice', ["Standard Unit Rate $", "Value CIF US$", "CIF KG Unit In USD", "USD Qty Unit", "UNIT PRICE(USD)"]))
-                quantity_raw = (get_column_value(row, 'quantity', ["Standard Qty", "Std. Quantity", "Net KG Wt", "qty", "BUSINESS QUANTITY (KG)"]) or
-                               get_column_value(row, 'quantity', ["Standard Qty", "Std. Quantity", "Net KG Wt", "qty", "BUSINESS QUANTITY (KG)"]))
-                
-                usd_qty_unit = self.parse_number(unit_price_raw, number_format)
-                qty = self.parse_number(quantity_raw, number_format)
-                
-                # Log price processing for first few rows to help debugging
-                if index < 5:
-                    self.logger.info(f"Row {index+1}: unit_price_raw='{unit_price_raw}' -> parsed={usd_qty_unit}, qty_raw='{quantity_raw}' -> parsed={qty}")
-                
-                processed_row = {
-                    'month': month,
-                    'year': year_val,
-                    'hsCode': hs_code,
-                    'itemDesc': item_desc,
-                    'gsm': gsm,
-                    'item': item,
-                    'addOn': add_on,
-                    'importer': importer,
-                    'supplier': supplier,
-                    'originCountry': origin_country,
-                    'incoterms': incoterms,
-                    'usdQtyUnit': usd_qty_unit,
-                    'qty': qty
-                }
-                if use_fiber_fields:
-                    processed_row.update({
-                        'denier': denier,
-                        'length': length,
-                        'lustre': lustre
-                    })
-                
-                processed_data.append(processed_row)
+            # Read sheet, parsing only the planned columns
+            usecols = self.get_planned_column_positions(header, column_plan)
+            with workbook['lock']:
+                df = excel_file.parse(sheet_name, usecols=usecols or None)
+            if usecols:
+                df.columns = [header[position] for position in usecols]
+            workbook['row_counts'][sheet_name] = len(df)
+            
+            self.logger.info(f"Reading {len(df)} rows ({len(df.columns)} of {len(header)} columns) from sheet '{sheet_name}' with date format {date_format} and number format {number_format} ({excel_file.engine} reader, {processing_engine} engine)...")
+            
+            formats = self.detect_formats(df, column_plan, date_format, number_format)
+            self.detected_formats = formats
+            
+            processed_data = self._preprocess_frame(df, column_plan, formats, use_fiber_fields, processing_engine,
+                                                    period_range=period_range, row_filter=row_filter)
             
             self.logger.info(f"Processed {len(processed_data)} rows successfully")
+            self._log_filters(period_range, row_filter, len(processed_data), len(df))
+            if cache_key is not None:
+                self.parsed_cache.store(cache_key, processed_data, input_file_path,
+                                        {'sheet_rows': len(df), 'detected_formats': formats})
             return processed_data
             
         except Exception as error:
             self.logger.error(f"Error reading Excel file '{input_file_path}': {str(error)}")
             return None
     
+    def iter_preprocessed_batches(self, input_file_path: str, sheet_name: str = DEFAULT_SHEET_NAME,
+                                  date_format: str = 'DD/MM/YYYY', number_format: str = 'EUROPEAN',
+                                  column_mapping: Dict[str, str] = None,
+                                  combination_mode: str = "default",
+                                  processing_engine: str = "columnar",
+                                  batch_size: int = STREAM_BATCH_SIZE,
+                                  period_range: Optional[Tuple[int, int]] = None,
+                                  row_filter: Optional[RowFilter] = None) -> Iterator[RecordBatch]:
+        """
+        Stream the rows of read_and_preprocess_data in batches, without loading the sheet
+        
+        The sheet is read with openpyxl in read-only mode and each batch is preprocessed
+        as soon as it is full, so memory holds one batch of raw cells at a time (and
+        JSStyleProcessor merges each processed batch into totals as it arrives). 'auto'
+        formats are inferred from the first batch. The sheet is read twice: a first pass
+        finds the dtype pandas gives each column over the whole sheet (a column of
+        numbers, numeric text and blanks becomes float, so 80 reads as "80.0"), which
+        each batch is then converted to.
+        
+        Args:
+            input_file_path: Path to input Excel file
+            sheet_name: Name of sheet to process
+            date_format: Date format to use
+            number_format: Number format to use
+            column_mapping: Column mapping dictionary
+            combination_mode: Combination mode ("default", "fiber" or "custom")
+            processing_engine: "columnar" (whole-column operations) or "rows" (row-by-row reference)
+            batch_size: Number of sheet rows per batch
+            period_range: Optional inclusive (first, last) periods to keep (see read_and_preprocess_data)
+            row_filter: Optional RowFilter of rows to keep (see read_and_preprocess_data)
+            
+        Yields:
+            RecordBatch per batch of processed rows, in sheet order
+        """
+        if not os.path.exists(input_file_path):
+            self.logger.error(f"Error: Input file '{input_file_path}' not found.")
+            return
+        
+        if processing_engine not in self.PROCESSING_ENGINES:
+            self.logger.error(f"Error: Unknown processing engine '{processing_engine}'")
+            return
+        
+        if resolve_excel_engine(input_file_path, "openpyxl") != "openpyxl":
+            # Not an OOXML workbook (.xls, .xlsb, .ods): read it whole and hand it out in batches
+            self.logger.info(f"Streaming is only available for .xlsx/.xlsm files, reading '{os.path.basename(input_file_path)}' at once")
+            processed_data = self.read_and_preprocess_data(input_file_path, sheet_name, date_format, number_format,
+                                                           column_mapping, combination_mode, processing_engine,
+                                                           period_range, row_filter) or []
+            for start in range(0, len(processed_data), batch_size):
+                yield processed_data[start:start + batch_size]
+            return
+        
+        if row_filter is not None and row_filter.is_empty:
+            row_filter = None
+        
+        workbook = openpyxl.load_workbook(input_file_path, read_only=True, data_only=True, keep_links=False)
+        try:
+            if sheet_name not in workbook.sheetnames:
+                self.logger.error(f"Error: Sheet '{sheet_name}' not found in file {input_file_path}")
+                return
+            
+            sheet = workbook[sheet_name]
+            # The stored <dimension> may be stale; let openpyxl find the real extent
+            sheet.reset_dimensions()
+            rows = sheet.iter_rows(values_only=True)
+            
+            use_fiber_fields = self.uses_fiber_fields(column_mapping, combination_mode)
+            header = self._stream_header(next(rows, ()))
+            column_plan = self.resolve_column_plan(header, column_mapping, use_fiber_fields)
+            self.log_column_plan(column_plan)
+            positions = self.get_planned_column_positions(header, column_plan)
+            columns = [header[position] for position in positions]
+            
+            self.logger.info(f"Streaming sheet '{sheet_name}' ({len(columns)} of {len(header)} columns) in batches of {batch_size} rows with date format {date_format} and number format {number_format} (openpyxl reader, {processing_engine} engine)...")
+            
+            # A first pass types each column as pandas types the whole column
+            column_types = self._stream_column_types(
+                self._stream_row_batches(self._stream_data_rows(sheet), positions, batch_size))
+            
+            formats = None
+            processed_count = 0
+            kept_count = 0
+            for batch in self._stream_row_batches(rows, positions, batch_size):
+                df = self._stream_frame(batch, columns, column_types)
+                if formats is None:
+                    formats = self.detect_formats(df, column_plan, date_format, number_format)
+                    self.detected_formats = formats
+                processed = self._preprocess_frame(df, column_plan, formats, use_fiber_fields, processing_engine,
+                                                   log_samples=processed_count == 0, period_range=period_range,
+                                                   row_filter=row_filter)
+                processed_count += len(batch)
+                kept_count += len(processed)
+                yield processed
+            
+            self.logger.info(f"Streamed {processed_count} rows successfully")
+            self._log_filters(period_range, row_filter, kept_count, processed_count)
+        except Exception as error:
+            self.logger.error(f"Error streaming Excel file '{input_file_path}': {str(error)}")
+            raise
+        finally:
+            workbook.close()
+    
+    def _log_filters(self, period_range: Optional[Tuple[int, int]], row_filter: Optional[RowFilter],
+                     kept_count: int, row_count: int):
+        """Log how many rows the period and row filters kept, if any is set"""
+        filters = []
+        if period_range is not None:
+            filters.append(f"period {PeriodAxis.period_name(period_range[0])} to {PeriodAxis.period_name(period_range[1])}")
+        if row_filter is not None:
+            filters.append(row_filter.describe())
+        if filters:
+            self.logger.info(f"Filters ({'; '.join(filters)}) kept {kept_count} of {row_count} rows")
+    
+    def _stream_cell_value(self, value: Any) -> Any:
+        """A streamed cell as pandas' openpyxl reader hands it over (NA strings -> None, whole floats -> int)"""
+        if isinstance(value, str):
+            return None if value in self.NA_STRINGS else value
+        if type(value) is float and value.is_integer():
+            return int(value)
+        return value
+    
+    def _stream_header(self, header_row: Tuple[Any, ...]) -> List[Any]:
+        """Column names of a streamed header row, named and de-duplicated like pandas"""
+        names = []
+        unnamed_positions = []
+        for position, value in enumerate(header_row):
+            if value is None or value == "":
+                names.append(f"Unnamed: {position}")
+                unnamed_positions.append(position)
+            elif type(value) is float and value.is_integer():
+                names.append(int(value))
+            else:
+                names.append(value)
+        
+        # Duplicates become "name.1", "name.2", ... skipping names already in the header;
+        # named columns are handled before unnamed ones
+        given_names = list(names)
+        counts = {}
+        named_positions = [position for position in range(len(names)) if position not in unnamed_positions]
+        for position in named_positions + unnamed_positions:
+            name = original = names[position]
+            count = counts.get(name, 0)
+            while count > 0:
+                counts[original] = count + 1
+                name = f"{original}.{count}"
+                count = count + 1 if name in given_names else counts.get(name, 0)
+            counts[name] = count + 1
+            names[position] = name
+        return names
+    
+    def _stream_data_rows(self, sheet: Any) -> Iterator[Tuple[Any, ...]]:
+        """Cell values of the rows below the header of a read-only sheet"""
+        rows = sheet.iter_rows(values_only=True)
+        next(rows, None)
+        return rows
+    
+    def _stream_row_batches(self, rows: Iterator[Tuple[Any, ...]], positions: List[int],
+                            batch_size: int) -> Iterator[List[Tuple[Any, ...]]]:
+        """Streamed rows cut to the planned columns, in lists of batch_size rows"""
+        blank_row = (None,) * len(positions)
+        batch = []
+        pending_blank_rows = 0
+        for row in rows:
+            # Blank rows only count once a later row has data, like pandas' trailing-row trim
+            if all(value is None or value == "" for value in row):
+                pending_blank_rows += 1
+                continue
+            batch.extend([blank_row] * pending_blank_rows)
+            pending_blank_rows = 0
+            batch.append(tuple(self._stream_cell_value(row[position]) if position < len(row) else None
+                               for position in positions))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    def _stream_column_types(self, batches: Iterator[List[Tuple[Any, ...]]]) -> List[Optional[str]]:
+        """
+        dtype pandas gives each streamed column when it parses the whole sheet
+        
+        pandas converts a column to numbers when every cell is a number, numeric text
+        or blank, as float64 if any is a float or blank and as int64 otherwise; other
+        columns keep their cells. Only one batch is held at a time.
+        
+        Returns:
+            Per column, "float64", "int64" or None for a column kept as objects
+        """
+        column_types = None
+        for batch in batches:
+            if column_types is None:
+                column_types = ["int64"] * len(batch[0])
+            for position, values in enumerate(zip(*batch)):
+                if column_types[position] is None:
+                    continue
+                try:
+                    kind = pd.to_numeric(pd.Series(values, dtype=object)).dtype.kind
+                except (ValueError, TypeError):
+                    kind = None
+                if kind == 'f':
+                    column_types[position] = "float64"
+                elif kind not in ('i', 'u'):
+                    column_types[position] = None
+        return column_types or []
+    
+    def _stream_frame(self, batch: List[Tuple[Any, ...]], columns: List[Any],
+                      column_types: List[Optional[str]]) -> pd.DataFrame:
+        """DataFrame over a batch of streamed rows, typed like the whole sheet read by pandas"""
+        if not columns:
+            return pd.DataFrame(index=pd.RangeIndex(len(batch)))
+        frame_columns = []
+        for values, column_type in zip(zip(*batch), column_types):
+            column = pd.Series(values, dtype=object)
+            if column_type is not None:
+                column = pd.to_numeric(column).astype(column_type)
+            else:
+                # pandas reads blank cells of text columns as NaN
+                column = column.where(column.notna(), np.nan)
+            frame_columns.append(column)
+        df = pd.concat(frame_columns, axis=1, ignore_index=True)
+        df.columns = columns
+        return df
+    
+    def uses_fiber_fields(self, column_mapping: Optional[Dict[str, str]], combination_mode: str) -> bool:
+        """Whether denier/length/lustre are read for this mapping and combination mode"""
+        return combination_mode == "fiber" or any(
+            column_mapping and column_mapping.get(field)
+            for field in ['denier', 'length', 'lustre']
+        )
+    
+    def _preprocess_frame(self, df: pd.DataFrame, column_plan: Dict[str, List[Optional[Any]]],
+                          formats: Dict[str, Dict[str, Any]], use_fiber_fields: bool,
+                          processing_engine: str, log_samples: bool = True,
+                          period_range: Optional[Tuple[int, int]] = None,
+                          row_filter: Optional[RowFilter] = None) -> RecordBatch:
+        """Run the selected preprocessing engine over a frame"""
+        if processing_engine == "rows":
+            rows = self._preprocess_rows(df, column_plan, formats, use_fiber_fields, log_samples, period_range, row_filter)
+            return RecordBatch.from_rows(rows, self.NUMERIC_FIELDS)
+        return self._preprocess_columnar(df, column_plan, formats, use_fiber_fields, log_samples, period_range, row_filter)
+    
+    def _preprocess_rows(self, df: pd.DataFrame, column_plan: Dict[str, List[Optional[Any]]],
+                         formats: Dict[str, Dict[str, Any]], use_fiber_fields: bool,
+                         log_samples: bool = True,
+                         period_range: Optional[Tuple[int, int]] = None,
+                         row_filter: Optional[RowFilter] = None) -> List[Dict[str, Any]]:
+        """Row-by-row reference engine"""
+        column_positions = {
+            field: [df.columns.get_loc(col) if col is not None else None for col in candidates]
+            for field, candidates in column_plan.items()
+        }
+        
+        def get_value(row_values, field):
+            # Later candidates are only consulted when the previous one is falsy
+            value = None
+            for position_index, position in enumerate(column_positions[field]):
+                if position_index > 0 and value:
+                    break
+                value = row_values[position] if position is not None else None
+            return value
+        
+        processed_data = []
+        for index, row_values in enumerate(df.itertuples(index=False, name=None)):
+            # Process date
+            period = NO_PERIOD
+            date_raw = get_value(row_values, 'date')
+            parsed_date = self._parse_date_value(date_raw, formats['date']['format'])
+            if not parsed_date and formats['date']['fallback']:
+                parsed_date = self._parse_date_value(date_raw, formats['date']['fallback'])
+            if parsed_date:
+                period = PeriodAxis.encode(parsed_date.year, parsed_date.month)
+            if period_range is not None and not PeriodAxis.in_range(period, period_range):
+                continue
+            if row_filter is not None and not all(
+                    row_filter.matches(field, self._safe_string_value(get_value(row_values, field)))
+                    for field in row_filter.fields):
+                continue
+            
+            # Process numeric fields
+            unit_price_raw = get_value(row_values, 'usdQtyUnit')
+            quantity_raw = get_value(row_values, 'qty')
+            usd_qty_unit = self.parse_number(unit_price_raw, formats['usdQtyUnit']['format'], formats['usdQtyUnit']['fallback'])
+            qty = self.parse_number(quantity_raw, formats['qty']['format'], formats['qty']['fallback'])
+            
+            # Log price processing for first few rows to help debugging
+            if log_samples and index < 5:
+                self.logger.info(f"Row {index+1}: unit_price_raw='{unit_price_raw}' -> parsed={usd_qty_unit}, qty_raw='{quantity_raw}' -> parsed={qty}")
+            
+            processed_row = {'period': period}
+            for field in self.TEXT_FIELDS:
+                processed_row[field] = self._safe_string_value(get_value(row_values, field))
+            processed_row['usdQtyUnit'] = usd_qty_unit
+            processed_row['qty'] = qty
+            if use_fiber_fields:
+                for field in self.FIBER_FIELDS:
+                    processed_row[field] = self._safe_string_value(get_value(row_values, field))
+            
+            processed_data.append(processed_row)
+        
+        return processed_data
+    
+    def _get_column_values(self, df: pd.DataFrame, candidates: List[Optional[Any]]) -> pd.Series:
+        """Raw cell values of a field, falling back to later candidates where the value is falsy"""
+        def column(col):
+            if col is None:
+                return pd.Series([None] * len(df), index=df.index, dtype=object)
+            return df[col].astype(object)
+        
+        if len(candidates) == 1 and candidates[0] is not None:
+            # Keep the native dtype so column kernels can take their fast paths
+            return df[candidates[0]]
+        
+        values = column(candidates[0])
+        for col in candidates[1:]:
+            falsy = np.fromiter((not value for value in values), dtype=bool, count=len(values))
+            if falsy.any():
+                values = values.where(~falsy, column(col))
+        return values
+    
+    def _string_column(self, values: pd.Series) -> List[str]:
+        """Vectorized _safe_string_value"""
+        result = pd.Series("-", index=values.index, dtype=object)
+        present = values.notna()
+        if present.any():
+            stripped = values[present].astype(object).astype(str).str.strip()
+            result[present] = stripped.where(stripped != "", "-")
+        return result.tolist()
+    
+    def _distinct_cells(self, values: pd.Series) -> Tuple[np.ndarray, pd.Series]:
+        """Split a column into codes and its distinct cells, in first-seen order"""
+        if values.dtype == object:
+            cells = values.to_numpy(dtype=object)
+            value_codes = pd.factorize(cells, use_na_sentinel=False)[0].astype(np.int64)
+            # 1, 1.0 and True (and 0.0 and -0.0) compare equal but do not parse or print alike,
+            # so the cell type and the sign of zero are part of the key
+            cell_types = np.fromiter(
+                ("-0.0" if isinstance(value, float) and value == 0 and math.copysign(1.0, value) < 0 else type(value)
+                 for value in cells),
+                dtype=object, count=len(cells))
+            type_codes = pd.factorize(cell_types, use_na_sentinel=False)[0].astype(np.int64)
+            keys = type_codes * (int(value_codes.max(initial=0)) + 1) + value_codes
+        elif pd.api.types.is_float_dtype(values.dtype):
+            # Bit patterns keep 0.0 and -0.0 apart
+            keys = values.to_numpy(dtype=np.float64, na_value=np.nan).view(np.int64)
+        else:
+            keys = pd.factorize(values, use_na_sentinel=False)[0]
+        
+        _, first_index, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        order = np.argsort(first_index, kind="stable")
+        rank = np.empty(len(order), dtype=np.intp)
+        rank[order] = np.arange(len(order))
+        codes = rank[inverse.reshape(-1)]
+        return codes, values.iloc[first_index[order]].reset_index(drop=True)
+    
+    def _preprocess_columnar(self, df: pd.DataFrame, column_plan: Dict[str, List[Optional[Any]]],
+                             formats: Dict[str, Dict[str, Any]], use_fiber_fields: bool,
+                             log_samples: bool = True,
+                             period_range: Optional[Tuple[int, int]] = None,
+                             row_filter: Optional[RowFilter] = None) -> RecordBatch:
+        """Columnar engine: every output field is built as a whole column
+        
+        Each raw column is parsed once per distinct value and the results are
+        broadcast back to the rows, so repeated dates, prices and names cost a lookup.
+        Dates are parsed first, so rows outside period_range are dropped before any
+        other column is looked at; the fields of row_filter come next, judged once per
+        distinct cell, and only the rows it keeps are parsed any further.
+        """
+        distinct_counts = []
+        
+        def distinct(field):
+            values = self._get_column_values(df, column_plan[field])
+            codes, uniques = self._distinct_cells(values)
+            distinct_counts.append(f"{field}={len(uniques)}/{len(values)}")
+            return values, codes, uniques
+        
+        def encoded(codes, unique_values):
+            # Values computed per distinct cell can repeat, so re-encode them
+            value_codes, dictionary = RecordBatch.encode_values(unique_values)
+            return value_codes[codes], dictionary
+        
+        def string_field(field):
+            _, codes, uniques = distinct(field)
+            return encoded(codes, self._string_column(uniques))
+        
+        # Dates -> period column
+        _, date_codes, date_uniques = distinct('date')
+        unique_years, unique_months = self.parse_date_column(date_uniques, formats['date']['format'], formats['date']['fallback'])
+        unique_periods = PeriodAxis.encode(unique_years, unique_months)
+        if period_range is not None:
+            kept_rows = np.flatnonzero(PeriodAxis.in_range(unique_periods, period_range)[date_codes])
+            if len(kept_rows) < len(df):
+                df = df.iloc[kept_rows].reset_index(drop=True)
+                date_codes = date_codes[kept_rows]
+        if row_filter is not None:
+            for field in row_filter.fields:
+                codes, uniques = self._distinct_cells(self._get_column_values(df, column_plan[field]))
+                kept_rows = np.flatnonzero(row_filter.mask(field, self._string_column(uniques))[codes])
+                if len(kept_rows) < len(df):
+                    df = df.iloc[kept_rows].reset_index(drop=True)
+                    date_codes = date_codes[kept_rows]
+        
+        # Numeric columns
+        unit_price_raw, price_codes, price_uniques = distinct('usdQtyUnit')
+        quantity_raw, qty_codes, qty_uniques = distinct('qty')
+        unique_prices = self.parse_number_column(price_uniques, formats['usdQtyUnit']['format'], formats['usdQtyUnit']['fallback'])
+        unique_qtys = self.parse_number_column(qty_uniques, formats['qty']['format'], formats['qty']['fallback'])
+        
+        for index in range(min(5, len(df)) if log_samples else 0):
+            self.logger.info(f"Row {index+1}: unit_price_raw='{unit_price_raw.iloc[index]}' -> parsed={unique_prices[price_codes[index]]}, qty_raw='{quantity_raw.iloc[index]}' -> parsed={unique_qtys[qty_codes[index]]}")
+        
+        columns = {'period': encoded(date_codes, unique_periods.tolist())}
+        for field in self.TEXT_FIELDS:
+            columns[field] = string_field(field)
+        columns['usdQtyUnit'] = np.asarray(unique_prices, dtype=np.float64)[price_codes]
+        columns['qty'] = np.asarray(unique_qtys, dtype=np.float64)[qty_codes]
+        if use_fiber_fields:
+            for field in self.FIBER_FIELDS:
+                columns[field] = string_field(field)
+        
+        if log_samples:
+            self.logger.info(f"Distinct values per column: {', '.join(distinct_counts)}")
+        return RecordBatch.from_codes(len(df), columns)
+    
     def get_excel_info(self, input_file_path: str) -> Optional[Dict[str, Any]]:
         """Get Excel file information"""
         if not os.path.exists(input_file_path):
@@ -398,17 +1422,16 @@ class JSStyleExcelReader:
             return None
         
         try:
-            excel_file = pd.ExcelFile(input_file_path)
-            sheet_names = excel_file.sheet_names
+            workbook = self.get_workbook(input_file_path)
+            sheet_names = workbook['sheet_names']
             
             # Get column names from first sheet
             column_names = []
             if sheet_names:
-                df = pd.read_excel(input_file_path, sheet_name=sheet_names[0], nrows=0)
-                column_names = df.columns.tolist()
+                column_names = list(self._get_sheet_header(workbook, sheet_names[0]))
             
             return {
-                'sheetNames': sheet_names,
+                'sheetNames': list(sheet_names),
                 'columnNames': column_names
             }
             
@@ -422,12 +1445,11 @@ class JSStyleExcelReader:
             return []
         
         try:
-            excel_file = pd.ExcelFile(input_file_path)
-            if sheet_name not in excel_file.sheet_names:
+            workbook = self.get_workbook(input_file_path)
+            if sheet_name not in workbook['sheet_names']:
                 return []
             
-            df = pd.read_excel(input_file_path, sheet_name=sheet_name, nrows=0)
-            return df.columns.tolist()
+            return list(self._get_sheet_header(workbook, sheet_name))
             
         except Exception as error:
             self.logger.error(f"Error reading columns from sheet '{sheet_name}': {str(error)}")
@@ -443,7 +1465,7 @@ class JSStyleExcelReader:
                 return []
             
             files = os.listdir(folder_path)
-            excel_files = [f for f in files if f.lower().endswith(('.xlsx', '.xls'))]
+            excel_files = [f for f in files if f.lower().endswith(('.xlsx', '.xls', '.xlsm'))]
             
             result = []
             for file in excel_files:
@@ -6,10 +6,13 @@ Now using xlsxwriter for advanced formatting to match ExcelJS output
 
 import xlsxwriter
 import os
-from typing import Dict, List, Any, Optional
+import numpy as np
+from typing import Dict, List, Any, Mapping, Optional, Union
 
+from .record_batch import RecordBatch
+from .period_axis import PeriodAxis
 from ..utils.constants import MONTH_ORDER, DEFAULT_OUTPUT_FOLDER
-from ..utils.helpers import average_greater_than_zero, format_american_number, format_price_with_precision, format_qty_with_precision
+from ..utils.helpers import average_greater_than_zero, safe_string_value, format_american_number, format_price_with_precision, format_qty_with_precision
 
 class OutputFormatter:
     """Handles Excel output formatting with JavaScript-compatible logic"""
@@ -67,7 +70,7 @@ class OutputFormatter:
         else:
             return "-"
     
-    def get_incoterm_for_combination(self, combo: Dict, raw_data: List[Dict],
+    def get_incoterm_for_combination(self, combo: Dict, raw_data: Union[RecordBatch, List[Dict]],
                                    incoterm_mode: str, default_incoterm: str,
                                    combination_mode: str = "default",
                                    custom_combination_fields: List[str] = None) -> str:
@@ -86,13 +89,16 @@ class OutputFormatter:
     
     def prepare_group_block(self, group_name: str, summary_lvl1_data: List[Dict], 
                           summary_lvl2_data: List[Dict], incoterm_value: str, 
-                          incoterm_mode: str = "manual", raw_data: List[Dict] = None,
+                          incoterm_mode: str = "manual", raw_data: Optional[Union[RecordBatch, List[Dict]]] = None,
                           supplier_as_sheet: str = "tidak", dynamic_months: List[str] = None,
                           combination_mode: str = "default",
-                          custom_combination_fields: List[str] = None) -> Dict[str, Any]:
+                          custom_combination_fields: List[str] = None,
+                          period_axis: Optional[PeriodAxis] = None,
+                          first_rows: Optional[Dict[tuple, Mapping]] = None) -> Dict[str, Any]:
+        if period_axis is None and all('period' in d for d in summary_lvl1_data):
+            period_axis = PeriodAxis.from_periods(d['period'] for d in summary_lvl1_data)
         if dynamic_months is None:
-            from ..utils.constants import MONTH_ORDER
-            dynamic_months = list(MONTH_ORDER)
+            dynamic_months = period_axis.labels if period_axis is not None else list(MONTH_ORDER)
         """
         Prepare group block exactly like JavaScript prepareGroupBlock function
         
@@ -102,8 +108,11 @@ class OutputFormatter:
             summary_lvl2_data: Overall summary data
             incoterm_value: INCOTERM value to use (for manual mode)
             incoterm_mode: Mode for incoterm handling ("manual" or "from_column")
-            raw_data: Raw data for extracting incoterms per row (for from_column mode)
+            raw_data: Rows of the group (RecordBatch or row dictionaries) for extracting incoterms (for from_column mode)
             supplier_as_sheet: Whether supplier is used as sheet ("ya" or "tidak")
+            period_axis: Month columns, for summaries that carry a 'period' instead of a 'month' label
+            first_rows: Optional row each recap's incoterm is read from, by combinationId
+                (found in raw_data when not given)
             
         Returns:
             Dict with group block data
@@ -130,18 +139,51 @@ class OutputFormatter:
         
         monthly_totals = [0] * len(dynamic_months)
         
+        # Summaries of a RecordBatch carry combination codes: match and sort on those
+        keyed = (isinstance(raw_data, RecordBatch) and period_axis is not None
+                 and all('combinationId' in d and 'period' in d for d in summary_lvl1_data)
+                 and all('combinationId' in d for d in summary_lvl2_data))
+        
         # Get distinct combinations
         distinct_combinations = []
-        for item in summary_lvl2_data:
-            combo = {field: item.get(field, "") for field in combination_fields}
-            if combo not in distinct_combinations:
-                distinct_combinations.append(combo)
-        
-        # Sort distinct combinations - ensure all values are strings to avoid comparison errors
-        def safe_sort_key(x):
-            return tuple(str(x.get(field)) if x.get(field) is not None else "" for field in combination_fields)
-        
-        distinct_combinations.sort(key=safe_sort_key)
+        if keyed:
+            combination_ids = []
+            seen_ids = set()
+            for item in summary_lvl2_data:
+                if item['combinationId'] not in seen_ids:
+                    seen_ids.add(item['combinationId'])
+                    combination_ids.append(item['combinationId'])
+                    distinct_combinations.append({field: item.get(field, "") for field in combination_fields})
+            
+            # Ranks of the codes follow the string order of their values
+            ranks = [raw_data.map_column(field, safe_string_value).ranks for field in combination_fields]
+            order = sorted(range(len(combination_ids)),
+                           key=lambda position: tuple(field_ranks[code] for field_ranks, code in zip(ranks, combination_ids[position])))
+            combination_ids = [combination_ids[position] for position in order]
+            distinct_combinations = [distinct_combinations[position] for position in order]
+            
+            monthly_rows = {}
+            for d in summary_lvl1_data:
+                monthly_rows.setdefault((d['combinationId'], period_axis.column(d['period'])), d)
+            recap_rows = {}
+            for d in summary_lvl2_data:
+                recap_rows.setdefault(d['combinationId'], d)
+            if incoterm_mode == "manual":
+                first_rows = {}
+            elif first_rows is None:
+                first_rows = {combination_id: raw_data[row]
+                              for combination_id, row in self._first_rows_by_combination(raw_data, combination_fields).items()}
+        else:
+            for item in summary_lvl2_data:
+                combo = {field: item.get(field, "") for field in combination_fields}
+                if combo not in distinct_combinations:
+                    distinct_combinations.append(combo)
+            
+            # Sort distinct combinations - ensure all values are strings to avoid comparison errors
+            def safe_sort_key(x):
+                return tuple(str(x.get(field)) if x.get(field) is not None else "" for field in combination_fields)
+            
+            distinct_combinations.sort(key=safe_sort_key)
         
         # Create data rows
         for index, combo in enumerate(distinct_combinations):
@@ -153,10 +195,13 @@ class OutputFormatter:
             # Add monthly data
             for month_index, month in enumerate(dynamic_months):
                 month_data = None
-                for d in summary_lvl1_data:
-                    if self._combo_matches(d, combo, combination_mode, custom_combination_fields) and d['month'] == month:
-                        month_data = d
-                        break
+                if keyed:
+                    month_data = monthly_rows.get((combination_ids[index], month_index))
+                else:
+                    for d in summary_lvl1_data:
+                        if self._combo_matches(d, combo, combination_mode, custom_combination_fields) and d['month'] == month:
+                            month_data = d
+                            break
 
                 if month_data:
                     # Store raw numeric values instead of formatted strings
@@ -169,16 +214,23 @@ class OutputFormatter:
 
             # Add recap data
             recap_data = None
-            for d in summary_lvl2_data:
-                if self._combo_matches(d, combo, combination_mode, custom_combination_fields):
-                    recap_data = d
-                    break
+            if keyed:
+                recap_data = recap_rows.get(combination_ids[index])
+            else:
+                for d in summary_lvl2_data:
+                    if self._combo_matches(d, combo, combination_mode, custom_combination_fields):
+                        recap_data = d
+                        break
             
             if recap_data:
                 # Store raw numeric values instead of formatted strings
                 avg_price = recap_data['avgOfSummaryPrice'] if recap_data['avgOfSummaryPrice'] else "-"
                 # Get incoterm based on mode
-                combo_incoterm = self.get_incoterm_for_combination(combo, raw_data or [], incoterm_mode, incoterm_value, combination_mode, custom_combination_fields)
+                if keyed and incoterm_mode != "manual":
+                    first_row = first_rows.get(combination_ids[index])
+                    combo_incoterm = "-" if first_row is None else self.extract_incoterm_from_value(first_row.get('incoterms', ''))
+                else:
+                    combo_incoterm = self.get_incoterm_for_combination(combo, raw_data or [], incoterm_mode, incoterm_value, combination_mode, custom_combination_fields)
                 total_qty = recap_data['totalOfSummaryQty'] if recap_data['totalOfSummaryQty'] else "-"
                 data_row.extend([avg_price, combo_incoterm, total_qty])
             else:
@@ -223,6 +275,23 @@ class OutputFormatter:
             'header1Length': len(header_row1)
         }
     
+    def _first_rows_by_combination(self, raw_data: RecordBatch, combination_fields: List[str]) -> Dict[tuple, int]:
+        """
+        Index of the first row matching each combination, keyed by combinationId
+
+        A row matches when its raw values equal the combination's values, as in
+        _combo_matches, so rows whose values are only equal once cleaned do not count.
+        """
+        columns = [raw_data.map_column(field, safe_string_value) for field in combination_fields]
+        rows = np.flatnonzero(np.logical_and.reduce([column.unchanged for column in columns]))
+        if not len(rows):
+            return {}
+        
+        codes = np.vstack([column.codes[rows].astype(np.int64) for column in columns])
+        distinct, first_positions = np.unique(codes, axis=1, return_index=True)
+        return {tuple(distinct[:, position].tolist()): int(rows[first_positions[position]])
+                for position in range(distinct.shape[1])}
+    
     def write_output_to_file(self, workbook_data: List[Dict], output_filename: str = "summary_output.xlsx", 
                            period_year: str = None, supplier_as_sheet: str = "tidak",
                            combination_mode: str = "default") -> str:
@@ -835,7 +904,7 @@ class OutputFormatter:
         else:
             return "-"
     
-    def get_incoterm_for_combination(self, combo: Dict, raw_data: List[Dict],
+    def get_incoterm_for_combination(self, combo: Dict, raw_data: Union[RecordBatch, List[Dict]],
                                    incoterm_mode: str, default_incoterm: str,
                                    combination_mode: str = "default",
                                    custom_combination_fields: List[str] = None) -> str:
@@ -4,22 +4,39 @@ Implements the exact logic from the original JavaScript index.js
 """
 
 import pandas as pd
-from typing import Dict, List, Any, Optional
+import numpy as np
+from collections.abc import Mapping
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Tuple, Union
+import logging
+import multiprocessing
+from logging.handlers import QueueHandler, QueueListener
 import os
+from concurrent.futures import ProcessPoolExecutor
 
 from .data_aggregator import DataAggregator
-from ..utils.helpers import format_qty_with_precision
+from .aggregate_store import AggregateStore
+from .record_batch import RecordBatch
+from .period_axis import PeriodAxis
+from ..utils.helpers import format_qty_with_precision, safe_string_value
 from .js_output_formatter import OutputFormatter
-from ..utils.constants import MONTH_ORDER, DEFAULT_OUTPUT_FOLDER
+from ..utils.constants import MONTH_ORDER, DEFAULT_OUTPUT_FOLDER, NUMERIC_ROW_FIELDS, ENTITY_ROLES, NO_PERIOD
 from ..utils.helpers import average_greater_than_zero
 
 class JSStyleProcessor:
     """Processes data using JavaScript-compatible logic"""
     
+    # Source name of the cells a stream is merged into (see _as_batch)
+    STREAM_SOURCE = "stream"
+    
     def __init__(self, logger):
         self.logger = logger
         self.aggregator = DataAggregator(logger)
         self.formatter = OutputFormatter(logger)
+        # Blocks and fine aggregate of the last batch, reused when it is processed again
+        # in another combination mode (see _aggregate_sheets)
+        self._sheet_blocks = None
+        # (sheet, reason) of every sheet the last run could not produce
+        self.failed_sheets = []
 
     def _get_combination_fields(self, combination_mode: str = "default", custom_fields: List[str] = None) -> List[str]:
         if combination_mode == "fiber":
@@ -31,6 +48,14 @@ class JSStyleProcessor:
         # Default mode: hsCode + item + gsm + addOn
         return ['hsCode', 'item', 'gsm', 'addOn']
 
+    def _get_entity_roles(self, supplier_as_sheet: str = "tidak") -> Dict[str, str]:
+        """Row fields used as the sheet entity and the group entity"""
+        return ENTITY_ROLES["ya" if supplier_as_sheet == "ya" else "tidak"]
+    
+    def _group_key(self, supplier: Any, origin: Any) -> Any:
+        """Supplier/origin group of a row: the supplier (or importer), else the origin, else 'Unknown'"""
+        return supplier or origin or "Unknown"
+    
     def _get_total_per_item_fields(self, combination_mode: str = "default", custom_fields: List[str] = None) -> List[str]:
         if combination_mode == "fiber":
             # Fiber mode: gsm + denier + length + lustre
@@ -41,23 +66,32 @@ class JSStyleProcessor:
         # Default mode: item + gsm + addOn
         return ['item', 'gsm', 'addOn']
     
-    def process_sheet_data(self, data_to_process: List[Dict], sheet_base_name: str, 
+    def process_sheet_data(self, data_to_process: RecordBatch, sheet_base_name: str, 
                           incoterm_value: str, incoterm_mode: str = "manual", 
                           supplier_as_sheet: str = "tidak", dynamic_months: List[str] = None,
                           combination_mode: str = "default", 
-                          custom_combination_fields: List[str] = None) -> Optional[Dict[str, Any]]:
+                          custom_combination_fields: List[str] = None,
+                          period_axis: Optional[PeriodAxis] = None,
+                          aggregation_engine: str = "vectorized",
+                          group_aggregations: Optional[Dict[str, Dict[str, Any]]] = None) -> Optional[Dict[str, Any]]:
+        if period_axis is None:
+            period_axis = self._period_axis(data_to_process)
         if dynamic_months is None:
-            from ..utils.constants import MONTH_ORDER
-            dynamic_months = list(MONTH_ORDER)
+            dynamic_months = period_axis.labels
         """
         Process sheet data exactly like JavaScript processSheetData function
         
         Args:
-            data_to_process: List of data dictionaries
+            data_to_process: Rows of the sheet
             sheet_base_name: Base name for the sheet
             incoterm_value: INCOTERM value to use (for manual mode)
             incoterm_mode: Mode for incoterm handling ("manual" or "from_column")
             supplier_as_sheet: Whether supplier is used as sheet ("ya" or "tidak")
+            period_axis: Month columns of the run (defaults to the years in data_to_process)
+            aggregation_engine: DataAggregator engine ("vectorized" or the "loop" reference)
+            group_aggregations: Optional supplier/origin group -> perform_aggregation result,
+                already computed for this sheet (see _aggregate_sheets); other groups are
+                aggregated here
             
         Returns:
             Dict with sheet data or None if no data
@@ -69,14 +103,14 @@ class JSStyleProcessor:
                 self.logger.warning("No data to process for this sheet")
                 return None
             
-            # Group by supplier or origin
-            grouped_by_supplier_or_origin = {}
-            for row in data_to_process:
-                # Try supplier first, then origin_country, then "Unknown"
-                group_key = row.get('supplier') or row.get('originCountry') or "Unknown"
-                if group_key not in grouped_by_supplier_or_origin:
-                    grouped_by_supplier_or_origin[group_key] = []
-                grouped_by_supplier_or_origin[group_key].append(row)
+            # Group by supplier or origin: try supplier first, then origin_country, then "Unknown"
+            # (the importer takes the supplier's place when suppliers are the sheets)
+            group_field = self._get_entity_roles(supplier_as_sheet)['group']
+            grouped_by_supplier_or_origin = {
+                group_key: data_to_process.take(indices)
+                for group_key, indices in self._group_indices(
+                    data_to_process, [group_field, 'originCountry'], self._group_key).items()
+            }
             
             group_label = "importer" if supplier_as_sheet == "ya" else "supplier"
             self.logger.info(f"Grouped data into {len(grouped_by_supplier_or_origin)} {group_label}/origin groups")
@@ -87,6 +121,9 @@ class JSStyleProcessor:
             item_summary_data_for_sheet = {}
             combination_fields = self._get_combination_fields(combination_mode, custom_combination_fields)
             item_summary_fields = self._get_total_per_item_fields(combination_mode, custom_combination_fields)
+            # Positions of the item fields in a combinationId, and the sort ranks of their codes
+            item_positions = [combination_fields.index(field) for field in item_summary_fields]
+            item_ranks = [data_to_process.map_column(field, safe_string_value).ranks for field in item_summary_fields]
             identity_column_count = 1 + len(combination_fields)
             
             total_columns = identity_column_count + len(dynamic_months) * 2 + 3
@@ -98,7 +135,11 @@ class JSStyleProcessor:
                 group_data = grouped_by_supplier_or_origin[group_name]
                 
                 # Perform aggregation
-                aggregation_result = self.aggregator.perform_aggregation(group_data, combination_mode, custom_combination_fields)
+                if group_aggregations is not None and group_name in group_aggregations:
+                    aggregation_result = group_aggregations[group_name]
+                else:
+                    aggregation_result = self.aggregator.perform_aggregation(group_data, combination_mode, custom_combination_fields, period_axis,
+                                                                         aggregation_engine)
                 summary_lvl1 = aggregation_result['summaryLvl1']
                 summary_lvl2 = aggregation_result['summaryLvl2']
                 
@@ -107,7 +148,8 @@ class JSStyleProcessor:
                 if summary_lvl2:
                     # Prepare group block
                     group_block = self.formatter.prepare_group_block(group_name, summary_lvl1, summary_lvl2, 
-                                                                   incoterm_value, incoterm_mode, group_data, supplier_as_sheet, dynamic_months, combination_mode, custom_combination_fields)
+                                                                   incoterm_value, incoterm_mode, group_data, supplier_as_sheet, dynamic_months, combination_mode, custom_combination_fields, period_axis,
+                                                                   aggregation_result.get('firstRows'))
                     
                     all_rows_for_sheet_content.extend(group_block['groupBlockRows'])
                     
@@ -121,14 +163,24 @@ class JSStyleProcessor:
                     # Update sheet overall monthly totals and item summary
                     for lvl1_row in summary_lvl1:
                         try:
-                            month_index = dynamic_months.index(lvl1_row['month'])
+                            if 'period' in lvl1_row:
+                                month_index = period_axis.column(lvl1_row['period'])
+                                if month_index is None:
+                                    continue
+                            else:
+                                month_index = dynamic_months.index(lvl1_row['month'])
                             qty_to_add = lvl1_row['totalQty'] if isinstance(lvl1_row['totalQty'], (int, float)) else 0
                             sheet_overall_monthly_totals[month_index] += qty_to_add
                             
                             # Update item summary
-                            item_key = tuple(str(lvl1_row.get(field, "")) for field in item_summary_fields)
+                            if 'combinationId' in lvl1_row:
+                                item_key = tuple(lvl1_row['combinationId'][position] for position in item_positions)
+                                sort_key = tuple(ranks[code] for ranks, code in zip(item_ranks, item_key))
+                            else:
+                                item_key = sort_key = tuple(str(lvl1_row.get(field, "")) for field in item_summary_fields)
                             if item_key not in item_summary_data_for_sheet:
                                 item_summary_data_for_sheet[item_key] = {
+                                    'sortKey': sort_key,
                                     'displayParts': [lvl1_row.get(field, "-") for field in item_summary_fields],
                                     'monthlyQtys': [0] * len(dynamic_months),
                                     'totalQtyRecap': 0
@@ -162,8 +214,7 @@ class JSStyleProcessor:
                 all_rows_for_sheet_content.append(item_table_header_month_row)
                 
                 # Add item rows
-                for item_key in sorted(item_summary_data_for_sheet.keys()):
-                    item_data = item_summary_data_for_sheet[item_key]
+                for item_data in sorted(item_summary_data_for_sheet.values(), key=lambda item: item['sortKey']):
                     display_value = " ".join(str(part) for part in item_data['displayParts'] if str(part).strip())
                     item_row = [display_value] + ["-"] * (identity_column_count - 1)
                     for qty in item_data['monthlyQtys']:
@@ -224,123 +275,370 @@ class JSStyleProcessor:
             self.logger.error(f"Error in process_sheet_data: {str(e)}")
             return None
 
-    def process_data_like_javascript(self, all_raw_data: List[Dict], period_year: str, 
+    def _as_batch(self, raw_data: Iterable[Union[RecordBatch, Mapping, List[Mapping]]]) -> Tuple[RecordBatch, int]:
+        """
+        All input rows as one RecordBatch (from a batch, row dicts or a stream of either)
+        
+        A list or tuple is concatenated as it is. Any other iterable is taken as a
+        stream (e.g. JSStyleExcelReader.iter_preprocessed_batches): each batch is reduced
+        to AggregateStore cells, totals per (importer, supplier, origin, identity fields,
+        period), as soon as it arrives and merged into the cells of the earlier batches.
+        Memory then follows the number of cells rather than rows. The cells aggregate
+        like the rows, except that averages add the prices in another order, which can
+        change their last bits.
+        
+        Returns:
+            Tuple of (rows, or the cells of a stream; number of input rows)
+        """
+        if isinstance(raw_data, RecordBatch):
+            return self._with_periods(raw_data), len(raw_data)
+        
+        if isinstance(raw_data, (list, tuple)):
+            batch = self._with_periods(RecordBatch.concat(list(self._input_batches(raw_data))))
+            return batch, len(batch)
+        
+        cells = AggregateStore(self.logger)
+        row_count = 0
+        for batch in self._input_batches(raw_data):
+            cells.add(self._with_periods(batch), self.STREAM_SOURCE)
+            row_count += len(batch)
+        self.logger.info(f"Merged {row_count} streamed rows into {len(cells)} cells")
+        return cells.to_batch(), row_count
+    
+    def _input_batches(self, raw_data: Iterable[Union[RecordBatch, Mapping, List[Mapping]]]) -> Iterator[RecordBatch]:
+        """RecordBatches of an iterable of batches, row dicts and lists of row dicts, in order"""
+        pending_rows = []
+        for item in raw_data:
+            if isinstance(item, RecordBatch):
+                if pending_rows:
+                    yield RecordBatch.from_rows(pending_rows, NUMERIC_ROW_FIELDS)
+                    pending_rows = []
+                yield item
+            elif isinstance(item, Mapping):
+                pending_rows.append(item)
+            else:
+                pending_rows.extend(item)
+        if pending_rows:
+            yield RecordBatch.from_rows(pending_rows, NUMERIC_ROW_FIELDS)
+    
+    def _group_indices(self, batch: RecordBatch, fields: List[str], key_of) -> Dict[Any, np.ndarray]:
+        """
+        Row positions per group, with the group key computed from the values of some fields
+        
+        key_of is called once per distinct combination of the fields' values rather than
+        once per row. Positions within each group keep the batch's row order.
+        """
+        if not len(batch):
+            return {}
+        # Fold the fields' codes into one integer per row (mixed radix over the dictionary sizes)
+        sizes = [len(batch.dictionary(field)) for field in fields]
+        if np.prod(sizes, dtype=float) < 2 ** 62:
+            folded = np.zeros(len(batch), dtype=np.int64)
+            for field, size in zip(fields, sizes):
+                folded = folded * size + batch.codes(field)
+            distinct, inverse = np.unique(folded, return_inverse=True)
+            combinations = []
+            for value in distinct.tolist():
+                combination = []
+                for size in reversed(sizes):
+                    value, code = divmod(value, size)
+                    combination.append(code)
+                combinations.append(combination[::-1])
+        else:
+            codes = np.stack([batch.codes(field).astype(np.int64) for field in fields])
+            distinct, inverse = np.unique(codes, axis=1, return_inverse=True)
+            combinations = distinct.T.tolist()
+        keys = [key_of(*(batch.dictionary(field)[code] for field, code in zip(fields, combination)))
+                for combination in combinations]
+        key_codes, distinct_keys = pd.factorize(np.array(keys, dtype=object), use_na_sentinel=False)
+        row_key_codes = key_codes[inverse.reshape(-1)]
+        
+        order = np.argsort(row_key_codes, kind='stable')
+        boundaries = np.flatnonzero(np.diff(row_key_codes[order])) + 1
+        return {distinct_keys[row_key_codes[group[0]]]: group for group in np.split(order, boundaries)}
+    
+    def _aggregate_sheets(self, batch: RecordBatch, sheet_rows: List[np.ndarray], roles: Dict[str, str],
+                          combination_mode: str, custom_combination_fields: Optional[List[str]],
+                          period_axis: PeriodAxis, aggregation_engine: str,
+                          incoterm_mode: str = "manual") -> List[Dict[str, Dict[str, Any]]]:
+        """
+        Aggregation results of every supplier/origin group of every sheet, from one pass
+        
+        Each row is keyed by its (sheet, group) block and DataAggregator.aggregate_blocks
+        aggregates all blocks together, so the cost follows the number of rows rather
+        than sheets x groups. The blocks and the fine aggregate are kept for the batch:
+        processing it again in another combination mode only rolls the fine groups up.
+        
+        Args:
+            batch: All rows
+            sheet_rows: Positions of the rows of each sheet (from _partition_rows)
+            roles: Sheet and group fields (see _get_entity_roles)
+            incoterm_mode: With "from_column", results also carry 'firstRows': the row
+                each recap's incoterm is read from, by combinationId
+            
+        Returns:
+            Per sheet, in the order of sheet_rows: group key -> perform_aggregation result
+        """
+        state = self._sheet_blocks
+        if (state is None or state['batch'] is not batch or state['roles'] != roles
+                or state['periods'] != period_axis.labels):
+            rows_by_group = self._group_indices(batch, [roles['group'], 'originCountry'], self._group_key)
+            group_names = list(rows_by_group)
+            row_groups = np.zeros(len(batch), dtype=np.intp)
+            for group_index, name in enumerate(group_names):
+                row_groups[rows_by_group[name]] = group_index
+            
+            # Block of a row: sheet * groups + group (rows outside every sheet are left out)
+            in_sheet = np.zeros(len(batch), dtype=bool)
+            blocks = np.zeros(len(batch), dtype=np.intp)
+            for sheet_index, rows in enumerate(sheet_rows):
+                in_sheet[rows] = True
+                blocks[rows] = sheet_index * len(group_names) + row_groups[rows]
+            sheet_data = batch
+            if not in_sheet.all():
+                sheet_positions = np.flatnonzero(in_sheet)
+                sheet_data, blocks = batch.take(sheet_positions), blocks[sheet_positions]
+            state = self._sheet_blocks = {'batch': batch, 'roles': dict(roles), 'periods': list(period_axis.labels),
+                                          'groupNames': group_names, 'sheetData': sheet_data, 'blocks': blocks,
+                                          'fine': None}
+        
+        group_names, sheet_data, blocks = state['groupNames'], state['sheetData'], state['blocks']
+        combination_fields = self._get_combination_fields(combination_mode, custom_combination_fields)
+        fine = None
+        if aggregation_engine == "vectorized" and 'period' in sheet_data.fields and sheet_data.is_dictionary('period'):
+            fine = state['fine']
+            if fine is None or not fine.covers(combination_fields):
+                fine = state['fine'] = self.aggregator.fine_aggregate(sheet_data, blocks, period_axis, combination_fields)
+            else:
+                self.logger.info("Rolling up the aggregates of the previous run")
+        
+        results = self.aggregator.aggregate_blocks(sheet_data, blocks, combination_mode, custom_combination_fields,
+                                                   period_axis, aggregation_engine, fine)
+        if fine is not None and incoterm_mode != "manual":
+            for block, first_rows in fine.first_rows_by_combination(combination_fields).items():
+                if block in results:
+                    results[block]['firstRows'] = {combination_id: sheet_data[row] for combination_id, row in first_rows.items()}
+        
+        aggregations = [{} for _ in sheet_rows]
+        for block, result in results.items():
+            sheet_index, group_index = divmod(block, len(group_names))
+            aggregations[sheet_index][group_names[group_index]] = result
+        return aggregations
+    
+    def _run_sheet_jobs(self, batch: RecordBatch, sheet_jobs: List[Tuple[str, str, np.ndarray]],
+                        sheet_settings: Dict[str, Any], sheet_workers: int = 1) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+        """
+        Aggregation and process_sheet_data of every sheet, here or in a pool of worker processes
+        
+        Sheets only share the rows until they are written, so each can be aggregated
+        and laid out in its own process. Here every sheet is aggregated in one pass
+        (see _aggregate_sheets); a worker aggregates the one sheet of its job. Each job
+        carries only the rows of its sheet; results come back in job order.
+        
+        Args:
+            batch: All rows
+            sheet_jobs: Per sheet, (label for the log, sheet name, row positions)
+            sheet_settings: Keyword arguments of process_sheet_data shared by every sheet
+            sheet_workers: Number of worker processes (1 runs every sheet here), at
+                most one per CPU
+            
+        Returns:
+            Per job, (process_sheet_data result, error logged by a sheet a worker could
+            not produce, or the exception of a worker that failed)
+        """
+        workers = min(max(int(sheet_workers or 1), 1), len(sheet_jobs), os.cpu_count() or 1)
+        if workers <= 1:
+            # Aggregate every supplier/origin group of every sheet in one pass
+            sheet_aggregations = self._sheet_aggregations(batch, [rows for _, _, rows in sheet_jobs], sheet_settings)
+            results = []
+            for (label, sheet_name, rows), group_aggregations in zip(sheet_jobs, sheet_aggregations):
+                self.logger.info(f"Processing {label} with {len(rows)} rows...")
+                results.append((self.process_sheet_data(batch.take(rows), sheet_name, group_aggregations=group_aggregations,
+                                                        **sheet_settings), None))
+            return results
+        
+        self.logger.info(f"Processing {len(sheet_jobs)} sheets in {workers} worker processes")
+        results = []
+        # Spawned workers do not inherit the GUI's threads and locks
+        context = multiprocessing.get_context("spawn")
+        # Workers log into a queue; the listener hands their records to this logger
+        log_queue = context.Queue()
+        listener = QueueListener(log_queue, _ForwardHandler(self.logger))
+        listener.start()
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_sheet_worker,
+                                     initargs=(self.logger.name, self.logger.getEffectiveLevel(), log_queue,
+                                               sheet_settings)) as executor:
+                futures = [executor.submit(_process_sheet_job, sheet_name, batch.take(rows))
+                           for _, sheet_name, rows in sheet_jobs]
+                for (label, _, _), future in zip(sheet_jobs, futures):
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        self.logger.error(f"Error processing {label} in a worker process: {str(e)}")
+                        results.append((None, str(e) or type(e).__name__))
+        except Exception as e:
+            # The pool could not start; sheets without a result are reported as failed
+            self.logger.error(f"Error running the sheet worker processes: {str(e)}")
+            results.extend((None, str(e) or type(e).__name__) for _ in sheet_jobs[len(results):])
+        finally:
+            listener.stop()
+        return results
+    
+    def _sheet_aggregations(self, batch: RecordBatch, sheet_rows: List[np.ndarray],
+                            sheet_settings: Dict[str, Any]) -> List[Dict[str, Dict[str, Any]]]:
+        """_aggregate_sheets with the process_sheet_data settings of a run"""
+        return self._aggregate_sheets(batch, sheet_rows, self._get_entity_roles(sheet_settings['supplier_as_sheet']),
+                                      sheet_settings['combination_mode'], sheet_settings['custom_combination_fields'],
+                                      sheet_settings['period_axis'], sheet_settings['aggregation_engine'],
+                                      sheet_settings['incoterm_mode'])
+    
+    def _partition_rows(self, batch: RecordBatch, sheet_field: str = 'importer') -> Tuple[List[int], np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Split a batch by importer and collect its years, working on codes only
+        
+        Args:
+            batch: Rows to split
+            sheet_field: Field whose values become sheets (see _get_entity_roles)
+        
+        Returns:
+            Tuple of (sorted years present, positions of rows with a blank/N/A importer,
+            importer -> positions of its rows); positions keep the batch's row order
+        """
+        if not len(batch):
+            return [], np.zeros(0, dtype=np.intp), {}
+        
+        years = self._period_axis(batch).years
+        
+        rows_by_importer = self._group_indices(
+            batch, [sheet_field],
+            lambda importer: "" if not importer or importer == "N/A" else importer)
+        blank_importer_rows = rows_by_importer.pop("", np.zeros(0, dtype=np.intp))
+        return years, blank_importer_rows, rows_by_importer
+    
+    def _with_periods(self, batch: RecordBatch) -> RecordBatch:
+        """Batch with a 'period' field, derived from 'month'/'year' labels for rows built without one"""
+        if 'period' in batch.fields or 'month' not in batch.fields:
+            return batch
+        month_dictionary = batch.dictionary('month')
+        if 'year' in batch.fields:
+            year_dictionary = batch.dictionary('year')
+            year_codes = batch.codes('year')
+        else:
+            year_dictionary = ["-"]
+            year_codes = np.zeros(len(batch), dtype=np.uint8)
+        pairs = batch.codes('month').astype(np.int64) * len(year_dictionary) + year_codes
+        distinct_pairs, inverse = np.unique(pairs, return_inverse=True)
+        periods = []
+        for pair in distinct_pairs.tolist():
+            m = month_dictionary[pair // len(year_dictionary)]
+            y = year_dictionary[pair % len(year_dictionary)]
+            try:
+                periods.append(PeriodAxis.encode(int(y), MONTH_ORDER.index(m) + 1))
+            except (ValueError, TypeError):
+                periods.append(NO_PERIOD)
+        period_codes, dictionary = RecordBatch.encode_values(periods)
+        return batch.with_column('period', (period_codes[inverse.reshape(-1)], dictionary))
+    
+    def _period_axis(self, batch: RecordBatch) -> PeriodAxis:
+        """Month columns for the years present in a batch"""
+        if not len(batch) or 'period' not in batch.fields:
+            return PeriodAxis([])
+        dictionary = batch.dictionary('period')
+        used = np.flatnonzero(np.bincount(batch.codes('period'), minlength=len(dictionary)))
+        return PeriodAxis.from_periods(dictionary[code] for code in used.tolist())
+    
+    def process_data_like_javascript(self, all_raw_data: Iterable[Union[RecordBatch, Dict, List[Dict]]], period_year: str, 
                                    global_incoterm: str, incoterm_mode: str = "manual",
                                     output_filename: str = "summary_output.xlsx",
                                     supplier_as_sheet: str = "tidak",
                                     combination_mode: str = "default",
-                                    custom_combination_fields: List[str] = None) -> str:
+                                    custom_combination_fields: List[str] = None,
+                                    period_range: Optional[Tuple[int, int]] = None,
+                                    aggregation_engine: str = "vectorized",
+                                    sheet_workers: int = 1) -> str:
         """
         Process all data like the JavaScript main function
         
         Args:
-            all_raw_data: All raw data
+            all_raw_data: All raw data, as a RecordBatch, a list of row dicts or any iterable of
+                rows or batches (e.g. JSStyleExcelReader.iter_preprocessed_batches); it is read
+                once, and a stream is merged batch by batch (see _as_batch)
             period_year: Year for the period
             global_incoterm: Global INCOTERM value (for manual mode)
             incoterm_mode: Mode for incoterm handling ("manual" or "from_column")
             output_filename: Output filename
             supplier_as_sheet: Whether to use supplier as sheet ("ya" or "tidak")
+            period_range: Optional inclusive (first, last) periods limiting the month columns
+                (pass the same range the rows were read with)
+            aggregation_engine: DataAggregator engine ("vectorized" or the "loop" reference)
+            sheet_workers: Number of processes aggregating and laying out sheets (1 does it here);
+                sheets that fail are listed in self.failed_sheets
             
         Returns:
             str: Path to output file
         """
         try:
-            self.logger.info(f"Starting data processing with {len(all_raw_data)} rows, supplier_as_sheet={supplier_as_sheet}, combination_mode={combination_mode}")
+            self.logger.info(f"Starting data processing, supplier_as_sheet={supplier_as_sheet}, combination_mode={combination_mode}")
             
-            # Discover unique years
-            years = set()
-            for row in all_raw_data:
-                y = row.get('year', '-')
-                if y != "-":
-                    try:
-                        years.add(int(y))
-                    except:
-                        pass
+            batch, row_count = self._as_batch(all_raw_data)
+            self.logger.info(f"Read {row_count} rows")
             
-            years = sorted(list(years))
-            
-            from ..utils.constants import MONTH_ORDER
-            dynamic_months = []
-            if len(years) > 1:
-                period_year = "-".join(str(y) for y in years)
-                for y in years:
-                    for m in MONTH_ORDER:
-                        dynamic_months.append(f"{m}-{y}")
-                # Update 'month' field in raw data
-                for row in all_raw_data:
-                    m = row.get('month', '-')
-                    y = row.get('year', '-')
-                    if m != "-" and y != "-":
-                        row['month'] = f"{m}-{y}"
-            elif len(years) == 1:
-                period_year = str(years[0])
-                dynamic_months = list(MONTH_ORDER)
-            else:
-                dynamic_months = list(MONTH_ORDER)
-
-            # If supplier_as_sheet is "ya", swap supplier and importer data
+            # If supplier_as_sheet is "ya", suppliers become the sheets and importers the groups
+            roles = self._get_entity_roles(supplier_as_sheet)
             if supplier_as_sheet == "ya":
-                self.logger.info("Swapping supplier and importer data for 'supplier sebagai sheet' mode")
-                processed_data = []
-                for row in all_raw_data.copy():
-                    new_row = row.copy()
-                    # Swap supplier and importer
-                    new_row['importer'] = row.get('supplier', '')
-                    new_row['supplier'] = row.get('importer', '')
-                    processed_data.append(new_row)
-                all_raw_data = processed_data
-                self.logger.info("Data swapping completed")
+                self.logger.info("Swapping supplier and importer roles for 'supplier sebagai sheet' mode")
             
-            workbook_data_for_excel_js = []
+            # One pass over the codes: years present, blank-importer rows and rows per importer
+            years, blank_importer_rows, rows_by_importer = self._partition_rows(batch, roles['sheet'])
+            
+            # Month columns: Jan..Des for one year, "Jan-2023".."Des-2024" for several
+            period_axis = PeriodAxis(years, period_range)
+            dynamic_months = period_axis.labels
+            if period_axis.title:
+                period_year = period_axis.title
             
             # Separate data with valid importer vs blank/NA importer
-            data_with_valid_importer = []
-            data_with_blank_or_na_importer = []
+            data_with_blank_or_na_importer = batch.take(blank_importer_rows)
+            unique_importers = sorted(rows_by_importer)
             
-            for row in all_raw_data:
-                importer = row.get('importer')
-                if not importer or importer == "N/A" or importer == "":
-                    data_with_blank_or_na_importer.append(row)
-                else:
-                    data_with_valid_importer.append(row)
+            workbook_data_for_excel_js = []
             
-            self.logger.info(f"Data separation: {len(data_with_valid_importer)} with importer, {len(data_with_blank_or_na_importer)} without importer")
+            self.logger.info(f"Data separation: {len(batch) - len(blank_importer_rows)} with importer, {len(data_with_blank_or_na_importer)} without importer")
             
-            # Process data without importer
-            if data_with_blank_or_na_importer:
-                self.logger.info("Processing data without importer...")
+            # Sheet jobs in output order: data without importer, then importers (or suppliers if swapped)
+            entity_label = "suppliers" if supplier_as_sheet == "ya" else "importers"
+            sheet_jobs = []
+            if len(blank_importer_rows):
                 sheet_name_for_blank = "Data_Tanpa_Importer" if supplier_as_sheet == "tidak" else "Data_Tanpa_Supplier"
-                sheet_result = self.process_sheet_data(data_with_blank_or_na_importer, sheet_name_for_blank, 
-                                                     global_incoterm, incoterm_mode, supplier_as_sheet, dynamic_months, combination_mode, custom_combination_fields)
+                sheet_jobs.append(("data without importer", sheet_name_for_blank, blank_importer_rows))
+            if rows_by_importer:
+                self.logger.info(f"Found {len(unique_importers)} unique {entity_label}: {unique_importers}")
+            for importer in unique_importers:
+                # Clean sheet name (replace invalid characters)
+                base_sheet_name = importer.replace('*', '_').replace('?', '_').replace(':', '_').replace('\\', '_').replace('/', '_').replace('[', '_').replace(']', '_')
+                base_sheet_name = base_sheet_name[:30]  # Limit to 30 characters
+                sheet_jobs.append((f"{entity_label[:-1]} '{importer}'", base_sheet_name, rows_by_importer[importer]))
+            
+            sheet_settings = {
+                'incoterm_value': global_incoterm,
+                'incoterm_mode': incoterm_mode,
+                'supplier_as_sheet': supplier_as_sheet,
+                'dynamic_months': dynamic_months,
+                'combination_mode': combination_mode,
+                'custom_combination_fields': custom_combination_fields,
+                'period_axis': period_axis,
+                'aggregation_engine': aggregation_engine
+            }
+            self.failed_sheets = []
+            for (label, _, _), (sheet_result, error) in zip(
+                    sheet_jobs, self._run_sheet_jobs(batch, sheet_jobs, sheet_settings, sheet_workers)):
                 if sheet_result:
                     workbook_data_for_excel_js.append(sheet_result)
-                    self.logger.info("Successfully processed data without importer")
+                    self.logger.info(f"Successfully processed {label}")
                 else:
-                    self.logger.warning("Failed to process data without importer")
-            
-            # Process data by importer (or supplier if swapped)
-            if data_with_valid_importer:
-                # Get unique importers
-                unique_importers = list(set(row['importer'] for row in data_with_valid_importer if row.get('importer')))
-                unique_importers.sort()
-                entity_label = "suppliers" if supplier_as_sheet == "ya" else "importers"
-                self.logger.info(f"Found {len(unique_importers)} unique {entity_label}: {unique_importers}")
-                
-                for importer in unique_importers:
-                    importer_data = [row for row in data_with_valid_importer if row.get('importer') == importer]
-                    if importer_data:
-                        self.logger.info(f"Processing {entity_label[:-1]} '{importer}' with {len(importer_data)} rows...")
-                        # Clean sheet name (replace invalid characters)
-                        base_sheet_name = importer.replace('*', '_').replace('?', '_').replace(':', '_').replace('\\', '_').replace('/', '_').replace('[', '_').replace(']', '_')
-                        base_sheet_name = base_sheet_name[:30]  # Limit to 30 characters
-                        
-                        sheet_result = self.process_sheet_data(importer_data, base_sheet_name, 
-                                                              global_incoterm, incoterm_mode, supplier_as_sheet, dynamic_months, combination_mode, custom_combination_fields)
-                        if sheet_result:
-                            workbook_data_for_excel_js.append(sheet_result)
-                            self.logger.info(f"Successfully processed {entity_label[:-1]} '{importer}'")
-                        else:
-                            self.logger.warning(f"Failed to process {entity_label[:-1]} '{importer}'")
+                    self.logger.warning(f"Failed to process {label}" + (f": {error}" if error else ""))
+                    self.failed_sheets.append((label, error or "no sheet content (see log)"))
             
             self.logger.info(f"Total sheets processed: {len(workbook_data_for_excel_js)}")
             
@@ -359,3 +657,56 @@ class JSStyleProcessor:
         except Exception as e:
             self.logger.error(f"Error in process_data_like_javascript: {str(e)}")
             raise
+
+
+class _ForwardHandler(logging.Handler):
+    """Passes records received from worker processes to a logger of this process"""
+
+    def __init__(self, target: logging.Logger):
+        super().__init__()
+        self.target = target
+
+    def emit(self, record: logging.LogRecord):
+        self.target.handle(record)
+
+
+class _ErrorCollector(logging.Handler):
+    """Keeps the messages of error records"""
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.messages = []
+
+    def emit(self, record: logging.LogRecord):
+        self.messages.append(record.getMessage())
+
+
+# State of a sheet worker process (see JSStyleProcessor._run_sheet_jobs)
+_sheet_worker = {}
+
+
+def _init_sheet_worker(logger_name: str, log_level: int, log_queue: Any, sheet_settings: Dict[str, Any]):
+    """Route this worker's log to the app through log_queue and keep the settings every job uses"""
+    logger = logging.getLogger(logger_name)
+    logger.handlers.clear()
+    logger.addHandler(QueueHandler(log_queue))
+    logger.setLevel(log_level)
+    logger.propagate = False
+
+    # Errors logged by the current job, the reason given when its sheet is missing
+    error_collector = _ErrorCollector()
+    logger.addHandler(error_collector)
+
+    _sheet_worker['processor'] = JSStyleProcessor(logger)
+    _sheet_worker['errors'] = error_collector.messages
+    _sheet_worker['settings'] = sheet_settings
+
+
+def _process_sheet_job(sheet_name: str, sheet_data: RecordBatch) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Aggregation and process_sheet_data of one sheet's rows in a worker process, with the last error it logged"""
+    job_errors = _sheet_worker['errors']
+    job_errors.clear()
+    processor, settings = _sheet_worker['processor'], _sheet_worker['settings']
+    group_aggregations, = processor._sheet_aggregations(sheet_data, [np.arange(len(sheet_data))], settings)
+    result = processor.process_sheet_data(sheet_data, sheet_name, group_aggregations=group_aggregations, **settings)
+    return result, (job_errors[-1] if job_errors and not result else None)
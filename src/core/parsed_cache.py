@@ -0,0 +1,279 @@
+"""
+Parsed data cache
+Stores preprocessed rows on disk, keyed by the input file's content and the read
+settings, so rereading an unchanged workbook skips the Excel parse
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import pickle
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .record_batch import RecordBatch
+
+
+class ParsedDataCache:
+    """On-disk cache of preprocessed RecordBatches (Parquet when pyarrow is installed, pickle otherwise)"""
+
+    # Bump whenever preprocessing changes what rows a given file and setting produce
+    CACHE_VERSION = 5
+    MAX_ENTRIES = 20
+    HASH_CHUNK_SIZE = 1024 * 1024
+    # Python types a Parquet column can hold; mixed columns are split per type
+    PARQUET_TYPES = {'str': str, 'int': int, 'float': float, 'bool': bool, 'NoneType': type(None)}
+    PARQUET_FILLERS = {'str': "", 'int': 0, 'float': 0.0, 'bool': False, 'NoneType': None}
+
+    def __init__(self, logger, cache_folder: str):
+        self.logger = logger
+        self.cache_folder = cache_folder
+        self.storage_format = "parquet" if importlib.util.find_spec("pyarrow") is not None else "pickle"
+
+    @classmethod
+    def hash_file(cls, input_file_path: str) -> str:
+        """Content hash of a file"""
+        digest = hashlib.blake2b(digest_size=20)
+        with open(input_file_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(cls.HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def make_key(self, content_hash: str, settings: Dict[str, Any]) -> Dict[str, Any]:
+        """Cache key for a file's content and the settings that shape its rows"""
+        return {'version': self.CACHE_VERSION, 'content_hash': content_hash,
+                'settings': json.loads(json.dumps(settings, sort_keys=True, default=str))}
+
+    def _entry_name(self, key: Dict[str, Any]) -> str:
+        """File name stem of the entry for a key"""
+        return hashlib.blake2b(json.dumps(key, sort_keys=True).encode('utf-8'), digest_size=20).hexdigest()
+
+    def _meta_path(self, entry_name: str) -> str:
+        return os.path.join(self.cache_folder, f"{entry_name}.json")
+
+    def _data_path(self, entry_name: str, storage_format: str) -> str:
+        return os.path.join(self.cache_folder, f"{entry_name}.{'parquet' if storage_format == 'parquet' else 'pkl'}")
+
+    def load(self, key: Dict[str, Any]) -> Optional[Tuple[RecordBatch, Dict[str, Any]]]:
+        """
+        Load the cached rows for a key
+
+        Args:
+            key: Key from make_key
+
+        Returns:
+            Tuple of (batch, info) where info is the dictionary stored with the rows,
+            or None on a miss. Unreadable or mismatching entries are removed.
+        """
+        entry_name = self._entry_name(key)
+        meta_path = self._meta_path(entry_name)
+        if not os.path.exists(meta_path):
+            return None
+
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as file:
+                meta = json.load(file)
+            if meta.get('key') != key:
+                raise ValueError("entry does not match its key")
+
+            data_path = self._data_path(entry_name, meta['storage_format'])
+            if meta['storage_format'] == 'parquet':
+                columns = self._decode_parquet(pd.read_parquet(data_path), meta['encodings'])
+                batch = RecordBatch.from_columns({field: columns[field] for field in meta['fields']},
+                                                 meta['numeric_fields'])
+            else:
+                with open(data_path, 'rb') as file:
+                    batch = pickle.load(file)
+
+            if len(batch) != meta['row_count'] or batch.fields != meta['fields']:
+                raise ValueError(f"expected {meta['row_count']} rows of {meta['fields']}")
+
+            # Keep recently used entries when trimming
+            os.utime(meta_path)
+            return batch, meta['info']
+        except Exception as error:
+            self.logger.warning(f"Discarding unreadable cache entry {entry_name}: {str(error)}")
+            self._remove_entry(entry_name)
+            return None
+
+    def store(self, key: Dict[str, Any], batch: RecordBatch, source: str, info: Dict[str, Any]) -> bool:
+        """
+        Store rows under a key, replacing older entries for the same source and settings
+
+        Args:
+            key: Key from make_key
+            batch: Preprocessed rows
+            source: Path of the file the rows were read from
+            info: JSON-serializable details returned with the rows on a hit
+
+        Returns:
+            True if the entry was written
+        """
+        entry_name = self._entry_name(key)
+        try:
+            os.makedirs(self.cache_folder, exist_ok=True)
+
+            storage_format = self.storage_format
+            encodings = None
+            if storage_format == 'parquet':
+                try:
+                    frame, encodings = self._encode_parquet(batch.to_pydict())
+                except (TypeError, OverflowError) as error:
+                    self.logger.info(f"Rows cannot be stored as Parquet ({str(error)}), using pickle")
+                    storage_format = 'pickle'
+
+            data_path = self._data_path(entry_name, storage_format)
+            temp_path = f"{data_path}.tmp"
+            if storage_format == 'parquet':
+                frame.to_parquet(temp_path, index=False)
+            else:
+                with open(temp_path, 'wb') as file:
+                    pickle.dump(batch, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, data_path)
+
+            meta = {
+                'key': key,
+                'source': os.path.abspath(source),
+                'storage_format': storage_format,
+                'encodings': encodings,
+                'fields': batch.fields,
+                'numeric_fields': batch.numeric_fields,
+                'row_count': len(batch),
+                'created': time.time(),
+                'info': info
+            }
+            temp_path = f"{self._meta_path(entry_name)}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(meta, file)
+            os.replace(temp_path, self._meta_path(entry_name))
+
+            self._prune(entry_name, meta)
+            return True
+        except Exception as error:
+            self.logger.warning(f"Could not write cache entry for '{os.path.basename(source)}': {str(error)}")
+            self._remove_entry(entry_name)
+            return False
+
+    def clear(self) -> int:
+        """Remove every cache entry, returning how many were removed"""
+        removed = 0
+        for entry_name, _ in self._list_entries():
+            self._remove_entry(entry_name)
+            removed += 1
+        return removed
+
+    def _list_entries(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """(entry name, meta) of every readable entry, least recently used first"""
+        if not os.path.isdir(self.cache_folder):
+            return []
+
+        entries = []
+        for file_name in os.listdir(self.cache_folder):
+            if not file_name.endswith('.json'):
+                continue
+            meta_path = os.path.join(self.cache_folder, file_name)
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as file:
+                    meta = json.load(file)
+                entries.append((os.path.getmtime(meta_path), file_name[:-len('.json')], meta))
+            except Exception:
+                entries.append((0, file_name[:-len('.json')], {}))
+        entries.sort(key=lambda entry: entry[0])
+        return [(entry_name, meta) for _, entry_name, meta in entries]
+
+    def _prune(self, current_entry: str, current_meta: Dict[str, Any]):
+        """Drop entries superseded by the current one (same file and settings, older content) and trim to MAX_ENTRIES"""
+        entries = self._list_entries()
+        kept = []
+        for entry_name, meta in entries:
+            if entry_name == current_entry:
+                continue
+            key = meta.get('key') or {}
+            superseded = (meta.get('source') == current_meta['source']
+                          and key.get('settings') == current_meta['key']['settings'])
+            if superseded or key.get('version') != self.CACHE_VERSION:
+                self._remove_entry(entry_name)
+            else:
+                kept.append(entry_name)
+
+        for entry_name in kept[:max(len(kept) + 1 - self.MAX_ENTRIES, 0)]:
+            self._remove_entry(entry_name)
+
+    def _remove_entry(self, entry_name: str):
+        """Delete the files of an entry"""
+        for path in (self._meta_path(entry_name), self._data_path(entry_name, 'parquet'),
+                     self._data_path(entry_name, 'pickle')):
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+            except OSError as error:
+                self.logger.warning(f"Could not remove cache file '{path}': {str(error)}")
+
+    def _encode_parquet(self, columns: Dict[str, List[Any]]) -> Tuple[pd.DataFrame, Dict[str, List[str]]]:
+        """
+        Frame of Parquet-storable columns and the Python types of each field
+
+        A field holding one type becomes one column. A field mixing types (e.g. whole
+        and fractional quantities) becomes a type-index column plus one column per type,
+        so every value comes back with the type it went in with.
+        """
+        frame_columns = {}
+        encodings = {}
+        type_names = {value_type: name for name, value_type in self.PARQUET_TYPES.items()}
+        for position, (field, values) in enumerate(columns.items()):
+            value_types = pd.unique(np.fromiter((type(value) for value in values), dtype=object, count=len(values)))
+            unsupported = [value_type.__name__ for value_type in value_types if value_type not in type_names]
+            if unsupported:
+                raise TypeError(f"unsupported value types in '{field}': {', '.join(unsupported)}")
+
+            names = [type_names[value_type] for value_type in value_types]
+            encodings[field] = names
+            if len(names) == 1:
+                frame_columns[f"{position}"] = self._typed_column(values, names[0])
+                continue
+
+            type_codes = np.fromiter((names.index(type_names[type(value)]) for value in values),
+                                     dtype=np.uint8, count=len(values))
+            frame_columns[f"{position}:type"] = type_codes
+            for code, name in enumerate(names):
+                filler = self.PARQUET_FILLERS[name]
+                frame_columns[f"{position}:{name}"] = self._typed_column(
+                    [value if type_code == code else filler for value, type_code in zip(values, type_codes)], name)
+        return pd.DataFrame(frame_columns), encodings
+
+    def _typed_column(self, values: List[Any], type_name: str) -> Any:
+        """Values of one Python type as an array Parquet stores losslessly"""
+        if type_name == 'int':
+            return np.array(values, dtype=np.int64)
+        if type_name == 'float':
+            return np.array(values, dtype=np.float64)
+        if type_name == 'bool':
+            return np.array(values, dtype=bool)
+        if type_name == 'NoneType':
+            return pd.array(values, dtype="string")
+        return np.array(values, dtype=object)
+
+    def _decode_parquet(self, frame: pd.DataFrame, encodings: Dict[str, List[str]]) -> Dict[str, List[Any]]:
+        """Columns of Python values from a frame written by _encode_parquet"""
+        columns = {}
+        for position, (field, names) in enumerate(encodings.items()):
+            if len(names) == 1:
+                columns[field] = self._python_values(frame[f"{position}"], names[0])
+                continue
+
+            type_codes = frame[f"{position}:type"].to_numpy()
+            typed_values = [self._python_values(frame[f"{position}:{name}"], name) for name in names]
+            columns[field] = [typed_values[code][index] for index, code in enumerate(type_codes.tolist())]
+        return columns
+
+    def _python_values(self, values: pd.Series, type_name: str) -> List[Any]:
+        """A stored column as a list of Python values of the given type"""
+        if type_name == 'NoneType':
+            return [None] * len(values)
+        if type_name == 'str':
+            return [str(value) for value in values.tolist()]
+        return values.tolist()
@@ -0,0 +1,109 @@
+"""
+Period axis
+Integer month periods carried by processed rows, and the month columns of a run
+"""
+
+import re
+from typing import List, Dict, Any, Optional, Iterable, Tuple, Union
+
+import numpy as np
+
+from ..utils.constants import MONTH_ORDER, NO_PERIOD
+
+
+class PeriodAxis:
+    """
+    The month columns of an output workbook: every month of each year present, in order,
+    optionally limited to a period range
+
+    A period is year * 12 + (month - 1), so periods sort chronologically and
+    divmod(period, 12) gives back the year and month index. Rows without a valid
+    date carry NO_PERIOD. Labels are only needed for the header rows; everything
+    else looks a period's column up with column().
+    """
+
+    MONTH_INPUT_REGEX = re.compile(r'^\s*(\d{4})-(\d{1,2})\s*$')
+
+    def __init__(self, years: Iterable[int], period_range: Optional[Tuple[int, int]] = None):
+        """
+        Args:
+            years: Years present in the data (duplicates allowed)
+            period_range: Optional (first, last) periods, inclusive; the axis is limited to the
+                calendar quarters it touches, since the workbook totals whole quarters
+        """
+        periods = [year * 12 + month_index
+                   for year in sorted(set(int(year) for year in years))
+                   for month_index in range(len(MONTH_ORDER))]
+        if period_range is not None:
+            first = period_range[0] - period_range[0] % 3
+            last = period_range[1] - period_range[1] % 3 + 2
+            periods = [period for period in periods if first <= period <= last]
+        self.years = sorted(set(period // 12 for period in periods))
+        multi_year = len(self.years) > 1
+
+        self.labels = []
+        self._columns = {}
+        for period in periods:
+            year, month_index = divmod(period, 12)
+            self._columns[period] = len(self.labels)
+            self.labels.append(f"{MONTH_ORDER[month_index]}-{year}" if multi_year else MONTH_ORDER[month_index])
+        if not self.years:
+            self.labels = list(MONTH_ORDER)
+
+    @classmethod
+    def from_periods(cls, periods: Iterable[Any]) -> 'PeriodAxis':
+        """Axis covering the years of some periods (NO_PERIOD and None are ignored)"""
+        return cls(period // 12 for period in periods if period is not None and period != NO_PERIOD)
+
+    @staticmethod
+    def encode(years: Union[int, np.ndarray], months: Union[int, np.ndarray]) -> Union[int, np.ndarray]:
+        """Periods of years and 1-based months; a month of 0 (no date) gives NO_PERIOD"""
+        if isinstance(months, np.ndarray):
+            return np.where(months > 0, years * 12 + months - 1, NO_PERIOD)
+        return years * 12 + months - 1 if months > 0 else NO_PERIOD
+
+    @staticmethod
+    def year_range(year: int) -> Tuple[int, int]:
+        """(first, last) periods of a calendar year"""
+        return year * 12, year * 12 + 11
+
+    @classmethod
+    def parse_month(cls, text: str) -> Optional[int]:
+        """Period of a "YYYY-MM" month, or None if the text is not one"""
+        match = cls.MONTH_INPUT_REGEX.match(text or "")
+        if not match or not 1 <= int(match.group(2)) <= 12:
+            return None
+        return cls.encode(int(match.group(1)), int(match.group(2)))
+
+    @staticmethod
+    def in_range(periods: Union[Any, np.ndarray], period_range: Tuple[int, int]) -> Union[bool, np.ndarray]:
+        """Whether periods fall in an inclusive (first, last) range; NO_PERIOD never does"""
+        first, last = period_range
+        if isinstance(periods, np.ndarray):
+            return (periods >= first) & (periods <= last) & (periods != NO_PERIOD)
+        return periods is not None and periods != NO_PERIOD and first <= periods <= last
+
+    @staticmethod
+    def period_name(period: Any) -> str:
+        """Readable form of a period for logs, e.g. "Jan-2024" ("-" without a date)"""
+        if period is None or period == NO_PERIOD:
+            return "-"
+        year, month_index = divmod(int(period), 12)
+        return f"{MONTH_ORDER[month_index]}-{year}"
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def column(self, period: Any) -> Optional[int]:
+        """Column index of a period, or None if it is not on the axis"""
+        return self._columns.get(period)
+
+    def label(self, period: Any) -> str:
+        """Header label of a period's column ("-" when it is not on the axis)"""
+        column = self._columns.get(period)
+        return self.labels[column] if column is not None else "-"
+
+    @property
+    def title(self) -> Optional[str]:
+        """Period title of the workbook ("2024", "2023-2024"), None without years"""
+        return "-".join(str(year) for year in self.years) if self.years else None
@@ -0,0 +1,154 @@
+"""
+Price accumulator
+Fixed-size running totals of a group of rows, in place of per-group price lists
+"""
+
+import math
+import sys
+from typing import List, Any, Optional, Tuple
+
+import numpy as np
+
+# sum() of floats adds a Neumaier compensation term from Python 3.12 on
+COMPENSATED_SUM = sys.version_info >= (3, 12)
+
+
+class PriceAccumulator:
+    """
+    The sum and count of a group's positive prices and the sum of its quantities
+
+    With rows added in order, average equals average_greater_than_zero over the
+    group's prices to the bit: prices are added left to right like sum() does, with
+    sum()'s compensation term in price_comp where sum() keeps one (COMPENSATED_SUM).
+    Quantities are added plainly, like the += of the original totals. Accumulators
+    of parts of a group can be merged; the parts are then summed separately, so a
+    merged average is only within a few units in the last place of a single pass.
+    """
+
+    __slots__ = ('price_sum', 'price_count', 'qty_sum', 'price_comp')
+
+    def __init__(self, price_sum: float = 0, price_count: int = 0, qty_sum: float = 0, price_comp: float = 0):
+        self.price_sum = price_sum
+        self.price_count = price_count
+        self.qty_sum = qty_sum
+        self.price_comp = price_comp
+
+    def add(self, price: float, qty: float):
+        """Add a row; only positive prices count towards the average"""
+        if price > 0:
+            self._add_price(price)
+            self.price_count += 1
+        self.qty_sum += qty
+
+    def merge(self, other: 'PriceAccumulator') -> 'PriceAccumulator':
+        """Add the totals of another part of the group (returns self)"""
+        self._add_price(other.price_sum)
+        self.price_comp += other.price_comp
+        self.price_count += other.price_count
+        self.qty_sum += other.qty_sum
+        return self
+
+    def _add_price(self, price: float):
+        """One step of sum(): the running sum, and its rounding error where sum() keeps it"""
+        total = self.price_sum + price
+        if COMPENSATED_SUM:
+            if abs(self.price_sum) >= abs(price):
+                self.price_comp += (self.price_sum - total) + price
+            else:
+                self.price_comp += (price - total) + self.price_sum
+        self.price_sum = total
+
+    @property
+    def price_total(self) -> float:
+        """Sum of the positive prices, as sum() returns it"""
+        if self.price_comp and math.isfinite(self.price_comp):
+            return self.price_sum + self.price_comp
+        return self.price_sum
+
+    @property
+    def average(self) -> float:
+        """Average positive price, 0 without positive prices"""
+        return self.price_total / self.price_count if self.price_count else 0
+
+    def to_list(self) -> List[Any]:
+        """[price_sum, price_count, qty_sum, price_comp], e.g. for JSON"""
+        return [self.price_sum, self.price_count, self.qty_sum, self.price_comp]
+
+    @classmethod
+    def from_list(cls, values: List[Any]) -> 'PriceAccumulator':
+        """Accumulator of a to_list() result"""
+        return cls(*values)
+
+    @classmethod
+    def grouped(cls, groups: np.ndarray, group_count: int, prices: np.ndarray,
+                quantities: np.ndarray, price_counts: Optional[np.ndarray] = None) -> List['PriceAccumulator']:
+        """
+        Accumulators of many groups at once, as if each row were added in order
+
+        Args:
+            groups: Group index of each row
+            group_count: Number of groups
+            prices: Price of each row
+            quantities: Quantity of each row
+            price_counts: Optional number of positive prices behind each row, when rows
+                are already totals (prices then hold price sums and are merged as is)
+
+        Returns:
+            One accumulator per group
+        """
+        if price_counts is not None:
+            price_sums, price_comps = cls._running_sums(groups, group_count, prices)
+            price_counts = np.bincount(groups, weights=price_counts, minlength=group_count).astype(np.int64)
+        else:
+            positive = prices > 0
+            price_sums, price_comps = cls._running_sums(groups[positive], group_count, prices[positive])
+            price_counts = np.bincount(groups[positive], minlength=group_count)
+        qty_sums = np.bincount(groups, weights=quantities, minlength=group_count)
+        return [cls(price_sum, price_count, qty_sum, price_comp) for price_sum, price_count, qty_sum, price_comp
+                in zip(price_sums.tolist(), price_counts.tolist(), qty_sums.tolist(), price_comps.tolist())]
+
+    @staticmethod
+    def _running_sums(groups: np.ndarray, group_count: int, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Per group, the sum of the values added in row order and the compensation term
+        _add_price() would keep for it (zeros without COMPENSATED_SUM)
+        """
+        # bincount adds the weights in row order, so the sums match add() row by row
+        sums = np.bincount(groups, weights=values, minlength=group_count)
+        comps = np.zeros(group_count, dtype=np.float64)
+        if not COMPENSATED_SUM or not len(values):
+            return sums, comps
+
+        # Each group's values in row order, as a row of a matrix padded with zeros,
+        # which change neither the running sum nor the compensation. Groups are
+        # batched by their size rounded up to a power of two, so padding at most
+        # doubles the values.
+        order = np.argsort(groups, kind='stable')
+        sorted_groups = groups[order]
+        sizes = np.bincount(groups, minlength=group_count)
+        starts = np.cumsum(sizes) - sizes
+        positions = np.arange(len(values)) - starts[sorted_groups]
+        widths = np.zeros(group_count, dtype=np.int64)
+        widths[sizes > 0] = 1 << np.ceil(np.log2(sizes[sizes > 0])).astype(np.int64)
+        for width in np.unique(widths[sizes > 0]).tolist():
+            members = np.flatnonzero(widths == width)
+            row_of_group = np.zeros(group_count, dtype=np.intp)
+            row_of_group[members] = np.arange(len(members))
+            in_batch = widths[sorted_groups] == width
+            matrix = np.zeros((len(members), width), dtype=np.float64)
+            matrix[row_of_group[sorted_groups[in_batch]], positions[in_batch]] = values[order[in_batch]]
+            # accumulate adds sequentially, like the loop of sum()
+            running = np.add.accumulate(matrix, axis=1)
+            previous = np.zeros_like(running)
+            previous[:, 1:] = running[:, :-1]
+            errors = np.where(np.abs(previous) >= np.abs(matrix),
+                              (previous - running) + matrix, (matrix - running) + previous)
+            comps[members] = np.add.accumulate(errors, axis=1)[:, -1]
+        return sums, comps
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, PriceAccumulator) and self.to_list() == other.to_list()
+
+    def __repr__(self) -> str:
+        return (f"PriceAccumulator(price_sum={self.price_sum}, price_count={self.price_count}, "
+                f"qty_sum={self.qty_sum}, price_comp={self.price_comp})")
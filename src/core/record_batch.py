@@ -0,0 +1,330 @@
+"""
+Record batch
+Columnar container for preprocessed rows, passed from the reader through the
+processor, aggregator and formatter
+"""
+
+from collections import namedtuple
+from collections.abc import Mapping
+from typing import List, Dict, Any, Optional, Callable, Iterable, Iterator, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+
+# A dictionary field passed through a function (see RecordBatch.map_column):
+# codes - per row, index into values
+# values - distinct results, first-seen order
+# unchanged - per row, whether the function returned the value itself
+# ranks - per value, position in sorted order of str(value)
+MappedColumn = namedtuple('MappedColumn', ['codes', 'values', 'unchanged', 'ranks'])
+
+
+class RowView(Mapping):
+    """Read-only dict-style view of one row of a RecordBatch"""
+
+    __slots__ = ('_batch', '_index')
+
+    def __init__(self, batch: 'RecordBatch', index: int):
+        self._batch = batch
+        self._index = index
+
+    def __getitem__(self, field: str) -> Any:
+        return self._batch.value(field, self._index)
+
+    def get(self, field: str, default: Any = None) -> Any:
+        if field not in self._batch._columns:
+            return default
+        return self._batch.value(field, self._index)
+
+    def __contains__(self, field: object) -> bool:
+        return field in self._batch._columns
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._batch.fields)
+
+    def __len__(self) -> int:
+        return len(self._batch.fields)
+
+    def copy(self) -> Dict[str, Any]:
+        """The row as a plain dictionary"""
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return repr(self.copy())
+
+
+class RecordBatch:
+    """
+    Rows stored column by column
+
+    Numeric fields are float64 arrays. Every other field is a code array (uint8,
+    uint16 or int32, whichever fits) into a dictionary of the field's distinct values
+    (any hashable Python values), which take(), rename() and concat() share instead of
+    copying. Iterating or indexing a batch yields RowView objects, so code written for
+    lists of row dicts keeps working.
+    """
+
+    def __init__(self, length: int, columns: Dict[str, np.ndarray],
+                 dictionaries: Dict[str, List[Any]], mapped: Optional[Dict] = None):
+        """
+        Args:
+            length: Number of rows
+            columns: Field -> float64 values (numeric fields) or codes (dictionary fields), in field order
+            dictionaries: Dictionary field -> distinct values the codes index
+            mapped: map_column results per dictionary, shared with the batch this one derives from
+        """
+        self._length = length
+        self._columns = columns
+        self._dictionaries = dictionaries
+        self._mapped = mapped if mapped is not None else {}
+        self.fields = list(columns)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # map_column results hold functions; they are rebuilt on demand
+        state = dict(self.__dict__)
+        state['_mapped'] = {}
+        return state
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Sequence[Any]], numeric_fields: Iterable[str] = ()) -> 'RecordBatch':
+        """
+        Build a batch from full columns of Python values
+
+        Args:
+            columns: Field -> values, all of the same length
+            numeric_fields: Fields stored as float64; the rest are dictionary encoded
+        """
+        numeric_fields = set(numeric_fields)
+        length = len(next(iter(columns.values()))) if columns else 0
+        encoded = {}
+        dictionaries = {}
+        for field, values in columns.items():
+            if field in numeric_fields:
+                encoded[field] = np.asarray(values, dtype=np.float64)
+            else:
+                codes, uniques = cls.encode_values(values)
+                encoded[field] = codes
+                dictionaries[field] = uniques
+        return cls(length, encoded, dictionaries)
+
+    @classmethod
+    def from_codes(cls, length: int, columns: Dict[str, Union[np.ndarray, tuple]]) -> 'RecordBatch':
+        """
+        Build a batch from already encoded columns
+
+        Args:
+            length: Number of rows
+            columns: Field -> float64 array, or (codes, dictionary) for dictionary fields;
+                the dictionary must not repeat a value
+        """
+        encoded = {}
+        dictionaries = {}
+        for field, column in columns.items():
+            if isinstance(column, tuple):
+                codes, dictionary = column
+                encoded[field] = np.asarray(codes, dtype=cls.code_dtype(len(dictionary)))
+                dictionaries[field] = list(dictionary)
+            else:
+                encoded[field] = np.asarray(column, dtype=np.float64)
+        return cls(length, encoded, dictionaries)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Mapping], numeric_fields: Iterable[str] = ()) -> 'RecordBatch':
+        """Build a batch from row dictionaries that all have the same keys"""
+        rows = list(rows)
+        if not rows:
+            return cls(0, {}, {})
+        fields = list(rows[0].keys())
+        return cls.from_columns({field: [row[field] for row in rows] for field in fields}, numeric_fields)
+
+    @staticmethod
+    def code_dtype(dictionary_size: int) -> type:
+        """Smallest integer type for codes into a dictionary of the given size"""
+        if dictionary_size <= 1 << 8:
+            return np.uint8
+        if dictionary_size <= 1 << 16:
+            return np.uint16
+        return np.int32
+
+    @classmethod
+    def encode_values(cls, values: Sequence[Any]) -> tuple:
+        """Codes and distinct values (first-seen order) of a column of Python values"""
+        cells = np.empty(len(values), dtype=object)
+        cells[:] = list(values)
+        codes, uniques = pd.factorize(cells, use_na_sentinel=False)
+        return codes.astype(cls.code_dtype(len(uniques))), list(uniques)
+
+    @classmethod
+    def concat(cls, batches: Sequence['RecordBatch']) -> 'RecordBatch':
+        """Rows of several batches with the same fields, in order"""
+        batches = [batch for batch in batches if len(batch)] or list(batches[:1])
+        if not batches:
+            return cls(0, {}, {})
+        if len(batches) == 1:
+            return batches[0]
+
+        first = batches[0]
+        columns = {}
+        dictionaries = {}
+        for field in first.fields:
+            if not first.is_dictionary(field):
+                columns[field] = np.concatenate([batch._columns[field] for batch in batches])
+                continue
+
+            if all(batch._dictionaries[field] is first._dictionaries[field] for batch in batches):
+                columns[field] = np.concatenate([batch._columns[field] for batch in batches])
+                dictionaries[field] = first._dictionaries[field]
+                continue
+
+            # Map each batch's codes into a merged dictionary
+            merged = []
+            positions = {}
+            parts = []
+            for batch in batches:
+                remap = np.empty(len(batch._dictionaries[field]), dtype=np.int64)
+                for code, value in enumerate(batch._dictionaries[field]):
+                    key = (type(value), value)
+                    if key not in positions:
+                        positions[key] = len(merged)
+                        merged.append(value)
+                    remap[code] = positions[key]
+                parts.append(remap[batch._columns[field]])
+            columns[field] = np.concatenate(parts).astype(cls.code_dtype(len(merged)))
+            dictionaries[field] = merged
+        return cls(sum(len(batch) for batch in batches), columns, dictionaries, first._mapped)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[RowView]:
+        return (RowView(self, index) for index in range(self._length))
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[RowView, 'RecordBatch']:
+        if isinstance(index, slice):
+            return self.take(np.arange(self._length)[index])
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("RecordBatch index out of range")
+        return RowView(self, index)
+
+    def __repr__(self) -> str:
+        return f"RecordBatch({self._length} rows, fields={self.fields})"
+
+    def is_dictionary(self, field: str) -> bool:
+        """Whether a field is dictionary encoded (as opposed to numeric)"""
+        return field in self._dictionaries
+
+    def value(self, field: str, index: int) -> Any:
+        """Value of one cell"""
+        column = self._columns[field]
+        dictionary = self._dictionaries.get(field)
+        if dictionary is not None:
+            return dictionary[column[index]]
+        return float(column[index])
+
+    def column(self, field: str) -> List[Any]:
+        """Values of a field as a list of Python values"""
+        if field not in self._dictionaries:
+            return self._columns[field].tolist()
+        dictionary = np.empty(len(self._dictionaries[field]), dtype=object)
+        dictionary[:] = self._dictionaries[field]
+        return dictionary[self._columns[field]].tolist()
+
+    def numbers(self, field: str) -> np.ndarray:
+        """float64 values of a numeric field"""
+        return self._columns[field]
+
+    def codes(self, field: str) -> np.ndarray:
+        """Codes of a dictionary field"""
+        return self._columns[field]
+
+    def dictionary(self, field: str) -> List[Any]:
+        """Distinct values a dictionary field's codes index (may include values no row uses)"""
+        return self._dictionaries[field]
+
+    def map_column(self, field: str, function: Callable[[Any], Any]) -> MappedColumn:
+        """
+        A dictionary field passed through a function, as codes into the distinct results
+
+        The function runs once per dictionary value, and the result is kept for every
+        batch derived from this one (take, filter, rename, with_column), so the codes
+        of different slices of the same data compare equal. A missing field maps as if
+        every row held None.
+
+        Args:
+            field: Dictionary field
+            function: Function of one value; must return hashable values
+
+        Returns:
+            MappedColumn with codes, values, unchanged and ranks
+        """
+        dictionary = self._dictionaries.get(field)
+        if dictionary is None:
+            return MappedColumn(np.zeros(self._length, dtype=np.uint8), [function(None)],
+                                np.zeros(self._length, dtype=bool), np.zeros(1, dtype=np.intp))
+
+        memo_key = (id(dictionary), function)
+        memo = self._mapped.get(memo_key)
+        if memo is None or memo[0] is not dictionary:
+            results = [function(value) for value in dictionary]
+            remap, values = self.encode_values(results)
+            unchanged = np.fromiter((bool(result == value) for result, value in zip(results, dictionary)),
+                                    dtype=bool, count=len(dictionary))
+            ranks = np.empty(len(values), dtype=np.intp)
+            ranks[sorted(range(len(values)), key=lambda code: str(values[code]))] = np.arange(len(values))
+            memo = (dictionary, remap, values, unchanged, ranks)
+            self._mapped[memo_key] = memo
+
+        _, remap, values, unchanged, ranks = memo
+        codes = self._columns[field]
+        return MappedColumn(remap[codes], values, unchanged[codes], ranks)
+
+    def take(self, indices: Union[np.ndarray, Sequence[int]]) -> 'RecordBatch':
+        """Rows at the given positions, in that order; dictionaries are shared"""
+        indices = np.asarray(indices, dtype=np.intp)
+        columns = {field: column[indices] for field, column in self._columns.items()}
+        return RecordBatch(len(indices), columns, self._dictionaries, self._mapped)
+
+    def filter(self, mask: np.ndarray) -> 'RecordBatch':
+        """Rows where mask is True"""
+        return self.take(np.flatnonzero(mask))
+
+    def rename(self, mapping: Dict[str, str]) -> 'RecordBatch':
+        """Same data with fields renamed (names may be swapped); nothing is copied"""
+        columns = {mapping.get(field, field): column for field, column in self._columns.items()}
+        dictionaries = {mapping.get(field, field): dictionary for field, dictionary in self._dictionaries.items()}
+        return RecordBatch(self._length, columns, dictionaries, self._mapped)
+
+    def with_column(self, field: str, column: Union[np.ndarray, tuple]) -> 'RecordBatch':
+        """Copy of the batch with one field replaced or added (float64 array or (codes, dictionary))"""
+        columns = dict(self._columns)
+        dictionaries = dict(self._dictionaries)
+        if isinstance(column, tuple):
+            codes, dictionary = column
+            columns[field] = np.asarray(codes, dtype=self.code_dtype(len(dictionary)))
+            dictionaries[field] = list(dictionary)
+        else:
+            columns[field] = np.asarray(column, dtype=np.float64)
+            dictionaries.pop(field, None)
+        return RecordBatch(self._length, columns, dictionaries, self._mapped)
+
+    def to_pydict(self) -> Dict[str, List[Any]]:
+        """Field -> list of Python values"""
+        return {field: self.column(field) for field in self.fields}
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """The rows as plain dictionaries"""
+        columns = [self.column(field) for field in self.fields]
+        return [dict(zip(self.fields, row)) for row in zip(*columns)]
+
+    @property
+    def numeric_fields(self) -> List[str]:
+        """Fields stored as float64"""
+        return [field for field in self.fields if field not in self._dictionaries]
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the column arrays (dictionaries not included)"""
+        return sum(column.nbytes for column in self._columns.values())
@@ -0,0 +1,110 @@
+"""
+Row filter
+Include/exclude lists for entity fields and HS-code prefixes, evaluated while reading
+"""
+
+import re
+from typing import List, Dict, Any, Optional, Iterable
+
+import numpy as np
+
+
+class RowFilter:
+    """
+    Which processed rows to keep, judged on the cleaned string values of a few fields
+
+    Names match whole values, ignoring case and repeated whitespace. A row is kept when,
+    for every entity field, its value is on the include list (if that list is given) and
+    not on the exclude list, and its HS code starts with one of the HS prefixes (if any
+    are given). HS codes and prefixes are compared on their digits only, so "5503.20"
+    and "550320" are the same prefix.
+    """
+
+    ENTITY_FIELDS = ('importer', 'supplier', 'originCountry')
+    HS_FIELD = 'hsCode'
+    NON_DIGIT_REGEX = re.compile(r'\D')
+
+    def __init__(self, include: Optional[Dict[str, Iterable[str]]] = None,
+                 exclude: Optional[Dict[str, Iterable[str]]] = None,
+                 hs_prefixes: Optional[Iterable[str]] = None):
+        """
+        Args:
+            include: Entity field -> values to keep (other values are dropped)
+            exclude: Entity field -> values to drop
+            hs_prefixes: HS-code prefixes to keep (other codes are dropped)
+        """
+        self.include = self._name_sets(include)
+        self.exclude = self._name_sets(exclude)
+
+        # Prefix index: prefix length -> prefixes of that length, so a code is
+        # checked with one set lookup per distinct length
+        self.hs_prefixes = sorted(set(filter(None, (self._digits(prefix) for prefix in hs_prefixes or []))))
+        self._prefix_index = {}
+        for prefix in self.hs_prefixes:
+            self._prefix_index.setdefault(len(prefix), set()).add(prefix)
+
+    def _name_sets(self, values_by_field: Optional[Dict[str, Iterable[str]]]) -> Dict[str, frozenset]:
+        """Normalized, non-empty value sets per entity field"""
+        name_sets = {}
+        for field, values in (values_by_field or {}).items():
+            if field not in self.ENTITY_FIELDS:
+                raise ValueError(f"Rows can not be filtered on '{field}'")
+            names = frozenset(filter(None, (self._name(value) for value in values)))
+            if names:
+                name_sets[field] = names
+        return name_sets
+
+    @staticmethod
+    def _name(value: Any) -> str:
+        return " ".join(str(value).split()).casefold()
+
+    @classmethod
+    def _digits(cls, value: Any) -> str:
+        return cls.NON_DIGIT_REGEX.sub("", str(value))
+
+    @property
+    def is_empty(self) -> bool:
+        """Whether the filter keeps every row"""
+        return not (self.include or self.exclude or self.hs_prefixes)
+
+    @property
+    def fields(self) -> List[str]:
+        """Row fields the filter looks at, HS code first"""
+        fields = [self.HS_FIELD] if self.hs_prefixes else []
+        return fields + [field for field in self.ENTITY_FIELDS if field in self.include or field in self.exclude]
+
+    def matches(self, field: str, value: str) -> bool:
+        """Whether a row with this cleaned value of field passes the filter"""
+        if field == self.HS_FIELD:
+            if not self.hs_prefixes:
+                return True
+            digits = self._digits(value)
+            return any(digits[:length] in prefixes for length, prefixes in self._prefix_index.items())
+        name = self._name(value)
+        if field in self.include and name not in self.include[field]:
+            return False
+        return name not in self.exclude.get(field, ())
+
+    def mask(self, field: str, values: List[str]) -> np.ndarray:
+        """matches() over a list of values, e.g. the distinct values of a column"""
+        return np.fromiter((self.matches(field, value) for value in values), dtype=bool, count=len(values))
+
+    def to_settings(self) -> Dict[str, Any]:
+        """Normalized form of the filter, for cache keys"""
+        return {
+            'include': {field: sorted(names) for field, names in sorted(self.include.items())},
+            'exclude': {field: sorted(names) for field, names in sorted(self.exclude.items())},
+            'hs_prefixes': self.hs_prefixes
+        }
+
+    def describe(self) -> str:
+        """Short readable form for logs, e.g. "importer in 2 names, HS code 5503/5504" """
+        parts = []
+        for field in self.ENTITY_FIELDS:
+            if field in self.include:
+                parts.append(f"{field} in {len(self.include[field])} names")
+            if field in self.exclude:
+                parts.append(f"{field} not in {len(self.exclude[field])} names")
+        if self.hs_prefixes:
+            parts.append(f"HS code {'/'.join(self.hs_prefixes)}")
+        return ", ".join(parts) or "none"
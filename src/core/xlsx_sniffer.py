@@ -0,0 +1,223 @@
+"""
+XLSX sniffer
+Reads sheet names, the header row and the sheet dimension straight from the
+xlsx container, without loading the workbook
+"""
+
+import os
+import re
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import List, Dict, Any, Optional, Tuple
+
+
+def _local_name(tag: str) -> str:
+    """Tag or attribute name without its namespace"""
+    return tag.rsplit('}', 1)[-1]
+
+
+class XlsxSniffer:
+    """Reads workbook structure from the zip parts of an .xlsx/.xlsm file"""
+
+    SNIFFABLE_EXTENSIONS = ('.xlsx', '.xlsm')
+    CELL_REFERENCE_REGEX = re.compile(r'^([A-Z]+)(\d+)$')
+
+    def __init__(self, logger):
+        self.logger = logger
+
+    def can_sniff(self, input_file_path: str) -> bool:
+        """Whether the file is an OOXML workbook the sniffer understands"""
+        return os.path.splitext(str(input_file_path))[1].lower() in self.SNIFFABLE_EXTENSIONS
+
+    def get_sheet_names(self, input_file_path: str) -> Optional[List[str]]:
+        """
+        Worksheet names in workbook order (chart sheets excluded, like pandas)
+
+        Returns:
+            List of sheet names, or None if the workbook could not be sniffed
+        """
+        try:
+            with zipfile.ZipFile(input_file_path) as archive:
+                return [name for name, _ in self._read_worksheet_parts(archive)]
+        except Exception as error:
+            self.logger.warning(f"Could not sniff sheets of '{os.path.basename(input_file_path)}': {str(error)}")
+            return None
+
+    def sniff_sheet(self, input_file_path: str, sheet_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Read the header row and the <dimension> of one sheet
+
+        Args:
+            input_file_path: Path to the workbook
+            sheet_name: Name of the sheet
+
+        Returns:
+            Dictionary with 'header' (raw header cell values by position, or None when the
+            header cannot be reproduced exactly without loading the workbook, e.g. a
+            date-formatted number or a blank first row) and 'row_count' / 'column_count'
+            (from <dimension>, approximate; None when the sheet has none).
+            None if the sheet could not be sniffed at all.
+        """
+        try:
+            with zipfile.ZipFile(input_file_path) as archive:
+                parts = dict(self._read_worksheet_parts(archive))
+                if sheet_name not in parts:
+                    return None
+
+                dimension, header_cells = self._read_first_row(archive, parts[sheet_name])
+                header = self._resolve_header(archive, header_cells)
+
+                row_count = column_count = None
+                if dimension:
+                    first, _, last = dimension.partition(':')
+                    last_reference = self.CELL_REFERENCE_REGEX.match(last or first)
+                    if last_reference:
+                        column_count = self._column_index(last_reference.group(1)) + 1
+                        row_count = max(int(last_reference.group(2)) - 1, 0)
+
+                return {'header': header, 'row_count': row_count, 'column_count': column_count}
+        except Exception as error:
+            self.logger.warning(f"Could not sniff sheet '{sheet_name}' of '{os.path.basename(input_file_path)}': {str(error)}")
+            return None
+
+    def _read_relationships(self, archive: zipfile.ZipFile, part_name: str) -> Dict[str, Tuple[str, str]]:
+        """Relationship id -> (type, target part name) for a part"""
+        directory, file_name = posixpath.split(part_name)
+        rels_name = posixpath.join(directory, '_rels', file_name + '.rels')
+        if rels_name not in archive.namelist():
+            return {}
+
+        relationships = {}
+        for element in ET.fromstring(archive.read(rels_name)):
+            target = element.get('Target', '')
+            if target.startswith('/'):
+                target = target[1:]
+            else:
+                target = posixpath.normpath(posixpath.join(directory, target))
+            relationships[element.get('Id')] = (element.get('Type', ''), target)
+        return relationships
+
+    def _read_worksheet_parts(self, archive: zipfile.ZipFile) -> List[Tuple[str, str]]:
+        """(sheet name, worksheet part name) pairs in workbook order"""
+        workbook_part = self._workbook_part(archive)
+        relationships = self._read_relationships(archive, workbook_part)
+
+        parts = []
+        for element in ET.fromstring(archive.read(workbook_part)).iter():
+            if _local_name(element.tag) != 'sheet':
+                continue
+            relationship_id = next((value for key, value in element.attrib.items() if _local_name(key) == 'id'), None)
+            rel_type, target = relationships.get(relationship_id, ('', ''))
+            if rel_type.endswith('/worksheet'):
+                parts.append((element.get('name'), target))
+        return parts
+
+    def _read_first_row(self, archive: zipfile.ZipFile, sheet_part: str) -> Tuple[Optional[str], Optional[List[Tuple[int, ET.Element]]]]:
+        """The <dimension> ref and the (column index, <c>) cells of row 1, stopping after the first row"""
+        dimension = None
+        with archive.open(sheet_part) as sheet_xml:
+            for _, element in ET.iterparse(sheet_xml, events=('end',)):
+                name = _local_name(element.tag)
+                if name == 'dimension':
+                    dimension = element.get('ref')
+                elif name == 'row':
+                    if element.get('r') not in (None, '1'):
+                        # Row 1 is blank; pandas then names every column "Unnamed: n"
+                        return dimension, None
+                    cells = []
+                    for position, cell in enumerate(child for child in element if _local_name(child.tag) == 'c'):
+                        reference = self.CELL_REFERENCE_REGEX.match(cell.get('r', ''))
+                        cells.append((self._column_index(reference.group(1)) if reference else position, cell))
+                    return dimension, cells
+                elif name == 'sheetData':
+                    break
+        return dimension, []
+
+    def _resolve_header(self, archive: zipfile.ZipFile, header_cells: Optional[List[Tuple[int, ET.Element]]]) -> Optional[List[Any]]:
+        """Header cell values as openpyxl reads them, or None when that needs styles or dates"""
+        if header_cells is None:
+            return None
+
+        values = {}
+        shared_indexes = {}
+        for column_index, cell in header_cells:
+            cell_type = cell.get('t', 'n')
+            value_element = next((child for child in cell if _local_name(child.tag) == 'v'), None)
+            raw = value_element.text if value_element is not None else None
+
+            if cell_type == 's':
+                if raw is not None:
+                    shared_indexes[column_index] = int(raw)
+            elif cell_type == 'inlineStr':
+                inline = next((child for child in cell if _local_name(child.tag) == 'is'), None)
+                values[column_index] = self._string_item_text(inline) if inline is not None else None
+            elif cell_type == 'str':
+                values[column_index] = raw
+            elif cell_type == 'b':
+                values[column_index] = bool(int(raw)) if raw is not None else None
+            elif cell_type == 'e':
+                values[column_index] = None
+            elif cell_type == 'd':
+                return None
+            elif raw is not None:
+                if cell.get('s', '0') != '0':
+                    # Could be a date format; only the styles part can tell
+                    return None
+                values[column_index] = int(raw) if re.fullmatch(r'-?\d+', raw) else float(raw)
+
+        if shared_indexes:
+            shared_strings = self._read_shared_strings(archive, max(shared_indexes.values()))
+            for column_index, string_index in shared_indexes.items():
+                values[column_index] = shared_strings[string_index]
+
+        header = [None] * (max(values) + 1 if values else 0)
+        for column_index, value in values.items():
+            header[column_index] = value
+        while header and header[-1] is None:
+            header.pop()
+        return header
+
+    def _read_shared_strings(self, archive: zipfile.ZipFile, last_index: int) -> List[str]:
+        """Shared strings up to last_index, reading no further into the table than needed"""
+        shared_part = next(
+            (target for rel_type, target in self._read_relationships(archive, self._workbook_part(archive)).values()
+             if rel_type.endswith('/sharedStrings')),
+            'xl/sharedStrings.xml'
+        )
+
+        strings = []
+        with archive.open(shared_part) as strings_xml:
+            for _, element in ET.iterparse(strings_xml, events=('end',)):
+                if _local_name(element.tag) == 'si':
+                    strings.append(self._string_item_text(element).replace('x005F_', ''))
+                    element.clear()
+                    if len(strings) > last_index:
+                        break
+        return strings
+
+    def _workbook_part(self, archive: zipfile.ZipFile) -> str:
+        """Part name of the workbook"""
+        return next(
+            (target for rel_type, target in self._read_relationships(archive, '').values()
+             if rel_type.endswith('/officeDocument')),
+            'xl/workbook.xml'
+        )
+
+    def _string_item_text(self, item: ET.Element) -> str:
+        """Plain text of a string item: its <t> and rich-text run <t> elements, phonetic runs left out"""
+        snippets = []
+        for child in item:
+            name = _local_name(child.tag)
+            if name == 't':
+                snippets.append(child.text or "")
+            elif name == 'r':
+                snippets.extend(run.text or "" for run in child if _local_name(run.tag) == 't')
+        return "".join(snippets)
+
+    def _column_index(self, letters: str) -> int:
+        """Zero-based index of a column letter reference (A -> 0, AA -> 26)"""
+        index = 0
+        for letter in letters:
+            index = index * 26 + ord(letter) - ord('A') + 1
+        return index - 1
@@ -6,17 +6,24 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import threading
 import os
+import re
 import sys
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from ..core.excel_reader import ExcelReader
 from ..core.data_aggregator import DataAggregator
 from ..core.output_formatter import OutputFormatter
 from ..core.js_excel_reader import JSStyleExcelReader
 from ..core.js_processor import JSStyleProcessor
+from ..core.parsed_cache import ParsedDataCache
+from ..core.aggregate_store import AggregateStore
+from ..core.period_axis import PeriodAxis
+from ..core.row_filter import RowFilter
 from ..utils.settings import SettingsManager, get_settings_manager
+from ..utils.constants import EXCEL_ENGINE_MODULES, DEFAULT_CACHE_FOLDER, DEFAULT_AGGREGATE_STORE_PATH
+from ..utils.helpers import is_excel_engine_installed
 
 class MainWindow:
     """Main application window"""
@@ -42,7 +49,15 @@ class MainWindow:
         self.selected_sheet = tk.StringVar()
         self.date_format = tk.StringVar(value="auto")
         self.number_format = tk.StringVar(value="auto")
+        self.detected_formats_text = tk.StringVar(value="Shown after data is read with Auto Detect")
         self.target_year = tk.StringVar(value=str(datetime.now().year))
+        self.period_filter = tk.StringVar(value="all")  # "all", "target_year" or "month_range"
+        self.period_from = tk.StringVar()
+        self.period_to = tk.StringVar()
+        # Row filters: names separated by ";" (names may contain commas), HS prefixes by "," or ";"
+        self.row_filter_include = {field: tk.StringVar() for field in RowFilter.ENTITY_FIELDS}
+        self.row_filter_exclude = {field: tk.StringVar() for field in RowFilter.ENTITY_FIELDS}
+        self.hs_prefix_filter = tk.StringVar()
         self.incoterm = tk.StringVar(value="-")
         self.incoterm_mode = tk.StringVar(value="manual")  # "manual" or "from_column"
         self.supplier_as_sheet = tk.StringVar(value="tidak")  # "ya" or "tidak"
@@ -66,6 +81,12 @@ class MainWindow:
         # Settings variables for default mappings
         self.default_mapping_vars = {}
         self.auto_apply_mappings = tk.BooleanVar(value=self.settings_manager.get_auto_apply_mappings())
+        self.excel_engine = tk.StringVar(value=self.settings_manager.get_excel_engine())
+        self.excel_reader.excel_engine = self.excel_engine.get()
+        self.js_excel_reader.excel_engine = self.excel_engine.get()
+        self.parsed_cache_enabled = tk.BooleanVar(value=self.settings_manager.get_parsed_cache_enabled())
+        self.js_excel_reader.set_cache_folder(DEFAULT_CACHE_FOLDER if self.parsed_cache_enabled.get() else None)
+        self.sheet_workers = tk.IntVar(value=self.settings_manager.get_sheet_workers())
         
         # Column mapping variables
         self.column_mappings = {
@@ -88,6 +109,11 @@ class MainWindow:
         
         self.available_columns = []
         self.processing = False
+        # Read settings and rows of the last run; a run with the same read settings (e.g.
+        # another combination mode) reuses the rows, and the processor its aggregates
+        self.last_read = None
+        # Add each processed file to the aggregate store and report every stored month
+        self.use_aggregate_store = tk.BooleanVar(value=False)
         
         self.setup_ui()
 
@@ -155,6 +181,55 @@ class MainWindow:
             self.incoterm_combo.config(state="disabled")
             self.incoterm_info_label.config(text="(Read from incoterms column - first 3 chars)")
     
+    def on_period_filter_change(self, event=None):
+        """Enable the month range entries only in month_range mode"""
+        state = "normal" if self.period_filter.get() == "month_range" else "disabled"
+        self.period_from_entry.config(state=state)
+        self.period_to_entry.config(state=state)
+    
+    def get_period_range(self) -> Optional[Tuple[int, int]]:
+        """
+        Inclusive (first, last) periods selected by the Period Filter setting
+        
+        Returns:
+            Period range, or None to read every row
+            
+        Raises:
+            ValueError: If the target year or month range is not valid
+        """
+        mode = self.period_filter.get()
+        if mode == "target_year":
+            year = self.target_year.get().strip()
+            if not year.isdigit():
+                raise ValueError(f"Target Year '{year}' is not a valid year")
+            return PeriodAxis.year_range(int(year))
+        if mode == "month_range":
+            first = PeriodAxis.parse_month(self.period_from.get())
+            last = PeriodAxis.parse_month(self.period_to.get())
+            if first is None or last is None:
+                raise ValueError("Enter the period range as YYYY-MM, e.g. 2024-07 to 2025-06")
+            if first > last:
+                raise ValueError("The period range ends before it starts")
+            return first, last
+        return None
+    
+    def get_row_filter(self) -> Optional[RowFilter]:
+        """
+        RowFilter from the Row Filters settings
+        
+        Returns:
+            Row filter, or None if no filter is entered
+        """
+        def names(variable):
+            return [name.strip() for name in variable.get().split(";") if name.strip()]
+        
+        row_filter = RowFilter(
+            include={field: names(variable) for field, variable in self.row_filter_include.items()},
+            exclude={field: names(variable) for field, variable in self.row_filter_exclude.items()},
+            hs_prefixes=[prefix for prefix in re.split(r'[,;\s]+', self.hs_prefix_filter.get()) if prefix]
+        )
+        return None if row_filter.is_empty else row_filter
+    
     def update_field_descriptions(self):
         """Update field descriptions based on supplier_as_sheet setting"""
         all_field_descriptions = {
@@ -346,6 +421,52 @@ class MainWindow:
                  text="When enabled, default mappings will be applied automatically when you select a sheet",
                  font=('TkDefaultFont', 8), foreground='gray').pack(anchor='w', pady=(5, 0))
         
+        # Excel engine option
+        engine_frame = ttk.LabelFrame(parent, text="Excel Reading Engine", padding="10")
+        engine_frame.pack(fill='x', padx=10, pady=5)
+        
+        engine_combo = ttk.Combobox(engine_frame, textvariable=self.excel_engine,
+                                    values=["auto"] + list(EXCEL_ENGINE_MODULES), state="readonly", width=15)
+        engine_combo.pack(anchor='w')
+        engine_combo.bind('<<ComboboxSelected>>', self.on_excel_engine_change)
+        
+        installed = [engine for engine in EXCEL_ENGINE_MODULES if is_excel_engine_installed(engine)]
+        ttk.Label(engine_frame,
+                 text=f"Auto uses the fastest installed engine for the file type. Installed: {', '.join(installed) or '-'}",
+                 font=('TkDefaultFont', 8), foreground='gray').pack(anchor='w', pady=(5, 0))
+        
+        # Parsed data cache option
+        cache_frame = ttk.LabelFrame(parent, text="Parsed Data Cache", padding="10")
+        cache_frame.pack(fill='x', padx=10, pady=5)
+        
+        cache_row = ttk.Frame(cache_frame)
+        cache_row.pack(fill='x')
+        ttk.Checkbutton(
+            cache_row,
+            text="Reuse parsed data when the same file is processed again with the same settings",
+            variable=self.parsed_cache_enabled,
+            command=self.on_parsed_cache_change
+        ).pack(side='left')
+        ttk.Button(cache_row, text="Clear Cache", command=self.clear_parsed_cache).pack(side='right')
+        
+        ttk.Label(cache_frame,
+                 text=f"Stored in {DEFAULT_CACHE_FOLDER}. Entries are refreshed automatically when a file changes.",
+                 font=('TkDefaultFont', 8), foreground='gray').pack(anchor='w', pady=(5, 0))
+        
+        # Parallel sheet processing option
+        workers_frame = ttk.LabelFrame(parent, text="Parallel Sheet Processing", padding="10")
+        workers_frame.pack(fill='x', padx=10, pady=5)
+        
+        workers_row = ttk.Frame(workers_frame)
+        workers_row.pack(fill='x')
+        ttk.Label(workers_row, text="Worker processes:").pack(side='left')
+        ttk.Spinbox(workers_row, from_=1, to=os.cpu_count() or 1, textvariable=self.sheet_workers, width=5,
+                    state='readonly', command=self.on_sheet_workers_change).pack(side='left', padx=(5, 0))
+        
+        ttk.Label(workers_frame,
+                 text=f"Aggregates and lays out importer sheets in parallel; 1 uses the application process only ({os.cpu_count() or 1} CPUs available).",
+                 font=('TkDefaultFont', 8), foreground='gray').pack(anchor='w', pady=(5, 0))
+        
         # Create scrollable frame for default mappings
         mapping_container = ttk.LabelFrame(parent, text="Default Mapping Set", padding="10")
         mapping_container.pack(fill='both', expand=True, padx=10, pady=5)
@@ -497,6 +618,13 @@ class MainWindow:
                 row=i, column=0, sticky='w', pady=2
             )
         
+        # Detected formats section
+        detected_section = ttk.LabelFrame(config_frame, text="Detected Formats", padding="10")
+        detected_section.pack(fill='x', padx=10, pady=5)
+        ttk.Label(detected_section, textvariable=self.detected_formats_text, justify='left').grid(
+            row=0, column=0, sticky='w', pady=2
+        )
+        
         # Other settings section
         other_section = ttk.LabelFrame(config_frame, text="Other Settings", padding="10")
         other_section.pack(fill='x', padx=10, pady=5)
@@ -506,6 +634,24 @@ class MainWindow:
         year_entry = ttk.Entry(other_section, textvariable=self.target_year, width=10)
         year_entry.grid(row=0, column=1, sticky='w', padx=(10, 0), pady=2)
         
+        # Period filter: rows outside it are dropped while reading
+        period_frame = ttk.Frame(other_section)
+        period_frame.grid(row=0, column=2, columnspan=2, sticky='w', padx=(10, 0), pady=2)
+        ttk.Label(period_frame, text="Period Filter:").pack(side='left')
+        self.period_filter_combo = ttk.Combobox(period_frame, textvariable=self.period_filter,
+                                                values=["all", "target_year", "month_range"],
+                                                state="readonly", width=12)
+        self.period_filter_combo.pack(side='left', padx=(5, 0))
+        self.period_filter_combo.bind('<<ComboboxSelected>>', self.on_period_filter_change)
+        ttk.Label(period_frame, text="From:").pack(side='left', padx=(10, 0))
+        self.period_from_entry = ttk.Entry(period_frame, textvariable=self.period_from, width=8)
+        self.period_from_entry.pack(side='left', padx=(5, 0))
+        ttk.Label(period_frame, text="To:").pack(side='left', padx=(5, 0))
+        self.period_to_entry = ttk.Entry(period_frame, textvariable=self.period_to, width=8)
+        self.period_to_entry.pack(side='left', padx=(5, 0))
+        ttk.Label(period_frame, text="(YYYY-MM)", font=('TkDefaultFont', 8), foreground='gray').pack(side='left', padx=(5, 0))
+        self.on_period_filter_change()
+        
         # INCOTERM setting
         ttk.Label(other_section, text="INCOTERM Mode:").grid(row=1, column=0, sticky='w', pady=2)
         self.incoterm_mode_combo = ttk.Combobox(other_section, textvariable=self.incoterm_mode, 
@@ -584,6 +730,27 @@ class MainWindow:
         
         other_section.columnconfigure(1, weight=1)
         
+        # Row filters: rows they reject are dropped while reading
+        filter_section = ttk.LabelFrame(config_frame, text="Row Filters", padding="10")
+        filter_section.pack(fill='x', padx=10, pady=5)
+        ttk.Label(filter_section, text="Include").grid(row=0, column=1, sticky='w', padx=(10, 0))
+        ttk.Label(filter_section, text="Exclude").grid(row=0, column=2, sticky='w', padx=(10, 0))
+        filter_labels = {'importer': "Importer:", 'supplier': "Supplier:", 'originCountry': "Origin Country:"}
+        for row, field in enumerate(RowFilter.ENTITY_FIELDS, start=1):
+            ttk.Label(filter_section, text=filter_labels[field]).grid(row=row, column=0, sticky='w', pady=2)
+            ttk.Entry(filter_section, textvariable=self.row_filter_include[field], width=35).grid(
+                row=row, column=1, sticky='ew', padx=(10, 0), pady=2)
+            ttk.Entry(filter_section, textvariable=self.row_filter_exclude[field], width=35).grid(
+                row=row, column=2, sticky='ew', padx=(10, 0), pady=2)
+        hs_row = len(RowFilter.ENTITY_FIELDS) + 1
+        ttk.Label(filter_section, text="HS Code Prefixes:").grid(row=hs_row, column=0, sticky='w', pady=2)
+        ttk.Entry(filter_section, textvariable=self.hs_prefix_filter, width=35).grid(
+            row=hs_row, column=1, sticky='ew', padx=(10, 0), pady=2)
+        ttk.Label(filter_section, text="(names separated by ; and HS prefixes by , e.g. 5503, 5504)",
+                  font=('TkDefaultFont', 8), foreground='gray').grid(row=hs_row + 1, column=0, columnspan=3, sticky='w', pady=2)
+        filter_section.columnconfigure(1, weight=1)
+        filter_section.columnconfigure(2, weight=1)
+        
         # Initialize incoterm mode UI state
         self.on_incoterm_mode_change()
     
@@ -744,6 +911,36 @@ class MainWindow:
         status = "enabled" if enabled else "disabled"
         self.log_message(f"Auto-apply default mappings {status}")
     
+    def on_excel_engine_change(self, event=None):
+        """Handle Excel engine selection change"""
+        engine = self.excel_engine.get()
+        self.excel_reader.excel_engine = engine
+        self.js_excel_reader.excel_engine = engine
+        self.settings_manager.set_excel_engine(engine)
+        self.settings_manager.save_settings()
+        self.log_message(f"Excel reading engine set to '{engine}'")
+    
+    def on_parsed_cache_change(self):
+        """Handle parsed data cache checkbox change"""
+        enabled = self.parsed_cache_enabled.get()
+        self.js_excel_reader.set_cache_folder(DEFAULT_CACHE_FOLDER if enabled else None)
+        self.settings_manager.set_parsed_cache_enabled(enabled)
+        self.settings_manager.save_settings()
+        status = "enabled" if enabled else "disabled"
+        self.log_message(f"Parsed data cache {status}")
+    
+    def on_sheet_workers_change(self):
+        """Handle worker process count change"""
+        workers = self.sheet_workers.get()
+        self.settings_manager.set_sheet_workers(workers)
+        self.settings_manager.save_settings()
+        self.log_message(f"Sheet worker processes set to {workers}")
+    
+    def clear_parsed_cache(self):
+        """Remove all cached parsed data"""
+        removed = ParsedDataCache(self.logger, DEFAULT_CACHE_FOLDER).clear()
+        self.log_message(f"Cleared {removed} cached dataset(s)")
+    
     def apply_default_mappings_auto(self):
         """Auto-apply default mappings when loading a sheet (if enabled)"""
         if not self.auto_apply_mappings.get():
@@ -867,6 +1064,19 @@ class MainWindow:
         self.cancel_btn = ttk.Button(button_frame, text="Cancel", command=self.cancel_processing, state='disabled')
         self.cancel_btn.pack(side='left')
         
+        # Aggregate store option
+        store_frame = ttk.Frame(status_section)
+        store_frame.pack(fill='x')
+        ttk.Checkbutton(
+            store_frame,
+            text="Add the file to the aggregate store and report all stored months",
+            variable=self.use_aggregate_store
+        ).pack(side='left')
+        ttk.Button(store_frame, text="Clear Store", command=self.clear_aggregate_store).pack(side='right')
+        ttk.Label(status_section,
+                 text=f"Stored in {DEFAULT_AGGREGATE_STORE_PATH}. Adding a file again replaces its earlier totals; months shared with other files are added up.",
+                 font=('TkDefaultFont', 8), foreground='gray').pack(anchor='w', pady=(5, 0))
+        
         # Log section
         log_section = ttk.LabelFrame(process_frame, text="Processing Log", padding="10")
         log_section.pack(fill='both', expand=True, padx=10, pady=5)
@@ -979,6 +1189,7 @@ class MainWindow:
             
             # Clear available columns
             self.available_columns = []
+            self.last_read = None
             
             # Clear all column mappings
             for var in self.column_mappings.values():
@@ -1107,6 +1318,26 @@ class MainWindow:
         
         self.info_text.insert(tk.END, info)
     
+    def show_detected_formats(self, detected_formats):
+        """Show the date/number formats the reader settled on"""
+        labels = [('date', "Date"), ('usdQtyUnit', "Unit Price"), ('qty', "Quantity")]
+        lines = []
+        for field, label in labels:
+            detected = detected_formats.get(field)
+            if not detected:
+                continue
+            if detected['confidence'] is None:
+                source = "no text cells sampled" if detected['fallback'] or detected['format'] == 'auto' else "as selected"
+            elif detected['format'] == detected.get('candidate', detected['format']):
+                source = f"{detected['confidence']:.0%} confidence, {detected['sampled']} text cells sampled"
+            else:
+                source = (f"{detected['candidate']} not used: it fits {detected['confidence']:.0%} of "
+                          f"{detected['sampled']} text cells sampled and {detected['conflicts']} need another format")
+            lines.append(f"{label}: {detected['format']} ({source})")
+        
+        if lines:
+            self.detected_formats_text.set("\n".join(lines))
+    
     def show_sheet_info(self):
         """Show sheet information"""
         sheet_name = self.selected_sheet.get()
@@ -1123,6 +1354,13 @@ class MainWindow:
         current_info = self.info_text.get(1.0, tk.END)
         sheet_details = f"\n\nSheet: {sheet_name}\n"
         sheet_details += f"Columns: {len(columns)}\n"
+        row_count = self.js_excel_reader.get_sheet_row_count(self.current_file_path.get(), sheet_name)
+        if row_count is not None:
+            sheet_details += f"Rows: {row_count:,}\n"
+        else:
+            dimensions = self.js_excel_reader.get_sheet_dimensions(self.current_file_path.get(), sheet_name)
+            if dimensions is not None:
+                sheet_details += f"Rows: ~{dimensions['rows']:,} (from sheet dimension)\n"
         
         if columns:
             sheet_details += f"\nColumn Names: {', '.join(columns[:10])}{'...' if len(columns) > 10 else ''}\n"
@@ -1278,6 +1516,12 @@ class MainWindow:
             messagebox.showerror("Error", "Please map at least 3 columns!")
             return
         
+        try:
+            self.get_period_range()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        
         # Start processing in background thread
         self.processing = True
         self.process_btn.config(state='disabled')
@@ -1304,26 +1548,52 @@ class MainWindow:
                 custom_combination_fields = self.get_selected_combination_fields()
                 self.logger.info(f"Custom combination fields: {custom_combination_fields}")
             
-            # Read data using JavaScript-style reader
-            all_raw_data = self.js_excel_reader.read_and_preprocess_data(
-                self.current_file_path.get(),
-                self.selected_sheet.get(),
-                self.date_format.get(),
-                self.number_format.get(),
-                column_mapping,
-                combination_mode
+            period_range = self.get_period_range()
+            row_filter = self.get_row_filter()
+            if row_filter is not None:
+                self.logger.info(f"Row filter: {row_filter.describe()}")
+            
+            # Read data using JavaScript-style reader (combination modes only differ in
+            # what is read by whether the fiber columns are)
+            read_settings = (
+                self.current_file_path.get(), os.path.getmtime(self.current_file_path.get()),
+                self.selected_sheet.get(), self.date_format.get(), self.number_format.get(),
+                sorted(column_mapping.items()), self.js_excel_reader.uses_fiber_fields(column_mapping, combination_mode),
+                period_range, row_filter.to_settings() if row_filter is not None else None
             )
+            if self.last_read is not None and self.last_read[0] == read_settings:
+                all_raw_data = self.last_read[1]
+                self.logger.info(f"Reusing the {len(all_raw_data)} rows read by the previous run")
+            else:
+                self.last_read = None
+                all_raw_data = self.js_excel_reader.read_and_preprocess_data(
+                    self.current_file_path.get(),
+                    self.selected_sheet.get(),
+                    self.date_format.get(),
+                    self.number_format.get(),
+                    column_mapping,
+                    combination_mode,
+                    period_range=period_range,
+                    row_filter=row_filter
+                )
+                if all_raw_data:
+                    self.last_read = (read_settings, all_raw_data)
             
             if not all_raw_data:
+                if all_raw_data is not None and (period_range is not None or row_filter is not None):
+                    raise ValueError("No rows match the selected period and row filters")
                 raise ValueError("No data found or failed to read data")
             
+            detected_formats = self.js_excel_reader.detected_formats
+            self.root.after(0, lambda: self.show_detected_formats(detected_formats))
+            
             # Validate data structure
             valid_rows = 0
             for i, row in enumerate(all_raw_data):
-                if row.get('month') and row.get('hsCode'):
+                if row.get('period') is not None and row.get('hsCode'):
                     valid_rows += 1
                 if i < 3:  # Log first 3 rows for debugging
-                    self.root.after(0, lambda r=row: self.log_message(f"Sample row: month='{r.get('month')}', hsCode='{r.get('hsCode')}', item='{r.get('item')}'"))
+                    self.root.after(0, lambda r=row: self.log_message(f"Sample row: month='{PeriodAxis.period_name(r.get('period'))}', hsCode='{r.get('hsCode')}', item='{r.get('item')}'"))
             
             if valid_rows == 0:
                 raise ValueError("No valid data rows found (missing month or hsCode)")
@@ -1337,6 +1607,10 @@ class MainWindow:
             
             self.root.after(0, lambda: self.progress_var.set(30))
             
+            if self.use_aggregate_store.get():
+                all_raw_data = self.update_aggregate_store(all_raw_data, column_mapping, combination_mode,
+                                                           period_range, row_filter)
+            
             # Process data using JavaScript-style processor
             self.root.after(0, lambda: self.status_var.set("Processing data..."))
             
@@ -1362,7 +1636,9 @@ class MainWindow:
                     output_filename,
                     supplier_as_sheet_mode,
                     combination_mode,
-                    custom_combination_fields
+                    custom_combination_fields,
+                    period_range,
+                    sheet_workers=self.sheet_workers.get()
                 )
                 
                 if not output_path:
@@ -1371,6 +1647,9 @@ class MainWindow:
             except Exception as processing_error:
                 raise ValueError(f"Processing failed: {str(processing_error)}")
             
+            for sheet_label, reason in self.js_processor.failed_sheets:
+                self.root.after(0, lambda l=sheet_label, r=reason: self.log_message(f"WARNING: {l} was not written: {r}"))
+            
             self.root.after(0, lambda: self.progress_var.set(100))
             self.root.after(0, lambda: self.status_var.set("Processing completed successfully!"))
             self.root.after(0, lambda: self.log_message(f"Output saved to: {output_path}"))
@@ -1410,6 +1689,41 @@ class MainWindow:
             self.root.after(0, lambda: self.process_btn.config(state='normal'))
             self.root.after(0, lambda: self.cancel_btn.config(state='disabled'))
     
+    def update_aggregate_store(self, all_raw_data, column_mapping: Dict[str, str], combination_mode: str,
+                               period_range: Optional[Tuple[int, int]], row_filter: Optional[RowFilter]):
+        """Add the rows read to the aggregate store and return the store's rows for processing"""
+        store = AggregateStore(self.logger, DEFAULT_AGGREGATE_STORE_PATH)
+        store.load()
+        source = os.path.basename(self.current_file_path.get())
+        # Every file in the store must be read the same way, filters included
+        store_settings = {
+            'mappedFields': sorted(column_mapping),
+            'fiber': combination_mode == "fiber",
+            'periodRange': list(period_range) if period_range is not None else None,
+            'rowFilter': row_filter.to_settings() if row_filter is not None else None
+        }
+        result = store.append(all_raw_data, source, store_settings)
+        if result is None:
+            raise ValueError("Could not add the rows to the aggregate store (clear the store if the column mapping, period or row filters changed)")
+        if not store.save():
+            raise ValueError("Could not write the aggregate store")
+        
+        periods = store.periods
+        span = f"{PeriodAxis.period_name(periods[0])} - {PeriodAxis.period_name(periods[-1])}" if periods else "-"
+        shared = ", ".join(PeriodAxis.period_name(period) for period in result['sharedPeriods'])
+        self.root.after(0, lambda: self.log_message(
+            f"Aggregate store: {result['newCells']} cells from {source}, {result['cells']} cells covering {span}"
+            + (f" ({shared} also in other files, added up)" if shared else "")))
+        return store.to_batch()
+    
+    def clear_aggregate_store(self):
+        """Remove every month from the aggregate store"""
+        if not messagebox.askyesno("Clear Store", "Remove every month from the aggregate store?"):
+            return
+        store = AggregateStore(self.logger, DEFAULT_AGGREGATE_STORE_PATH)
+        if store.save():
+            self.log_message("Aggregate store cleared")
+    
     def cancel_processing(self):
         """Cancel processing"""
         self.processing = False
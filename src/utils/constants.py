@@ -4,20 +4,62 @@
 MONTH_ORDER = ["Jan", "Feb", "Mar", "Apr", "Mei", "Jun", "Jul", "Agu", "Sep", "Okt", "Nov", "Des"]
 
 # Column mappings
+# Fallback column names per GUI mapping key, tried in order (exact match first,
+# then case-insensitive) when the user has not mapped the field explicitly
 DEFAULT_COLUMN_MAPPING = {
-    'date': ["DATE", "CUSTOMS CLEARANCE DATE"],
-    'hs_code': ["HS CODE"],
-    'item_desc': ["ITEM DESC", "PRODUCT DESCRIPTION(EN)"],
+    'date': ["Arrival Date", "DATE", "CUSTOMS CLEARANCE DATE"],
+    'hs_code': ["HS Code", "HS CODE"],
+    'item_description': ["Product Description", "ITEM DESC", "PRODUCT DESCRIPTION(EN)"],
     'gsm': ["GSM"],
     'item': ["ITEM"],
     'add_on': ["ADD ON"],
-    'importer': ["IMPORTER", "PURCHASER"],
-    'supplier': ["SUPPLIER"],
-    'origin_country': ["ORIGIN COUNTRY"],
-    'unit_price': ["CIF KG Unit In USD", "USD Qty Unit", "UNIT PRICE(USD)"],
-    'quantity': ["Net KG Wt", "qty", "BUSINESS QUANTITY (KG)"]
+    'denier': ["DENIER", "Denier"],
+    'length': ["LENGTH", "Length"],
+    'lustre': ["LUSTRE", "LUSTER", "Lustre", "Luster"],
+    'importer': ["Consignee Name", "IMPORTER", "PURCHASER"],
+    'supplier': ["Shipper Name", "SUPPLIER"],
+    'origin_country': ["Country of Origin", "ORIGIN COUNTRY"],
+    'incoterms': ["INCOTERMS", "Incoterms", "INCOTERM", "Incoterm"],
+    'unit_price': ["Standard Unit Rate $", "Value CIF US$", "CIF KG Unit In USD", "USD Qty Unit", "UNIT PRICE(USD)"],
+    'quantity': ["Standard Qty", "Std. Quantity", "Net KG Wt", "qty", "BUSINESS QUANTITY (KG)"]
 }
 
+# Processed row fields held as numbers; all other fields are dictionary encoded
+NUMERIC_ROW_FIELDS = ('usdQtyUnit', 'qty')
+# 'period' of processed rows without a valid date (dated rows hold year * 12 + month - 1)
+NO_PERIOD = -1
+# Row fields a combination mode can group on; aggregates kept at this grain roll up to any mode
+IDENTITY_FIELDS = ('hsCode', 'item', 'gsm', 'addOn', 'denier', 'length', 'lustre')
+# Numeric field of aggregate store rows: how many positive prices their usdQtyUnit sums
+PRICE_COUNT_FIELD = 'priceCount'
+
+# Row field split into sheets and row field grouped within a sheet, per
+# supplier_as_sheet setting ("ya" puts each supplier on its own sheet)
+ENTITY_ROLES = {
+    "tidak": {'sheet': 'importer', 'group': 'supplier'},
+    "ya": {'sheet': 'supplier', 'group': 'importer'}
+}
+
+# pandas read_excel engines per file extension, fastest first
+EXCEL_ENGINE_PREFERENCE = {
+    '.xlsx': ['calamine', 'openpyxl'],
+    '.xlsm': ['calamine', 'openpyxl'],
+    '.xls': ['calamine', 'xlrd'],
+    '.xlsb': ['calamine', 'pyxlsb'],
+    '.ods': ['calamine', 'odf'],
+}
+
+# Module each engine needs to be importable
+EXCEL_ENGINE_MODULES = {
+    'calamine': 'python_calamine',
+    'openpyxl': 'openpyxl',
+    'xlrd': 'xlrd',
+    'pyxlsb': 'pyxlsb',
+    'odf': 'odf',
+}
+
+DEFAULT_EXCEL_ENGINE = "auto"
+
 # Default values
 import os
 import sys
@@ -32,6 +74,26 @@ def get_app_data_dir():
         app_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     return app_dir
 
+def get_user_cache_dir():
+    """Get the per-user cache directory of the application (outside the application folder)"""
+    if sys.platform == "win32":
+        base_dir = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), "AppData", "Local")
+    elif sys.platform == "darwin":
+        base_dir = os.path.join(os.path.expanduser("~"), "Library", "Caches")
+    else:
+        base_dir = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base_dir, "ExcelSummaryMaker")
+
+def get_user_data_dir():
+    """Get the per-user data directory of the application (outside the application folder)"""
+    if sys.platform == "win32":
+        base_dir = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), "AppData", "Local")
+    elif sys.platform == "darwin":
+        base_dir = os.path.join(os.path.expanduser("~"), "Library", "Application Support")
+    else:
+        base_dir = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base_dir, "ExcelSummaryMaker")
+
 def get_safe_output_dir():
     """Get a safe output directory that works in both dev and built versions"""
     # Always use the processed_excel folder relative to the application directory
@@ -44,4 +106,8 @@ def get_safe_output_dir():
 
 DEFAULT_INPUT_FOLDER = os.path.join(get_app_data_dir(), "original_excel")
 DEFAULT_OUTPUT_FOLDER = get_safe_output_dir()
+# Preprocessed rows of previously read workbooks (created on first use)
+DEFAULT_CACHE_FOLDER = os.path.join(get_user_cache_dir(), "parsed_cache")
+# Monthly totals appended run after run (see AggregateStore)
+DEFAULT_AGGREGATE_STORE_PATH = os.path.join(get_user_data_dir(), "aggregate_store", "store.pkl")
 DEFAULT_SHEET_NAME = "DATA OLAH"
@@ -3,11 +3,17 @@ Utility functions for Excel Summary Maker
 """
 
 import re
+import os
+import importlib.util
+from functools import lru_cache
 from datetime import datetime, timedelta
 from dateutil import parser
+import numpy as np
 import pandas as pd
 from typing import Union, Optional, List, Dict
 
+from .constants import EXCEL_ENGINE_PREFERENCE, EXCEL_ENGINE_MODULES
+
 class DateParser:
     """Handles various date format parsing"""
     
@@ -159,6 +165,68 @@ class NumberParser:
         except:
             return None
     
+    @staticmethod
+    def parse_number_series(values, number_format="auto"):
+        """
+        Parse a whole column like parse_number, using vectorized string operations
+        
+        Args:
+            values (pd.Series): The values to parse
+            number_format: "european" (1.234,56) or "american" (1,234.56) or "auto"
+        
+        Returns:
+            pd.Series: Parsed numbers (NaN where parse_number returns None)
+        """
+        if pd.api.types.is_numeric_dtype(values.dtype):
+            return values.astype(float)
+        
+        cells = values.astype(object)
+        result = pd.Series(np.nan, index=values.index, dtype=float)
+        missing = cells.isna()
+        is_number = cells.map(lambda value: isinstance(value, (int, float))) & ~missing
+        if is_number.any():
+            result[is_number] = cells[is_number].astype(float)
+        
+        is_text = ~missing & ~is_number
+        if not is_text.any():
+            return result
+        
+        # Remove currency symbols and spaces
+        text = cells[is_text].astype(str).str.strip().str.replace(r'[^\d,.\-+]', '', regex=True)
+        usable = (text != "") & ~text.isin(['-', '+'])
+        text = text[usable]
+        
+        has_comma = text.str.contains(',', regex=False)
+        has_dot = text.str.contains('.', regex=False)
+        decimal_comma = (text.str.len() - text.str.rfind(',') - 1) <= 2
+        single_comma = text.str.replace(',', '.', regex=False).where(decimal_comma, text.str.replace(',', '', regex=False))
+        american = text.str.replace(',', '', regex=False)
+        
+        if number_format == "european":
+            normalized = american.where(~has_comma, single_comma)
+            normalized = normalized.where(~(has_comma & has_dot), text.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+            normalized = normalized.where(has_comma, text)
+        elif number_format == "american":
+            normalized = american
+        else:
+            one_separator = (text.str.count(',') + text.str.count('\\.')) == 1
+            normalized = american.where(~one_separator, single_comma.where(has_comma, text))
+        
+        # Plain decimal literals convert in bulk, anything else goes through float() one by one
+        plain = normalized.str.match(r'^[+-]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][+-]?[0-9]+)?$')
+        result[plain[plain].index] = normalized[plain].astype(float)
+        
+        def to_float(str_value):
+            try:
+                return float(str_value)
+            except (ValueError, TypeError):
+                return np.nan
+        
+        other = normalized[~plain]
+        if len(other):
+            result[other.index] = other.map(to_float).astype(float)
+        return result
+    
     @staticmethod
     def _parse_european_format(str_value):
         """Parse European format: 1.234,56"""
@@ -244,6 +312,20 @@ def safe_average(values):
         return None
     return sum(numeric_values) / len(numeric_values)
 
+def safe_string_value(value):
+    """
+    Convert a value to a stripped string, with None/NaN as an empty string
+
+    Args:
+        value: Value to convert
+
+    Returns:
+        str: String value
+    """
+    if value is None or pd.isna(value):
+        return ""
+    return str(value).strip()
+
 def format_currency(value, currency="USD"):
     """
     Format number as currency
@@ -389,3 +471,32 @@ def average_greater_than_zero(arr):
         return 0
     
     return sum(filtered_arr) / len(filtered_arr)
+
+@lru_cache(maxsize=None)
+def is_excel_engine_installed(engine):
+    """Whether the module behind a pandas read_excel engine can be imported"""
+    module_name = EXCEL_ENGINE_MODULES.get(engine)
+    return module_name is not None and importlib.util.find_spec(module_name) is not None
+
+def resolve_excel_engine(file_path, requested="auto"):
+    """
+    Pick the pandas read_excel engine for a workbook
+    
+    A requested engine is used when it is installed and reads the file's format;
+    otherwise (or for "auto") the fastest installed engine for the extension is used.
+    
+    Args:
+        file_path: Path to the workbook
+        requested: Engine name or "auto"
+        
+    Returns:
+        str: Engine name, or None to leave the choice to pandas (unknown extension)
+    """
+    candidates = EXCEL_ENGINE_PREFERENCE.get(os.path.splitext(str(file_path))[1].lower(), [])
+    if requested and requested != "auto" and requested in candidates and is_excel_engine_installed(requested):
+        return requested
+    
+    for engine in candidates:
+        if is_excel_engine_installed(engine):
+            return engine
+    return None
@@ -187,6 +187,33 @@ class SettingsManager:
         self.settings['auto_apply_mappings'] = enabled
         return True
     
+    def get_excel_engine(self) -> str:
+        """Get the Excel reading engine ("auto" picks the fastest installed one)."""
+        return self.settings.get('excel_engine', 'auto')
+    
+    def set_excel_engine(self, engine: str) -> bool:
+        """Set the Excel reading engine."""
+        self.settings['excel_engine'] = engine
+        return True
+    
+    def get_parsed_cache_enabled(self) -> bool:
+        """Get whether preprocessed rows are cached on disk between runs."""
+        return self.settings.get('parsed_cache_enabled', True)
+    
+    def set_parsed_cache_enabled(self, enabled: bool) -> bool:
+        """Set whether preprocessed rows are cached on disk between runs."""
+        self.settings['parsed_cache_enabled'] = enabled
+        return True
+    
+    def get_sheet_workers(self) -> int:
+        """Get the number of processes laying out sheets (1 lays them out in the app process)."""
+        return self.settings.get('sheet_workers', 1)
+    
+    def set_sheet_workers(self, workers: int) -> bool:
+        """Set the number of processes laying out sheets."""
+        self.settings['sheet_workers'] = workers
+        return True
+    
     def export_mappings(self, filepath: str) -> bool:
         """Export mappings to a JSON file."""
         try:
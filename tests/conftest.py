@@ -0,0 +1,16 @@
+import pytest
+
+from support import export_rows, write_workbook
+from src.core import js_output_formatter
+
+
+@pytest.fixture(scope="session")
+def workbook_path(tmp_path_factory):
+    """A sheet of 400 generated rows"""
+    return write_workbook(tmp_path_factory.mktemp("input") / "export.xlsx", export_rows(400))
+
+
+@pytest.fixture(autouse=True)
+def output_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(js_output_formatter, "DEFAULT_OUTPUT_FOLDER", str(tmp_path))
+    return tmp_path
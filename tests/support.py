@@ -0,0 +1,112 @@
+"""
+Test support
+A generated workbook with the mixed cell types of real exports, and helpers that
+read it and compare written summaries
+"""
+
+import datetime
+import logging
+import os
+import random
+import sys
+
+import openpyxl
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.js_excel_reader import JSStyleExcelReader
+from src.core.js_processor import JSStyleProcessor
+
+SHEET_NAME = "DATA OLAH"
+HEADERS = ["Arrival Date", "HS Code", "GSM", "ITEM", "ADD ON", "DENIER", "LENGTH", "LUSTRE",
+           "Consignee Name", "Shipper Name", "Country of Origin", "Std. Unit Rate $", "Std. Quantity", "Incoterms"]
+FIBER_MAPPING = {
+    'date': "Arrival Date", 'hs_code': "HS Code", 'gsm': "GSM", 'item': "ITEM", 'add_on': "ADD ON",
+    'denier': "DENIER", 'length': "LENGTH", 'lustre': "LUSTRE", 'importer': "Consignee Name",
+    'supplier': "Shipper Name", 'origin_country': "Country of Origin", 'unit_price': "Std. Unit Rate $",
+    'quantity': "Std. Quantity", 'incoterms': "Incoterms"
+}
+# (combination_mode, custom fields, supplier_as_sheet, incoterm_mode)
+COMBINATIONS = [
+    ("default", None, "tidak", "manual"),
+    ("fiber", None, "ya", "from_column"),
+    ("custom", ['hsCode', 'item', 'denier'], "tidak", "from_column"),
+]
+
+logger = logging.getLogger("tests")
+
+
+def export_rows(count, seed=3):
+    """Rows over two years, with the mixed cell types of real exports"""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        year, month, day = rng.choice([2023, 2024]), rng.randint(1, 12), rng.randint(1, 28)
+        date = rng.choice([datetime.datetime(year, month, day), f"{day:02d}/{month:02d}/{year}", None])
+        rows.append([
+            date,
+            rng.choice([54023300, "5402-33", "540233", None]),
+            rng.choice([80, 100.0, "120", None]),
+            rng.choice(["X", "X-A", "Y", None]),
+            rng.choice(["A-B", "B", None]),
+            rng.choice([1.5, "2", None]),
+            rng.choice([38, "51", None]),
+            rng.choice(["SD", "BR", None]),
+            rng.choice(["PT ALPHA", "PT BETA/INDO", "N/A", None, "CV DELTA*"]),
+            rng.choice(["SUP A", "SUP-B", None, "Sup D"]),
+            rng.choice(["CHINA", "INDIA", None]),
+            rng.choice([round(rng.uniform(0.5, 9), 3), 0, "2.5", None]),
+            rng.choice([round(rng.uniform(10, 5000), 2), 1000, None]),
+            rng.choice(["FOB Jakarta", "cif", "CFR", None]),
+        ])
+    return rows
+
+
+def write_workbook(path, rows, headers=HEADERS, sheet_name=SHEET_NAME):
+    """Save rows under a header row as a one-sheet workbook"""
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = sheet_name
+    sheet.append(headers)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+    return str(path)
+
+
+def read_rows(path, **kwargs):
+    """The generated sheet read in fiber mode"""
+    return JSStyleExcelReader(logger).read_and_preprocess_data(path, SHEET_NAME, "DD/MM/YYYY", "auto",
+                                                               dict(FIBER_MAPPING), "fiber", **kwargs)
+
+
+def workbook_values(path):
+    """Cell values of every sheet of a written workbook"""
+    # Read-only mode skips binding the merged ranges, which dominates a full load
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    try:
+        return {(sheet.title, row_index, column_index): value
+                for sheet in workbook
+                for row_index, row in enumerate(sheet.iter_rows(values_only=True), 1)
+                for column_index, value in enumerate(row, 1) if value is not None}
+    finally:
+        workbook.close()
+
+
+def process(data, name, combination, processor=None, **kwargs):
+    """Cell values of the summary of some rows in a combination (see COMBINATIONS)"""
+    combination_mode, custom_fields, supplier_as_sheet, incoterm_mode = combination
+    output_path = (processor or JSStyleProcessor(logger)).process_data_like_javascript(
+        data, "2024", "FOB", incoterm_mode, name, supplier_as_sheet, combination_mode, custom_fields, **kwargs)
+    return workbook_values(output_path)
+
+
+def assert_same_cells(actual, expected, rel=1e-9):
+    """Two written workbooks hold the same cells, floats up to their last bits"""
+    assert actual.keys() == expected.keys()
+    for cell, value in expected.items():
+        if isinstance(value, float):
+            assert actual[cell] == pytest.approx(value, rel=rel), cell
+        else:
+            assert actual[cell] == value, cell
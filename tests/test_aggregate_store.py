@@ -0,0 +1,72 @@
+"""
+Aggregate store
+Stored cells are read back from disk and summarized like the rows they hold
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+from support import COMBINATIONS, assert_same_cells, logger, process, read_rows
+from src.core.aggregate_store import AggregateStore
+from src.core.record_batch import RecordBatch
+from src.utils import constants
+
+
+def periods_of(data):
+    return np.asarray(data.dictionary('period'))[data.codes('period')]
+
+
+def test_aggregate_store_round_trip(workbook_path, tmp_path):
+    data = read_rows(workbook_path)
+    periods = periods_of(data)
+    history, new_months = data.filter(periods < 2024 * 12), data.filter(periods >= 2024 * 12)
+    store_path = str(tmp_path / "store.pkl")
+
+    store = AggregateStore(logger, store_path)
+    assert store.append(history, "2023.xlsx", {'fiber': True}) is not None
+    assert store.save()
+    store = AggregateStore(logger, store_path)
+    assert store.load()
+    assert store.append(new_months, "2024.xlsx", {'fiber': True}) is not None
+    # Appending a file again replaces its cells, undated rows included
+    assert store.append(new_months, "2024.xlsx", {'fiber': True}) is not None
+    assert store.append(new_months, "other.xlsx", {'fiber': False}) is None
+    assert store.save()
+
+    loaded = AggregateStore(logger, store_path)
+    assert loaded.load()
+    assert loaded.to_batch().to_rows() == store.to_batch().to_rows()
+    assert [entry['source'] for entry in loaded.sources] == ["2023.xlsx", "2024.xlsx"]
+
+    combination = COMBINATIONS[1]
+    from_store = process(loaded.to_batch(), "store.xlsx", combination)
+    direct = process(RecordBatch.concat([history, new_months]), "direct.xlsx", combination)
+    assert_same_cells(from_store, direct)
+
+
+def test_sources_sharing_a_month_are_added_up(workbook_path):
+    data = read_rows(workbook_path)
+    periods = periods_of(data)
+    march = 2024 * 12 + 2
+    # Both files hold March 2024
+    first, second = data.filter(periods <= march), data.filter(periods >= march)
+    store = AggregateStore(logger)
+    assert store.append(first, "first.xlsx")['sharedPeriods'] == []
+    assert store.append(second, "second.xlsx")['sharedPeriods'] == [march]
+    # Adding a file again only replaces its own cells, which then come last
+    assert store.append(first, "first.xlsx")['sharedPeriods'] == [march]
+
+    for combination in COMBINATIONS:
+        from_store = process(store.to_batch(), "store.xlsx", combination)
+        direct = process(RecordBatch.concat([second, first]), "direct.xlsx", combination)
+        assert_same_cells(from_store, direct)
+
+
+@pytest.mark.skipif(sys.platform in ("win32", "darwin"), reason="XDG layout")
+def test_store_lives_in_the_user_data_dir(monkeypatch, tmp_path):
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path))
+    assert constants.get_user_data_dir() == os.path.join(str(tmp_path), "ExcelSummaryMaker")
+    assert not constants.DEFAULT_AGGREGATE_STORE_PATH.startswith(constants.get_app_data_dir() + os.sep)
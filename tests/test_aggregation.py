@@ -0,0 +1,120 @@
+"""
+Aggregation tests
+The vectorized engine and the accumulators behind it are compared with the
+row-by-row reference built on average_greater_than_zero
+"""
+
+import datetime
+import functools
+import logging
+import operator
+import random
+
+import numpy as np
+import pytest
+
+from support import COMBINATIONS, FIBER_MAPPING, logger, process, read_rows, write_workbook
+from src.core import price_accumulator
+from src.core.data_aggregator import DataAggregator
+from src.core.fine_aggregate import FineAggregate
+from src.core.js_excel_reader import JSStyleExcelReader
+from src.core.js_processor import JSStyleProcessor
+from src.core.price_accumulator import PriceAccumulator
+from src.utils.helpers import average_greater_than_zero
+
+
+def price_rows(count, group_count, seed=5):
+    """Groups, prices and quantities of rows whose prices span many magnitudes"""
+    rng = random.Random(seed)
+    groups = np.array([rng.randrange(group_count) for _ in range(count)], dtype=np.intp)
+    prices = np.array([rng.choice([0.0, -1.0, rng.uniform(0, 1) * 10 ** rng.randint(-3, 9)]) for _ in range(count)])
+    quantities = np.array([rng.uniform(0, 1000) for _ in range(count)])
+    return groups, prices, quantities
+
+
+@pytest.mark.parametrize("combination", COMBINATIONS)
+def test_vectorized_aggregation_matches_loop(workbook_path, combination):
+    data = read_rows(workbook_path)
+    vectorized = process(data, "vectorized.xlsx", combination, aggregation_engine="vectorized")
+    loop = process(data, "loop.xlsx", combination, aggregation_engine="loop")
+    assert vectorized == loop
+
+
+def test_accumulators_match_average_greater_than_zero():
+    groups, prices, quantities = price_rows(5000, 40)
+    totals = PriceAccumulator.grouped(groups, 41, prices, quantities)
+    for group, group_totals in enumerate(totals):
+        group_prices = prices[groups == group].tolist()
+        one_by_one = PriceAccumulator()
+        for price, qty in zip(group_prices, quantities[groups == group].tolist()):
+            one_by_one.add(price, qty)
+        assert group_totals == one_by_one
+        assert group_totals.average == average_greater_than_zero(group_prices)
+        # The reference totals quantities with +=, not sum()
+        assert group_totals.qty_sum == functools.reduce(operator.add, quantities[groups == group].tolist(), 0)
+
+
+@pytest.mark.parametrize("compensated", [False, True])
+def test_grouped_accumulators_match_adding_rows(monkeypatch, compensated):
+    # Both summations are checked on any Python, whichever one sum() uses
+    monkeypatch.setattr(price_accumulator, "COMPENSATED_SUM", compensated)
+    groups, prices, quantities = price_rows(3000, 300, seed=8)
+    groups[:700] = 7
+    expected = [PriceAccumulator() for _ in range(300)]
+    for group, price, qty in zip(groups.tolist(), prices.tolist(), quantities.tolist()):
+        expected[group].add(price, qty)
+    assert PriceAccumulator.grouped(groups, 300, prices, quantities) == expected
+    assert any(totals.price_comp for totals in expected) == compensated
+
+
+def test_merged_accumulators_stay_close_to_one_pass():
+    _, prices, quantities = price_rows(2000, 1, seed=9)
+    whole, parts = PriceAccumulator(), [PriceAccumulator() for _ in range(7)]
+    for index, (price, qty) in enumerate(zip(prices.tolist(), quantities.tolist())):
+        whole.add(price, qty)
+        parts[index % 7].add(price, qty)
+    merged = PriceAccumulator()
+    for part in parts:
+        merged.merge(part)
+    assert merged.price_count == whole.price_count
+    assert merged.average == pytest.approx(whole.average, rel=1e-12)
+    assert merged.qty_sum == pytest.approx(whole.qty_sum, rel=1e-12)
+    assert PriceAccumulator.from_list(merged.to_list()) == merged
+
+
+def test_groups_whose_joined_values_collide_stay_apart(tmp_path):
+    # "X" + "A-B" and "X-A" + "B" both join to "X-A-B"
+    rows = [[datetime.datetime(2024, 3, day), 54023300, 80, item, add_on, 1.5, 38, "SD", "PT ALPHA", "SUP A",
+             "CHINA", price, 100, "FOB"]
+            for day, item, add_on, price in [(1, "X", "A-B", 2.0), (2, "X-A", "B", 4.0), (3, "X", "A-B", 3.0)]]
+    data = read_rows(write_workbook(tmp_path / "collide.xlsx", rows))
+    for engine, rows_in in [("vectorized", data), ("loop", data.to_rows())]:
+        result = DataAggregator(logger).perform_aggregation(rows_in, "default", aggregation_engine=engine)
+        assert [(row['item'], row['addOn'], row['avgPrice']) for row in result['summaryLvl1']] == \
+            [("X", "A-B", 2.5), ("X-A", "B", 4.0)], engine
+        assert [(row['item'], row['addOn'], row['totalOfSummaryQty']) for row in result['summaryLvl2']] == \
+            [("X", "A-B", 200), ("X-A", "B", 100)], engine
+
+
+def test_group_rows_without_packed_codes_matches_packed():
+    rng = np.random.default_rng(4)
+    key_columns = [rng.integers(0, 3, 500), rng.integers(0, 5, 500), rng.integers(0, 2, 500)]
+    packed = FineAggregate.group_rows(key_columns, [3, 5, 2])
+    # Sizes whose product overflows the packing renumber the codes between columns
+    unpacked = FineAggregate.group_rows(key_columns, [2 ** 40, 2 ** 40, 2])
+    assert packed[0].tolist() == unpacked[0].tolist()
+    assert packed[1].tolist() == unpacked[1].tolist()
+
+
+def test_mode_switch_rolls_up_the_rows_already_read(workbook_path, caplog):
+    # With the fiber columns mapped, default and fiber runs can share one read
+    assert JSStyleExcelReader(logger).uses_fiber_fields(FIBER_MAPPING, "default")
+    data = read_rows(workbook_path)
+    processor = JSStyleProcessor(logger)
+    process(data, "default.xlsx", COMBINATIONS[0], processor)
+    # Only the mode changes; sheets and groups stay as they were
+    fiber = ("fiber",) + COMBINATIONS[0][1:]
+    with caplog.at_level(logging.INFO, logger=logger.name):
+        switched = process(data, "fiber.xlsx", fiber, processor)
+    assert "Rolling up the aggregates of the previous run" in caplog.text
+    assert switched == process(data, "fresh.xlsx", fiber)
@@ -0,0 +1,13 @@
+"""
+Columnar preprocessing
+The columnar engine of read_and_preprocess_data against the row-by-row reference
+"""
+
+from support import read_rows
+
+
+def test_columnar_engine_matches_rows_engine(workbook_path):
+    columnar = read_rows(workbook_path, processing_engine="columnar")
+    rows = read_rows(workbook_path, processing_engine="rows")
+    assert len(columnar) == 400
+    assert columnar.to_rows() == rows.to_rows()
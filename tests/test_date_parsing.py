@@ -0,0 +1,54 @@
+"""
+Date parsing
+The vectorized date kernels of parse_date_column against the scalar parsers
+"""
+
+import datetime
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from support import logger
+from src.core.js_excel_reader import JSStyleExcelReader
+
+DATE_STRINGS = [
+    "05/03/2024", "25/03/2024", "03/25/2024", "5-3-24", "05.03.99", "31/02/2024", "29/02/2024", "29/02/2023",
+    "2024-03-15", "2024-13-01", "12-Apr-2025", "08-may-2025", "1/Agustus/2023", "01-Foo-2024", "13/13/2024",
+    "0/1/2024", "3/1/2024 10:30", " 05/03/2024", "", "n/a", "٠٥/٠٣/٢٠٢٤"
+]
+SERIALS = [45000, 45000.5, 45000.9999999, 1, 0, -3, 2958465, 2958466, 60, 61]
+
+
+def scalar_periods(reader, values, date_format):
+    """(year, month) of each cell by _parse_date_value, (0, 0) where it finds no date"""
+    parsed = [reader._parse_date_value(value, date_format) for value in values]
+    return [(date.year, date.month) if date else (0, 0) for date in parsed]
+
+
+def column_periods(reader, values, date_format):
+    years, months = reader.parse_date_column(values, date_format)
+    return list(zip(years.tolist(), months.tolist()))
+
+
+@pytest.mark.parametrize("date_format", ["DD/MM/YYYY", "MM/DD/YYYY", "DD-MONTH-YYYY", "auto"])
+def test_mixed_column_matches_scalar_parser(date_format):
+    reader = JSStyleExcelReader(logger)
+    rng = random.Random(date_format)
+    cells = DATE_STRINGS + SERIALS + [datetime.datetime(2024, 2, 29, 23, 59), None, float('nan')]
+    cells += [f"{rng.randint(0, 32)}/{rng.randint(0, 13)}/{rng.choice([24, 1999, 2024])}" for _ in range(200)]
+    values = pd.Series(cells, dtype=object)
+    assert column_periods(reader, values, date_format) == scalar_periods(reader, cells, date_format)
+
+
+def test_serial_column_matches_scalar_parser():
+    reader = JSStyleExcelReader(logger)
+    values = pd.Series(SERIALS + [np.nan], dtype=np.float64)
+    assert column_periods(reader, values, "auto") == scalar_periods(reader, values.tolist(), "auto")
+
+
+def test_datetime_column_keeps_year_and_month():
+    reader = JSStyleExcelReader(logger)
+    values = pd.Series([datetime.datetime(2023, 12, 31), pd.NaT, datetime.datetime(2024, 1, 1)])
+    assert column_periods(reader, values, "DD/MM/YYYY") == [(2023, 12), (0, 0), (2024, 1)]
@@ -0,0 +1,89 @@
+"""
+Format inference
+'auto' date and number formats inferred from a sample, against the per-cell parsers
+"""
+
+import random
+
+import pandas as pd
+
+from support import logger, write_workbook
+from src.core.js_excel_reader import JSStyleExcelReader
+from src.core.period_axis import PeriodAxis
+from src.utils.constants import NO_PERIOD
+
+HEADERS = ["DATE", "HS CODE", "IMPORTER", "UNIT PRICE(USD)", "qty"]
+
+
+def date_cells(rng, count, day_first_share, month_first_share):
+    """Dates only DD/MM/YYYY parses, only MM/DD/YYYY parses, or both (day and month <= 12)"""
+    cells = []
+    for _ in range(count):
+        kind = rng.random()
+        month, year = rng.randint(1, 12), rng.choice([2023, 2024])
+        if kind < day_first_share:
+            cells.append(f"{rng.randint(13, 28):02d}/{month:02d}/{year}")
+        elif kind < day_first_share + month_first_share:
+            cells.append(f"{month:02d}/{rng.randint(13, 28):02d}/{year}")
+        else:
+            cells.append(f"{rng.randint(1, 12):02d}/{month:02d}/{year}")
+    return cells
+
+
+def read_periods(path):
+    reader = JSStyleExcelReader(logger)
+    batch = reader.read_and_preprocess_data(path, "Sheet", "auto", "auto")
+    return reader, [row['period'] for row in batch]
+
+
+def scalar_periods(reader, cells):
+    dates = [reader.parse_date(cell, 'auto') for cell in cells]
+    return [PeriodAxis.encode(date.year, date.month) if date else NO_PERIOD for date in dates]
+
+
+def test_mixed_day_and_month_first_column_is_parsed_per_cell(tmp_path):
+    rng = random.Random(6)
+    # MM/DD/YYYY parses the most cells, but many only parse as DD/MM/YYYY
+    cells = date_cells(rng, 600, 0.3, 0.4)
+    path = write_workbook(tmp_path / "mixed.xlsx", [[cell, "5402", "PT A", 1.5, 10] for cell in cells],
+                          HEADERS, "Sheet")
+
+    reader, periods = read_periods(path)
+    detected = reader.detected_formats['date']
+    assert detected['candidate'] == 'MM/DD/YYYY'
+    assert detected['conflicts'] > 0
+    assert detected['format'] == 'auto'
+    assert periods == scalar_periods(reader, cells)
+
+
+def test_format_explaining_every_sampled_cell_is_used(tmp_path):
+    rng = random.Random(7)
+    cells = date_cells(rng, 600, 0, 0.5)
+    path = write_workbook(tmp_path / "us.xlsx", [[cell, "5402", "PT A", 1.5, 10] for cell in cells],
+                          HEADERS, "Sheet")
+
+    reader, periods = read_periods(path)
+    assert reader.detected_formats['date']['format'] == 'MM/DD/YYYY'
+    # Cells both formats parse are read month first
+    expected = [reader.parse_date(cell, 'MM/DD/YYYY') for cell in cells]
+    assert periods == [PeriodAxis.encode(date.year, date.month) for date in expected]
+
+
+def test_low_confidence_keeps_per_cell_parsing():
+    reader = JSStyleExcelReader(logger)
+    cells = ["25/03/2024"] * 90 + ["not a date"] * 10
+    detected = reader.infer_date_format(pd.Series(cells, dtype=object))
+    assert detected['candidate'] == 'DD/MM/YYYY'
+    assert detected['confidence'] == 0.9
+    assert detected['conflicts'] == 0
+    assert detected['format'] is None
+
+
+def test_number_format_needs_every_sampled_cell():
+    reader = JSStyleExcelReader(logger)
+    american = ["1,234.56", "12.5", "3,000"] * 40
+    assert reader.infer_number_format(pd.Series(american, dtype=object))['format'] == 'AMERICAN'
+    mixed = american + ["1.234,56"]
+    detected = reader.infer_number_format(pd.Series(mixed, dtype=object))
+    assert detected['candidate'] == 'AMERICAN'
+    assert detected['format'] is None
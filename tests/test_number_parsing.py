@@ -0,0 +1,41 @@
+"""
+Number parsing
+The vectorized parse_number_column against the scalar parse_number
+"""
+
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from support import logger
+from src.core.js_excel_reader import JSStyleExcelReader
+
+NUMBER_CELLS = [
+    "1,234.56", "1.234,56", "1,234", "1.234", "12,5", "12.5", "-1.234.567,8", "-1,234,567.8", " 42 ", "",
+    "   ", "abc", "1e3", ".5", "5.", "1_000", "inf", "١٢٣", "1,23,456.7", "12.345.678", "0,0", "-0",
+    3, 2.5, 0, -0.0, float('nan'), None, True
+]
+
+
+def assert_same_values(column, scalar):
+    assert [type(value) for value in column] == [type(value) for value in scalar]
+    assert column == scalar
+
+
+@pytest.mark.parametrize("number_format, fallback_format",
+                         [("EUROPEAN", None), ("AMERICAN", None), ("EUROPEAN", "AMERICAN"), ("AMERICAN", "EUROPEAN")])
+def test_mixed_column_matches_scalar_parser(number_format, fallback_format):
+    reader = JSStyleExcelReader(logger)
+    rng = random.Random(number_format)
+    cells = NUMBER_CELLS + [f"{rng.randint(0, 999)}{rng.choice(',.')}{rng.randint(0, 999):03d}" for _ in range(200)]
+    column = reader.parse_number_column(pd.Series(cells, dtype=object), number_format, fallback_format)
+    assert_same_values(column, [reader.parse_number(value, number_format, fallback_format) for value in cells])
+
+
+def test_numeric_column_passes_values_through():
+    reader = JSStyleExcelReader(logger)
+    values = pd.Series([1.5, np.nan, 0.0, 3.0])
+    assert_same_values(reader.parse_number_column(values, "EUROPEAN"),
+                       [reader.parse_number(value, "EUROPEAN") for value in values.tolist()])
@@ -0,0 +1,60 @@
+"""
+Parsed data cache
+Cached rows read back in each storage format, and reader cache hits against a fresh read
+"""
+
+import importlib.util
+import logging
+
+import pytest
+
+from support import FIBER_MAPPING, SHEET_NAME, logger, read_rows
+from src.core.js_excel_reader import JSStyleExcelReader
+from src.core.parsed_cache import ParsedDataCache
+
+
+@pytest.mark.parametrize("storage_format", ["pickle", "parquet"])
+def test_parsed_cache_round_trip(workbook_path, tmp_path, storage_format):
+    if storage_format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        pytest.skip("pyarrow is not installed")
+    data = read_rows(workbook_path)
+    cache = ParsedDataCache(logger, str(tmp_path / "cache"))
+    cache.storage_format = storage_format
+    key = cache.make_key(ParsedDataCache.hash_file(workbook_path), {'combination_mode': "fiber"})
+
+    assert cache.load(key) is None
+    assert cache.store(key, data, workbook_path, {'rows': len(data)})
+    loaded, info = cache.load(key)
+    assert info == {'rows': len(data)}
+    assert loaded.fields == data.fields
+    assert loaded.to_rows() == data.to_rows()
+
+
+def test_reader_cache_hit_matches_read(workbook_path, tmp_path):
+    reader = JSStyleExcelReader(logger)
+    reader.set_cache_folder(str(tmp_path / "cache"))
+    first = read_rows(workbook_path)
+    for _ in range(2):
+        cached = reader.read_and_preprocess_data(workbook_path, SHEET_NAME, "DD/MM/YYYY", "auto",
+                                                 dict(FIBER_MAPPING), "fiber")
+        assert cached.to_rows() == first.to_rows()
+
+
+def test_modes_reading_the_same_rows_share_cache_entries(workbook_path, tmp_path, caplog):
+    reader = JSStyleExcelReader(logger)
+    reader.set_cache_folder(str(tmp_path / "cache"))
+    default = reader.read_and_preprocess_data(workbook_path, SHEET_NAME, "DD/MM/YYYY", "auto",
+                                              dict(FIBER_MAPPING), "default")
+    # With the fiber columns mapped, default and fiber modes read the same rows
+    with caplog.at_level(logging.INFO, logger=logger.name):
+        fiber = reader.read_and_preprocess_data(workbook_path, SHEET_NAME, "DD/MM/YYYY", "auto",
+                                                dict(FIBER_MAPPING), "fiber")
+    assert "from the cache" in caplog.text
+    assert fiber.to_rows() == default.to_rows()
+
+    caplog.clear()
+    without_fiber = {field: column for field, column in FIBER_MAPPING.items()
+                     if field not in ('denier', 'length', 'lustre')}
+    with caplog.at_level(logging.INFO, logger=logger.name):
+        reader.read_and_preprocess_data(workbook_path, SHEET_NAME, "DD/MM/YYYY", "auto", without_fiber, "default")
+    assert "from the cache" not in caplog.text
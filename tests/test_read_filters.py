@@ -0,0 +1,76 @@
+"""
+Read filters
+Period ranges and row filters applied while reading, against filtering a full read
+"""
+
+import pytest
+
+from support import FIBER_MAPPING, SHEET_NAME, logger, read_rows
+from src.core.js_excel_reader import JSStyleExcelReader
+from src.core.period_axis import PeriodAxis
+from src.core.record_batch import RecordBatch
+from src.core.row_filter import RowFilter
+
+
+def read_with(path, engine, **kwargs):
+    """Rows of the generated sheet read by an engine ("stream" for the batch reader)"""
+    if engine == "stream":
+        batches = JSStyleExcelReader(logger).iter_preprocessed_batches(
+            path, SHEET_NAME, "DD/MM/YYYY", "auto", dict(FIBER_MAPPING), "fiber", batch_size=64, **kwargs)
+        return RecordBatch.concat(list(batches)).to_rows()
+    return read_rows(path, processing_engine=engine, **kwargs).to_rows()
+
+
+@pytest.mark.parametrize("engine", ["columnar", "rows", "stream"])
+@pytest.mark.parametrize("period_range", [PeriodAxis.year_range(2024),
+                                          (PeriodAxis.parse_month("2023-11"), PeriodAxis.parse_month("2024-02"))])
+def test_period_range_keeps_the_dated_rows_in_range(workbook_path, engine, period_range):
+    expected = [row for row in read_with(workbook_path, engine) if PeriodAxis.in_range(row['period'], period_range)]
+    assert expected
+    assert read_with(workbook_path, engine, period_range=period_range) == expected
+
+
+def test_period_axis_covers_the_quarters_of_the_range():
+    axis = PeriodAxis([2023, 2024], (PeriodAxis.parse_month("2024-02"), PeriodAxis.parse_month("2024-04")))
+    assert axis.labels == ["Jan", "Feb", "Mar", "Apr", "Mei", "Jun"]
+    assert axis.title == "2024"
+    assert PeriodAxis.parse_month("2024-13") is None
+
+
+ROW_FILTERS = [
+    RowFilter(include={'importer': ["pt  alpha", "CV DELTA*"]}),
+    RowFilter(exclude={'supplier': ["sup a"], 'originCountry': ["-"]}),
+    RowFilter(hs_prefixes=["5402.33"]),
+    RowFilter(include={'originCountry': ["china"]}, exclude={'importer': ["N/A"]}, hs_prefixes=["54023", "9999"]),
+]
+
+
+def kept_by(row_filter, row):
+    return all(row_filter.matches(field, row[field]) for field in row_filter.fields)
+
+
+@pytest.mark.parametrize("engine", ["columnar", "rows", "stream"])
+@pytest.mark.parametrize("row_filter", ROW_FILTERS, ids=lambda row_filter: row_filter.describe())
+def test_row_filter_keeps_the_matching_rows(workbook_path, engine, row_filter):
+    expected = [row for row in read_with(workbook_path, engine) if kept_by(row_filter, row)]
+    assert expected
+    assert read_with(workbook_path, engine, row_filter=row_filter) == expected
+
+
+def test_row_and_period_filters_combine(workbook_path):
+    row_filter, period_range = ROW_FILTERS[3], PeriodAxis.year_range(2023)
+    expected = [row for row in read_with(workbook_path, "columnar")
+                if kept_by(row_filter, row) and PeriodAxis.in_range(row['period'], period_range)]
+    assert read_with(workbook_path, "columnar", row_filter=row_filter, period_range=period_range) == expected
+
+
+def test_row_filter_normalizes_names_and_hs_codes():
+    row_filter = RowFilter(include={'importer': ["  PT   Alpha "]}, hs_prefixes=["5503.20", "", "-"])
+    assert row_filter.matches('importer', "pt alpha")
+    assert not row_filter.matches('importer', "pt alpha indo")
+    assert row_filter.matches('hsCode', "550320.10")
+    assert not row_filter.matches('hsCode', "5503")
+    assert row_filter.hs_prefixes == ["550320"]
+    assert RowFilter(include={'importer': ["", " "]}).is_empty
+    with pytest.raises(ValueError):
+        RowFilter(include={'item': ["X"]})
@@ -0,0 +1,26 @@
+"""
+Sheet worker processes
+Sheets aggregated and laid out in a pool against the single-process run
+"""
+
+import logging
+import os
+
+import pytest
+
+from support import COMBINATIONS, logger, process, read_rows
+from src.core.js_processor import JSStyleProcessor
+
+
+@pytest.mark.parametrize("combination", COMBINATIONS)
+def test_worker_pool_matches_single_process(workbook_path, combination, monkeypatch, caplog):
+    # The pool is capped at one worker per CPU
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+    data = read_rows(workbook_path)
+    single = process(data, "single.xlsx", combination, sheet_workers=1)
+    processor = JSStyleProcessor(logger)
+    with caplog.at_level(logging.INFO, logger=logger.name):
+        pooled = process(data, "pooled.xlsx", combination, processor, sheet_workers=2)
+    assert "in 2 worker processes" in caplog.text
+    assert processor.failed_sheets == []
+    assert pooled == single
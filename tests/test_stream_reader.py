@@ -0,0 +1,26 @@
+"""
+Streaming reader
+iter_preprocessed_batches and the processor's merging of a stream, against a whole read
+"""
+
+import pytest
+
+from support import COMBINATIONS, FIBER_MAPPING, SHEET_NAME, assert_same_cells, logger, process, read_rows
+from src.core.js_excel_reader import JSStyleExcelReader
+from src.core.record_batch import RecordBatch
+
+
+def stream(path):
+    return JSStyleExcelReader(logger).iter_preprocessed_batches(path, SHEET_NAME, "DD/MM/YYYY", "auto",
+                                                                dict(FIBER_MAPPING), "fiber", batch_size=64)
+
+
+def test_stream_matches_read(workbook_path):
+    assert RecordBatch.concat(list(stream(workbook_path))).to_rows() == read_rows(workbook_path).to_rows()
+
+
+@pytest.mark.parametrize("combination", COMBINATIONS)
+def test_processed_stream_matches_read(workbook_path, combination):
+    streamed = process(stream(workbook_path), "stream.xlsx", combination)
+    direct = process(read_rows(workbook_path), "direct.xlsx", combination)
+    assert_same_cells(streamed, direct)
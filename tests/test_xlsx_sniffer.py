@@ -0,0 +1,64 @@
+"""
+XLSX sniffer
+Sheet names, header rows and dimensions sniffed from the zip parts, against a pandas read
+"""
+
+import datetime
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from support import logger
+from src.core.js_excel_reader import JSStyleExcelReader
+from src.core.xlsx_sniffer import XlsxSniffer
+
+HEADERS = {
+    "Text": ["Arrival Date", "HS Code", "Consignee Name", "Std. Quantity"],
+    "Typed": ["Name", 2024, 1.5, True, "Name", None, "Name.1", " padded ", "Name"],
+    "Dated": ["Date", datetime.datetime(2024, 3, 1), "Qty"],
+}
+
+
+@pytest.fixture(scope="module")
+def sniffed_path(tmp_path_factory):
+    workbook = openpyxl.Workbook()
+    workbook.remove(workbook.active)
+    for title, header in HEADERS.items():
+        sheet = workbook.create_sheet(title)
+        sheet.append(header)
+        for row in range(25):
+            sheet.append([f"v{row}", row, row * 1.5] + [None] * (len(header) - 3))
+    blank_first_row = workbook.create_sheet("Blank First Row")
+    blank_first_row.append([])
+    blank_first_row.append(["A", "B"])
+    blank_first_row.append([1, 2])
+    path = tmp_path_factory.mktemp("sniff") / "sniff.xlsx"
+    workbook.save(path)
+    return str(path)
+
+
+def test_sheet_names_match_pandas(sniffed_path):
+    assert XlsxSniffer(logger).get_sheet_names(sniffed_path) == pd.ExcelFile(sniffed_path, engine="openpyxl").sheet_names
+
+
+@pytest.mark.parametrize("sheet_name", list(HEADERS) + ["Blank First Row"])
+def test_header_matches_pandas(sniffed_path, sheet_name):
+    expected = pd.read_excel(sniffed_path, sheet_name, nrows=0, engine="openpyxl").columns.tolist()
+    header = JSStyleExcelReader(logger).get_sheet_column_names(sniffed_path, sheet_name)
+    assert [(type(name), name) for name in header] == [(type(name), name) for name in expected]
+
+
+def test_only_headers_needing_the_workbook_are_left_to_pandas(sniffed_path):
+    sniffer = XlsxSniffer(logger)
+    assert sniffer.sniff_sheet(sniffed_path, "Text")['header'] == HEADERS["Text"]
+    assert sniffer.sniff_sheet(sniffed_path, "Typed")['header'] == HEADERS["Typed"]
+    assert sniffer.sniff_sheet(sniffed_path, "Dated")['header'] is None
+    assert sniffer.sniff_sheet(sniffed_path, "Blank First Row")['header'] is None
+
+
+@pytest.mark.parametrize("sheet_name", list(HEADERS))
+def test_dimension_matches_pandas(sniffed_path, sheet_name):
+    dimensions = JSStyleExcelReader(logger).get_sheet_dimensions(sniffed_path, sheet_name)
+    frame = pd.read_excel(sniffed_path, sheet_name, engine="openpyxl")
+    assert dimensions == {'rows': len(frame), 'columns': len(frame.columns)}